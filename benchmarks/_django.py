@@ -0,0 +1,59 @@
+"""Shared bootstrap for the standalone benchmark scripts.
+
+Each benchmark runs against its own throwaway SQLite file (migrated from
+scratch) so it never touches ``db.sqlite3``.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path: str, keepdb: bool = False) -> None:
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.settings_dict["TEST"]["NAME"] = db_path
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+
+
+@contextmanager
+def measure(results: List[Dict[str, object]], label: str, trace: bool = True) -> Iterator[None]:
+    """Record wall time and peak Python allocations of the wrapped block.
+
+    ``trace=False`` skips allocation tracing, which slows down code that
+    creates many small objects (e.g. fetching millions of rows).
+    """
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        peak = None
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        results.append({"label": label, "ms": elapsed * 1000, "peak_kb": peak / 1024 if trace else None})
+
+
+def print_results(results: List[Dict[str, object]]) -> None:
+    width = max(len(str(r["label"])) for r in results)
+    for r in results:
+        peak = f"{r['peak_kb']:12.1f} KiB peak" if r["peak_kb"] is not None else ""
+        print(f"{r['label']:<{width}}  {r['ms']:10.1f} ms  {peak}".rstrip())
@@ -0,0 +1,132 @@
+"""Equity curve / drawdown analytics over many trades.
+
+Times ``analytics.analyze`` (all metrics, curve and every breakdown) on
+in-memory columns of ``--trades`` trades, then, on a seeded SQLite
+database of the same size, the ``values_list`` load on its own and
+``trade_analytics`` end to end: cold (just after a data change, so load,
+analysis and cache write) and warm (a repeated request served from the
+cache).
+
+    python benchmarks/bench_analytics.py --trades 1000000
+    python benchmarks/bench_analytics.py --trades 1000000 --keepdb   # reuse the seeded DB
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from _django import measure, print_results, setup_django
+
+SYMBOLS = [f"SYM{i}" for i in range(50)]
+TAGS = [f"tag{i}" for i in range(10)]
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"  # how Django stores UTC datetimes in SQLite
+
+
+def synthetic(n: int, seed: int = 3):
+    from trades import analytics
+
+    rng = np.random.default_rng(seed)
+    ts = np.sort(1_600_000_000 + rng.integers(0, 5 * 365 * 86_400, n)).astype(np.float64)
+    # Break-even expectancy keeps a million compounded trades within float range
+    win = rng.random(n) < 1 / 3
+    risk = rng.choice([0.25, 0.5, 1.0], n)
+    rr = rng.choice([1.5, 2.0, 2.5], n)
+    tag_rows = rng.choice(n, n // 2)
+    return analytics.TradeArrays(
+        ids=np.arange(1, n + 1), ts=ts, ret=np.where(win, rr * risk, -risk), r=np.where(win, rr, -1.0), win=win,
+        codes={"type": rng.integers(0, 3, n), "direction": rng.integers(0, 2, n), "symbol": rng.integers(0, len(SYMBOLS), n)},
+        labels={"type": ["crypto", "forex", "index"], "direction": ["long", "short"], "symbol": SYMBOLS},
+        tag_rows=tag_rows, tag_codes=rng.integers(0, len(TAGS), len(tag_rows)), tag_labels=TAGS,
+    )
+
+
+def seed(db_path: str, n: int, batch: int) -> None:
+    """Insert trades with plain executemany: bulk_create of 1M models takes minutes."""
+    from trades.models import Tag, Trade
+
+    existing = Trade.objects.count()
+    if existing >= n:
+        return
+    Tag.objects.bulk_create([Tag(name=t) for t in TAGS], ignore_conflicts=True)
+    tag_ids = list(Tag.objects.values_list("pk", flat=True))
+    table, links = Trade._meta.db_table, Trade.tags.through._meta.db_table
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    rng = random.Random(1)
+    con = sqlite3.connect(db_path)
+    with con:
+        for lo in range(existing, n, batch):
+            rows = [
+                (("crypto", "forex", "index")[i % 3], SYMBOLS[i % 50], 100, 99, 1, "take" if rng.random() < 1 / 3 else "loss",
+                 ("long", "short")[i % 2], (start + timedelta(minutes=3 * i)).strftime(DATE_FORMAT), 1, 2, "",
+                 start.strftime(DATE_FORMAT), start.strftime(DATE_FORMAT), 0, 0, 0)
+                for i in range(lo, min(n, lo + batch))
+            ]
+            con.executemany(
+                f"INSERT INTO {table} (type, symbol, price, stop_loss_price, volume, result, direction, date, "
+                "risk_percent, risk_reward_ratio, comment, created_at, updated_at, "
+                "large_image_size, medium_image_size, short_image_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        con.execute(
+            f"INSERT INTO {links} (trade_id, tag_id) SELECT id, ? + id % ? FROM {table} WHERE id % 2 = 0",
+            (min(tag_ids), len(tag_ids)),
+        )
+    con.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", default=str(Path(tempfile.gettempdir()) / "bench_analytics.sqlite3"))
+    parser.add_argument("--keepdb", action="store_true", help="reuse an already seeded database")
+    parser.add_argument("--skip-db", action="store_true", help="only time the in-memory computation")
+    args = parser.parse_args()
+
+    setup_django(args.db, keepdb=args.keepdb)
+    from trades import analytics, signals
+    from trades.models import Trade
+
+    results: List[Dict[str, object]] = []
+    data = synthetic(args.trades)
+    for _ in range(args.repeat):
+        with measure(results, "analyze (in memory)"):
+            analytics.analyze(data)
+
+    if not args.skip_db:
+        started = time.perf_counter()
+        seed(args.db, args.trades, args.batch)
+        print(f"seeded in {time.perf_counter() - started:.1f}s")
+        for _ in range(args.repeat):
+            # Untraced: tracing every fetched row would dominate the timing
+            with measure(results, "load (values_list)", trace=False):
+                loaded = analytics.load(Trade.objects.all())
+            with measure(results, "analyze (loaded)"):
+                analytics.analyze(loaded)
+        for _ in range(args.repeat):
+            signals.bump_data_version()  # as after any edit: the cached result no longer applies
+            with measure(results, "trade_analytics (cold)", trace=False):
+                analytics.trade_analytics(Trade.objects.all())
+            with measure(results, "trade_analytics (warm)"):
+                analytics.trade_analytics(Trade.objects.all())
+
+    best: Dict[str, Dict[str, object]] = {}
+    for r in results:
+        cur = best.get(r["label"])
+        if cur is None or r["ms"] < cur["ms"]:
+            best[r["label"]] = r
+    print(f"{args.trades} trades (best of {args.repeat})")
+    print_results(list(best.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""ForexFactory calendar JSON parsing: previous dict parser vs typed events.
+
+Builds a synthetic feed of ``--weeks`` weeks with ``--events-per-day``
+events (mixed ISO strings, timestamps and date-only entries) and times the
+old parser, ``parse_ff_calendar_json`` and the hash-cached
+``parse_ff_calendar_payload`` on an unchanged body.
+
+    python benchmarks/bench_calendar_parse.py --weeks 8 --events-per-day 150
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List
+
+from _django import ROOT
+
+CURRENCIES = ["USD", "EUR", "GBP", "JPY", "AUD", "CAD", "CHF", "NZD", "CNY"]
+IMPACTS = ["High", "Medium", "Low", "Holiday", "Non-Economic", 1, 2, 3]
+
+
+def synthetic_feed(weeks: int, per_day: int, seed: int = 5) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    start = 1_735_603_200  # 2024-12-31 00:00 UTC
+    feed = []
+    for day in range(weeks * 7):
+        for i in range(per_day):
+            ts = start + day * 86_400 + rng.randrange(0, 86_400, 900)
+            kind = rng.random()
+            ev: Dict[str, Any] = {
+                "title": f"Indicator {i}",
+                "country": rng.choice(CURRENCIES),
+                "impact": rng.choice(IMPACTS),
+                "forecast": f"{rng.uniform(-1, 3):.1f}%",
+                "previous": round(rng.uniform(-1, 3), 1),
+            }
+            if kind < 0.7:
+                ev["date"] = time.strftime("%Y-%m-%dT%H:%M:%S-05:00", time.gmtime(ts))
+            elif kind < 0.95:
+                ev["timestamp"] = ts
+            else:
+                ev["date"] = time.strftime("%Y-%m-%d", time.gmtime(ts))
+            if rng.random() < 0.3:
+                ev["actual"] = f"{rng.uniform(-1, 3):.1f}%"
+            feed.append(ev)
+    rng.shuffle(feed)
+    return feed
+
+
+# The parser as it was before CalendarEvent, kept for comparison
+def legacy_parse(data: List[Dict[str, Any]]) -> List[Dict[str, object]]:
+    if not data:
+        return []
+    # Normalize and group by date (YYYY-MM-DD)
+    groups_map: Dict[str, List[Dict[str, str]]] = {}
+
+    def norm_impact(v: Any) -> str:
+        if v is None:
+            return ""
+        if isinstance(v, (int, float)):
+            return {1: "Low", 2: "Medium", 3: "High"}.get(int(v), "")
+        s = str(v).strip().lower()
+        if "high" in s:
+            return "High"
+        if "medium" in s or "med" in s:
+            return "Medium"
+        if "low" in s:
+            return "Low"
+        return s.capitalize() if s else ""
+
+    for ev in data:
+        # Attempt to support a few possible schemas
+        title = (ev.get("title") or ev.get("event") or "").strip()
+        if not title:
+            continue
+        country = (ev.get("country") or ev.get("currency") or "").strip()
+        impact = norm_impact(ev.get("impact"))
+        url = ev.get("id")
+        if url:
+            url = f"https://www.forexfactory.com/calendar?event={url}"
+        else:
+            url = ""
+        # Time handling: many feeds include either timestamp (seconds) or datetime string
+        t_raw = ev.get("timestamp") or ev.get("time") or ev.get("date") or ""
+        date_key = ""
+        time_txt = "—"
+        if isinstance(t_raw, (int, float)):
+            import datetime as _dt
+            dt = _dt.datetime.utcfromtimestamp(int(t_raw))
+            date_key = dt.strftime("%Y-%m-%d")
+            time_txt = dt.strftime("%H:%M")
+        else:
+            s = str(t_raw)
+            # Expected like "2025-08-31 13:30:00" or "2025-08-31T13:30:00Z"
+            m = re.match(r"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2})", s)
+            if m:
+                date_key, time_txt = m.group(1), m.group(2)
+            elif re.match(r"\d{4}-\d{2}-\d{2}$", s):
+                date_key, time_txt = s, "—"
+        if not date_key:
+            # Put unknown dates under a generic label
+            date_key = "Unknown Date"
+
+        actual = (ev.get("actual") or ev.get("actualValue") or "").strip() if isinstance(ev.get("actual"), str) or isinstance(ev.get("actualValue"), str) else (str(ev.get("actual")) if ev.get("actual") is not None else "")
+        forecast = (ev.get("forecast") or ev.get("forecastValue") or "").strip() if isinstance(ev.get("forecast"), str) or isinstance(ev.get("forecastValue"), str) else (str(ev.get("forecast")) if ev.get("forecast") is not None else "")
+        previous = (ev.get("previous") or ev.get("previousValue") or "").strip() if isinstance(ev.get("previous"), str) or isinstance(ev.get("previousValue"), str) else (str(ev.get("previous")) if ev.get("previous") is not None else "")
+
+        groups_map.setdefault(date_key, []).append({
+            "time": time_txt,
+            "currency": country,
+            "event": title,
+            "impact": impact,
+            "actual": actual,
+            "forecast": forecast,
+            "previous": previous,
+            "url": url,
+        })
+
+    # Sort groups by date where possible
+    def sort_key(k: str) -> Any:
+        m = re.match(r"(\d{4})-(\d{2})-(\d{2})", k)
+        if m:
+            return (int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        return (9999, 12, 31, k)
+
+    groups: List[Dict[str, object]] = []
+    for k in sorted(groups_map.keys(), key=sort_key):
+        events = groups_map[k]
+        # sort events by time within day
+        def ekey(e: Dict[str, str]) -> Any:
+            m = re.match(r"(\d{2}):(\d{2})", e.get("time") or "")
+            return (int(m.group(1)), int(m.group(2))) if m else (99, 99)
+        events.sort(key=ekey)
+        groups.append({"label": k, "events": events})
+    return groups
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--events-per-day", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+    from trades.calendar_feed import parse_ff_calendar_json, parse_ff_calendar_payload
+
+    feed = synthetic_feed(args.weeks, args.events_per_day)
+    body = json.dumps(feed).encode()
+
+    def best(fn):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
+
+    parse_ff_calendar_payload(body)  # warm the hash cache
+    rows = {
+        "legacy parser (before)": lambda: legacy_parse(feed),
+        "typed parser": lambda: parse_ff_calendar_json(feed),
+        "decode + legacy parser (before)": lambda: legacy_parse(json.loads(body)),
+        "decode + typed parser": lambda: parse_ff_calendar_json(json.loads(body)),
+        "unchanged body (hash cache hit)": lambda: parse_ff_calendar_payload(body),
+    }
+    print(f"{len(feed)} events over {args.weeks * 7} days, {len(body) / 1024:.0f} KiB of JSON")
+    for label, fn in rows.items():
+        print(f"{label:<34} {best(fn):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
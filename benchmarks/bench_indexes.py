@@ -0,0 +1,137 @@
+"""EXPLAIN QUERY PLAN and timings for the trade list filter combinations.
+
+Seeds ``--trades`` rows (default 1M) with raw inserts, then runs the exact
+queries TradeListView and the stats module issue for each filter
+combination, first without and then with the indexes declared in
+``Trade.Meta.indexes``.
+
+    python benchmarks/bench_indexes.py --trades 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from _django import setup_django
+
+COMBOS: List[Dict[str, List[str]]] = [
+    {},
+    {"type": ["crypto"]},
+    {"type": ["crypto", "forex"]},
+    {"result": ["take"]},
+    {"direction": ["short"]},
+    {"type": ["forex"], "result": ["loss"]},
+    {"type": ["index"], "result": ["take"], "direction": ["long"]},
+]
+
+
+def seed(n: int, batch: int = 20_000) -> None:
+    from django.db import connection, transaction
+
+    with connection.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM trades_trade")
+        existing = cur.fetchone()[0]
+    if existing >= n:
+        return
+    rng = random.Random(7)
+    start = datetime(2015, 1, 1, tzinfo=dt_timezone.utc)
+    sql = (
+        "INSERT INTO trades_trade (type, symbol, price, stop_loss_price, volume, result, direction, date, "
+        "large_image_size, medium_image_size, short_image_size, risk_percent, risk_reward_ratio, comment, "
+        "created_at, updated_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 0, 0, 0, %s, %s, '', %s, %s)"
+    )
+    rows: List[Tuple] = []
+    for i in range(existing, n):
+        date = start + timedelta(minutes=rng.randint(0, 10 * 365 * 24 * 60))
+        created = date.isoformat(" ")
+        rows.append((
+            rng.choice(("crypto", "forex", "index")), f"SYM{rng.randint(0, 400)}",
+            "100.0", "99.0", "1.0",
+            rng.choice(("take", "loss")), rng.choice(("long", "short")), created,
+            str(rng.choice((0.5, 1, 1.5, 2))), str(rng.randint(50, 500) / 100), created, created,
+        ))
+        if len(rows) >= batch:
+            with transaction.atomic(), connection.cursor() as cur:
+                cur.executemany(sql, rows)
+            rows.clear()
+    if rows:
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.executemany(sql, rows)
+
+
+def build_queries(combo: Dict[str, List[str]]) -> Dict[str, Tuple[str, tuple]]:
+    from django.test import RequestFactory
+    from trades.stats import bucket_rows
+    from trades.views import TradeListView
+
+    view = TradeListView()
+    view.request = RequestFactory().get("/", combo)
+    qs = view.get_queryset()
+    return {
+        "page": qs[:25].query.sql_with_params(),
+        "count": qs.order_by().values("pk").query.sql_with_params(),  # shape of COUNT(*) subquery
+        "stats": bucket_rows(qs).query.sql_with_params(),
+    }
+
+
+def run(label: str, repeat: int) -> List[Tuple[str, str, float, List[str]]]:
+    from django.db import connection
+
+    out = []
+    with connection.cursor() as cur:
+        cur.execute("ANALYZE")
+        for combo in COMBOS:
+            name = ",".join(f"{k}={'|'.join(v)}" for k, v in combo.items()) or "(no filter)"
+            for kind, (sql, params) in build_queries(combo).items():
+                if kind == "count":
+                    sql = f"SELECT COUNT(*) FROM ({sql})"
+                cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+                plan = [row[-1] for row in cur.fetchall()]
+                best = float("inf")
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    cur.execute(sql, params)
+                    cur.fetchall()
+                    best = min(best, time.perf_counter() - started)
+                out.append((name, kind, best * 1000, plan))
+    print(f"\n=== {label} ===")
+    for name, kind, ms, plan in out:
+        print(f"{name:<40} {kind:<6} {ms:9.1f} ms   " + " | ".join(plan))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", default=str(Path(tempfile.gettempdir()) / "bench_indexes.sqlite3"))
+    parser.add_argument("--keepdb", action="store_true", help="reuse an already seeded database")
+    args = parser.parse_args()
+
+    setup_django(args.db, keepdb=args.keepdb)
+    from django.db import connection
+    from trades.models import Trade
+
+    seed(args.trades)
+    indexes = Trade._meta.indexes
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.execute(f'DROP INDEX IF EXISTS "{index.name}"')
+    before = run("before (symbol index only)", args.repeat)
+    with connection.schema_editor() as editor:
+        for index in indexes:
+            editor.add_index(Trade, index)
+    after = run("after (Trade.Meta.indexes)", args.repeat)
+
+    print("\n=== speedup ===")
+    for (name, kind, b, _), (_, _, a, _) in zip(before, after):
+        print(f"{name:<40} {kind:<6} {b:9.1f} -> {a:9.1f} ms  x{b / a if a else float('inf'):.1f}")
+
+
+if __name__ == "__main__":
+    main()
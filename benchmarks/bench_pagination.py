@@ -0,0 +1,61 @@
+"""Offset vs keyset pagination cost on shallow and deep pages of the trade list.
+
+    python benchmarks/bench_pagination.py --trades 1000000 --deep-page 40000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from _django import setup_django
+from bench_indexes import seed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--deep-page", type=int, default=40_000)
+    parser.add_argument("--per-page", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", default=str(Path(tempfile.gettempdir()) / "bench_indexes.sqlite3"))
+    parser.add_argument("--keepdb", action="store_true", help="reuse an already seeded database")
+    args = parser.parse_args()
+
+    setup_django(args.db, keepdb=args.keepdb)
+    from django.core.paginator import Paginator
+    from django.db import connection
+    from trades.models import Trade
+    from trades.pagination import CursorPaginator, encode_cursor
+
+    seed(args.trades)
+    with connection.cursor() as cur:
+        cur.execute("ANALYZE")
+    qs = Trade.objects.prefetch_related("tags")
+    deep = min(args.deep_page, max(1, args.trades // args.per_page - 1))
+    # Cursor pointing at the last row of the page before `deep`
+    boundary = Trade.objects.order_by("-date", "-created_at", "-id")[(deep - 1) * args.per_page - 1]
+    cursor = encode_cursor(boundary)
+
+    def best(fn):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
+
+    rows = [
+        ("offset page 1", best(lambda: list(Paginator(qs, args.per_page).page(1)))),
+        (f"offset page {deep}", best(lambda: list(Paginator(qs, args.per_page).page(deep)))),
+        ("cursor page 1", best(lambda: list(CursorPaginator(qs, args.per_page).page()))),
+        (f"cursor page {deep}", best(lambda: list(CursorPaginator(qs, args.per_page).page(after=cursor)))),
+    ]
+    print(f"{Trade.objects.count()} trades, {args.per_page} per page (best of {args.repeat})")
+    for label, ms in rows:
+        print(f"{label:<24} {ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Tag filter cost: legacy join + DISTINCT vs EXISTS subqueries (any / all).
+
+Seeds trades that each carry ``--tags-per-trade`` of ``--tags`` tags and
+times the list page, COUNT(*) and stats queries for each strategy.
+
+    python benchmarks/bench_tag_filter.py --trades 200000 --tags 50 --tags-per-trade 8
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from _django import setup_django
+from bench_indexes import seed
+
+
+def seed_tags(n_tags: int, per_trade: int) -> None:
+    from django.db import connection, transaction
+    from trades.models import Tag, Trade
+
+    if Tag.objects.count() >= n_tags:
+        return
+    Tag.objects.bulk_create([Tag(name=f"tag{i}") for i in range(n_tags)], ignore_conflicts=True)
+    tag_ids = list(Tag.objects.values_list("pk", flat=True))
+    rng = random.Random(11)
+    rows = []
+    sql = "INSERT INTO trades_trade_tags (trade_id, tag_id) VALUES (%s, %s)"
+    for trade_id in Trade.objects.values_list("pk", flat=True).iterator(chunk_size=10_000):
+        rows.extend((trade_id, t) for t in rng.sample(tag_ids, per_trade))
+        if len(rows) >= 50_000:
+            with transaction.atomic(), connection.cursor() as cur:
+                cur.executemany(sql, rows)
+            rows.clear()
+    if rows:
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.executemany(sql, rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=200_000)
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--tags-per-trade", type=int, default=8)
+    parser.add_argument("--filter-tags", type=int, default=3, help="number of tags selected in the filter")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", default=str(Path(tempfile.gettempdir()) / "bench_tag_filter.sqlite3"))
+    parser.add_argument("--keepdb", action="store_true", help="reuse an already seeded database")
+    args = parser.parse_args()
+
+    setup_django(args.db, keepdb=args.keepdb)
+    from django.db import connection
+    from trades.filters import filter_by_tags
+    from trades.models import Tag, Trade
+    from trades.stats import trade_stats
+
+    seed(args.trades)
+    seed_tags(args.tags, args.tags_per_trade)
+    with connection.cursor() as cur:
+        cur.execute("ANALYZE")
+    selected = list(Tag.objects.values_list("pk", flat=True)[: args.filter_tags])
+    base = Trade.objects.prefetch_related("tags")
+    strategies = {
+        "join + DISTINCT (before)": base.filter(tags__id__in=selected).distinct(),
+        "EXISTS, match any": filter_by_tags(base, selected, "any"),
+        "EXISTS, match all": filter_by_tags(base, selected, "all"),
+    }
+
+    def best(fn):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
+
+    print(f"{Trade.objects.count()} trades, {args.tags_per_trade} of {args.tags} tags each, filtering on {len(selected)} tags")
+    for label, qs in strategies.items():
+        page = best(lambda: list(qs[:25]))
+        count = best(qs.count)
+        stats = best(lambda: trade_stats(qs))
+        print(f"{label:<26} page {page:8.1f} ms   count {count:8.1f} ms   stats {stats:8.1f} ms   rows {qs.count()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Per-request latency and memory of the trade list, admin changelist and stats.
+
+Seeds N trades that each reference three screenshots of ``--image-kb`` KiB
+in the image store and measures the pages that list trades. None of them
+should scale with image size.
+
+    python benchmarks/bench_trade_list.py --trades 10000 --image-kb 1024
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from _django import measure, print_results, setup_django
+
+
+def seed(n: int, image_kb: int, batch: int) -> None:
+    from django.utils import timezone
+    from trades.image_store import get_image_store
+    from trades.models import Trade
+
+    existing = Trade.objects.count()
+    if existing >= n:
+        return
+    digest, size = get_image_store().save(os.urandom(image_kb * 1024))
+    now = timezone.now()
+    pending: List[Trade] = []
+    for i in range(existing, n):
+        pending.append(
+            Trade(
+                type=("crypto", "forex", "index")[i % 3],
+                symbol=f"SYM{i % 50}",
+                price=100 + i % 7,
+                stop_loss_price=99,
+                volume=1,
+                result=("take", "loss")[i % 2],
+                direction=("long", "short")[i % 2],
+                date=now,
+                risk_percent=1,
+                risk_reward_ratio=2,
+                large_image_sha256=digest, large_image_size=size, large_image_content_type="image/png",
+                medium_image_sha256=digest, medium_image_size=size, medium_image_content_type="image/png",
+                short_image_sha256=digest, short_image_size=size, short_image_content_type="image/png",
+            )
+        )
+        if len(pending) >= batch:
+            Trade.objects.bulk_create(pending)
+            pending.clear()
+    if pending:
+        Trade.objects.bulk_create(pending)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=10_000)
+    parser.add_argument("--image-kb", type=int, default=1024)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default=str(Path(tempfile.gettempdir()) / "bench_trade_list.sqlite3"))
+    parser.add_argument("--keepdb", action="store_true", help="reuse an already seeded database")
+    args = parser.parse_args()
+
+    setup_django(args.db, keepdb=args.keepdb)
+
+    from django.contrib.auth import get_user_model
+    from django.test import Client, override_settings
+    from trades import calendar_feed
+    from trades.models import Trade
+
+    # Keep the upstream calendar out of the measurement
+    calendar_feed.get_calendar = lambda force_refresh=False, wait=0: {"calendar": [], "index": calendar_feed.resolve_index([], calendar_feed.build_index([])), "error": None}
+
+    override_settings(
+        TRADE_IMAGE_STORE={
+            "BACKEND": "trades.image_store.FileSystemImageStore",
+            "OPTIONS": {"location": args.db + ".images"},
+        }
+    ).enable()
+    seed(args.trades, args.image_kb, args.batch)
+    admin = get_user_model().objects.filter(username="bench").first()
+    if admin is None:
+        admin = get_user_model().objects.create_superuser("bench", "bench@example.com", "bench")
+    client = Client()
+    client.force_login(admin)
+    first_pk = Trade.objects.values_list("pk", flat=True).first()
+
+    results: List[Dict[str, object]] = []
+    for _ in range(args.repeat):
+        with measure(results, "page query"):
+            list(Trade.objects.prefetch_related("tags")[:25])
+        with measure(results, "GET /"):
+            assert client.get("/").status_code == 200
+        with measure(results, "GET /admin/trades/trade/"):
+            assert client.get("/admin/trades/trade/").status_code == 200
+        with measure(results, "GET /stats/"):
+            assert client.get("/stats/").status_code == 200
+        with measure(results, "GET /image/<pk>/ltf/"):
+            resp = client.get(f"/image/{first_pk}/ltf/")
+            assert resp.status_code == 200
+            for _ in resp.streaming_content:
+                pass
+
+    best: Dict[str, Dict[str, object]] = {}
+    for r in results:
+        cur = best.get(r["label"])
+        if cur is None or r["ms"] < cur["ms"]:
+            best[r["label"]] = r
+    print(f"{args.trades} trades x 3 images x {args.image_kb} KiB (best of {args.repeat})")
+    print_results(list(best.values()))
+
+
+if __name__ == "__main__":
+    main()
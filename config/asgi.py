@@ -1,7 +1,47 @@
+import asyncio
+import contextlib
 import os
+
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-application = get_asgi_application()
 
+class CancelOnDisconnect:
+    """Stop GET responses (the chart's SSE stream) when the client goes away.
+
+    Django 4.2 stops listening to ``receive`` once the request body is read,
+    so an endless streaming response would outlive its browser tab. GET
+    requests carry no body worth spooling, so their messages are buffered
+    here and ``receive`` is watched for ``http.disconnect`` instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+        messages = []
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] == "http.disconnect" or not message.get("more_body"):
+                break
+
+        async def replay():
+            return messages.pop(0) if messages else await receive()
+
+        app = asyncio.ensure_future(self.app(scope, replay, send))
+        watcher = asyncio.ensure_future(receive())
+        try:
+            await asyncio.wait({app, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watcher.cancel()
+            if not app.done():
+                app.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await app  # lets a cancelled stream run its cleanup; re-raises app errors
+
+
+application = CancelOnDisconnect(get_asgi_application())
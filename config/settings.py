@@ -73,5 +73,95 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Content-addressed screenshot storage (see trades/image_store.py)
+TRADE_IMAGE_STORE = {
+    "BACKEND": "trades.image_store.FileSystemImageStore",
+    "OPTIONS": {"location": MEDIA_ROOT / "trade_images"},
+}
+# List previews: bounding box (px), background render threads
+TRADE_THUMBNAIL_SIZE = (320, 96)
+TRADE_THUMBNAIL_WORKERS = 2
+
+# Trade list pagination: "offset" (page numbers) or "cursor" (keyset; ?pager= overrides)
+TRADE_LIST_PAGINATION = "offset"
+
+# Upstream data (calendar, klines) is cached in CACHES[TRADE_UPSTREAM_CACHE].
+# TRADE_CACHE_BACKEND: "locmem" (per process), "file" or "redis" (shared by workers);
+# TRADE_CACHE_LOCATION: directory for "file", URL for "redis".
+_UPSTREAM_CACHES = {
+    "locmem": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "trades-upstream"},
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("TRADE_CACHE_LOCATION", str(BASE_DIR / "var" / "upstream_cache")),
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("TRADE_CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+    },
+}
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "upstream": {**_UPSTREAM_CACHES[os.environ.get("TRADE_CACHE_BACKEND", "locmem")], "KEY_PREFIX": "trades"},
+}
+TRADE_UPSTREAM_CACHE = "upstream"
+# Kline series store (see trades/klines.py): incremental refresh period, per-process
+# LRU bounds, longest series kept / served, optional on-disk copy (DIRECTORY),
+# bounds of the cache of serialized API responses (ENCODED_*)
+TRADE_KLINES_CACHE = {
+    "REFRESH_SECONDS": 30,
+    "MAX_ENTRIES": 256,
+    "MAX_BYTES": 64 * 1024 * 1024,
+    "IDLE_SECONDS": 3600,
+    "MAX_CANDLES": 20_000,
+    "MAX_LIMIT": 5000,
+    "DIRECTORY": None,
+    "ENCODED_ENTRIES": 512,
+    "ENCODED_BYTES": 16 * 1024 * 1024,
+}
+# Outbound HTTP to Binance/ForexFactory (see trades/upstream.py)
+TRADE_UPSTREAM = {
+    "MAX_CONNECTIONS_PER_HOST": 4,
+    "ACQUIRE_TIMEOUT_SECONDS": 5,
+    "TIMEOUT_SECONDS": 10,
+    "MAX_ATTEMPTS": 3,
+    "BACKOFF_SECONDS": 0.5,
+    "MAX_BACKOFF_SECONDS": 8,
+    "BREAKER_THRESHOLD": 5,
+    "BREAKER_COOLDOWN_SECONDS": 30,
+}
+# Binance REST base URL (tests point it at a local fake server)
+BINANCE_API_BASE = "https://api.binance.com"
+
+# Live chart updates (trades/stream.py, ASGI only): one Binance poll per
+# symbol/interval every POLL_SECONDS, keep-alive comment every HEARTBEAT_SECONDS
+TRADE_KLINES_STREAM = {
+    "POLL_SECONDS": 2,
+    "HEARTBEAT_SECONDS": 15,
+}
+
+# Economic calendar cache (see trades/calendar_feed.py): refresh period, failure
+# backoff (doubles up to the max), news page wait on a cold cache, daemon refresher
+TRADE_CALENDAR_TTL = 600
+TRADE_CALENDAR_RETRY_SECONDS = 30
+TRADE_CALENDAR_MAX_RETRY_SECONDS = 900
+TRADE_CALENDAR_WAIT_SECONDS = 10
+TRADE_CALENDAR_BACKGROUND_REFRESH = True
+
+# Bulk trade import (trades/importer.py): rows validated and inserted per transaction
+TRADE_IMPORT_CHUNK_SIZE = 1000
+# Stats page analytics (trades/analytics.py): lifetime of cached results (keyed by the data version)
+TRADE_ANALYTICS_CACHE_SECONDS = 24 * 3600
+# Monte Carlo risk of ruin (trades/montecarlo.py): worker processes, paths x trades
+# per shard, request caps, lifetime of cached results (keyed by the data version)
+TRADE_MONTE_CARLO = {
+    "WORKERS": 2,
+    "SHARD_CELLS": 2_000_000,
+    "MAX_SIMULATIONS": 100_000,
+    "MAX_HORIZON": 5000,
+    "CACHE_SECONDS": 24 * 3600,
+}
+# Trade export (trades/export.py): rows read per query while streaming
+TRADE_EXPORT_CHUNK_SIZE = 2000
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
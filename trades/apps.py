@@ -5,3 +5,7 @@ class TradesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "trades"
 
+    def ready(self):
+        from . import signals
+
+        signals.connect()
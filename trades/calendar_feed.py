@@ -0,0 +1,650 @@
+"""Economic calendar feed (ForexFactory) and its shared cache.
+
+Pages never fetch the feed themselves. ``get_calendar`` returns whatever is
+cached, stale or not, and hands refreshing to a single background thread.
+The cached state lives in the shared upstream cache (``trades.upstream_cache``)
+so every worker process serves the same copy:
+
+* single-flight: at most one fetch is in progress across all processes
+  (a cache ``add`` lock, plus an in-process event for threads), however
+  many requests find the cache expired at the same moment;
+* stale-while-revalidate: expired data keeps being served until a fetch
+  succeeds, so an outage never empties the sidebar;
+* negative caching: a failed or empty fetch is not retried before an
+  exponentially growing backoff (``TRADE_CALENDAR_RETRY_SECONDS`` doubling up
+  to ``TRADE_CALENDAR_MAX_RETRY_SECONDS``);
+* a daemon refresher re-fetches every ``TRADE_CALENDAR_TTL`` seconds so the
+  cache is normally warm before anyone asks;
+* each process keeps its decoded copy of the state until a small stamp key
+  says another write happened, so page views read a few bytes instead of
+  decoding the whole calendar.
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import OrderedDict
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .upstream import UpstreamError, get_client
+from .upstream_cache import SharedCache, get_shared_cache
+
+try:  # optional HTML parser
+    from bs4 import BeautifulSoup  # type: ignore
+except Exception:  # pragma: no cover
+    BeautifulSoup = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+FEED_ERROR = "Calendar feed unavailable (network blocked or rate limited)."
+PARSE_ERROR = "Could not parse calendar data from ForexFactory."
+LOADING_ERROR = "Calendar is loading, check back in a moment."
+
+
+class CalendarError(Exception):
+    pass
+
+
+def load_calendar() -> List[Dict[str, object]]:
+    """Fetch and parse the weekly feed; raises ``CalendarError`` on failure."""
+    # Prefer JSON calendar API only; avoid HTML fallback that can 403
+    try:
+        body = fetch_ff_calendar_body()
+    except Exception as exc:
+        raise CalendarError(FEED_ERROR) from exc
+    groups = parse_ff_calendar_payload(body)
+    if not groups:
+        raise CalendarError(PARSE_ERROR)
+    return groups
+
+
+class CalendarCache:
+    """Serve cached calendar groups and refresh them off the request path."""
+
+    state_key = "calendar:state"
+    stamp_key = "calendar:stamp"
+    lock_key = "calendar:lock"
+
+    def __init__(
+        self,
+        loader: Callable[[], List[Dict[str, object]]] = load_calendar,
+        ttl: float = 600,
+        retry: float = 30,
+        max_retry: float = 900,
+        clock: Callable[[], float] = time.time,
+        store: Optional[SharedCache] = None,
+        lock_timeout: float = 120,
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.retry = retry
+        self.max_retry = max_retry
+        self.clock = clock
+        self.store = store if store is not None else get_shared_cache()
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._inflight: Optional[threading.Event] = None
+        self._refresher: Optional[threading.Thread] = None
+        # (stamp, state with its index resolved) last read by this process
+        self._local: Optional[Tuple[str, Dict[str, Any]]] = None
+
+    def _state(self) -> Dict[str, Any]:
+        stamp = self.store.get(self.stamp_key)
+        local = self._local
+        if stamp is not None and local is not None and local[0] == stamp:
+            return local[1]
+        state = self.store.get(self.state_key)
+        if state is None:
+            state = {"groups": [], "index": None, "error": None, "fetched_at": None, "failures": 0, "retry_at": 0.0}
+        index = state.get("index")
+        if not index or "order" not in index:
+            # Written before (position) indexes existed
+            index = build_index(state["groups"])
+        state = {**state, "index": resolve_index(state["groups"], index)}
+        if stamp is not None:
+            self._local = (stamp, state)
+        return state
+
+    def _write(self, state: Dict[str, Any]) -> None:
+        # State first: a reader that sees the new stamp must find the new state
+        self.store.set(self.state_key, state, None)
+        self.store.set(self.stamp_key, uuid.uuid4().hex, None)
+
+    def _due(self, state: Dict[str, Any]) -> float:
+        due = state["retry_at"]
+        if state["fetched_at"] is not None:
+            due = max(due, state["fetched_at"] + self.ttl)
+        return due
+
+    def _claim(self) -> Optional[threading.Event]:
+        # Caller holds self._lock; the cache lock covers other processes
+        if self._inflight is not None or not self.store.add(self.lock_key, os.getpid(), self.lock_timeout):
+            return None
+        self._inflight = threading.Event()
+        return self._inflight
+
+    def get(self, force_refresh: bool = False, wait: float = 0) -> Dict[str, Any]:
+        """Return ``{"calendar": groups, "index": index, "error": message}`` without blocking.
+
+        An expired (or, with ``force_refresh``, any) entry triggers a
+        background refresh unless a failure backoff is running. ``wait``
+        bounds how long to wait for that refresh when there is nothing
+        cached yet or a refresh was forced.
+        """
+        state = self._state()
+        now = self.clock()
+        refreshing = False
+        with self._lock:
+            pending = self._inflight
+            if pending is None and now >= state["retry_at"] and (force_refresh or now >= self._due(state)):
+                pending = self._claim()
+                if pending is not None:
+                    threading.Thread(target=self._refresh, args=(pending,), name="calendar-refresh", daemon=True).start()
+                else:
+                    refreshing = True  # another process holds the lock
+        if pending is not None and wait > 0 and (not state["groups"] or force_refresh):
+            if pending.wait(wait):
+                state = self._state()
+        error = state["error"]
+        if not state["groups"] and error is None and (pending is not None or refreshing):
+            error = LOADING_ERROR
+        return {"calendar": state["groups"], "index": state["index"], "error": error}
+
+    def refresh(self) -> bool:
+        """Fetch now unless a fetch is already in progress somewhere.
+
+        Returns whether this call updated the cache.
+        """
+        with self._lock:
+            pending = self._inflight
+            done = self._claim() if pending is None else None
+        if done is None:
+            if pending is not None:
+                pending.wait()
+            return False
+        return self._refresh(done)
+
+    def _refresh(self, done: threading.Event) -> bool:
+        try:
+            try:
+                groups = self.loader()
+                error = None
+            except Exception as exc:
+                groups, error = None, str(exc) if isinstance(exc, CalendarError) else FEED_ERROR
+                logger.warning("Calendar refresh failed: %s", exc)
+            state = {**self._state()}
+            index = state.pop("index")
+            now = self.clock()
+            if groups is not None:
+                state.update(groups=groups, index=build_index(groups), error=None, fetched_at=now, failures=0, retry_at=0.0)
+            else:
+                # Keep serving the last good groups, but don't retry before the backoff
+                state["failures"] += 1
+                state["error"] = error
+                state["retry_at"] = now + min(self.max_retry, self.retry * 2 ** (state["failures"] - 1))
+                # Stored without the events resolve_index() added for this process
+                state["index"] = {k: v for k, v in index.items() if k != "events"}
+            self._write(state)
+            return groups is not None
+        finally:
+            self.store.delete(self.lock_key)
+            with self._lock:
+                self._inflight = None
+            done.set()
+
+    def start_refresher(self) -> None:
+        """Start the daemon thread that keeps the cache warm (idempotent)."""
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._run_refresher, name="calendar-refresher", daemon=True)
+            self._refresher.start()
+
+    def _run_refresher(self) -> None:
+        while True:
+            now = self.clock()
+            due = self._due(self._state())
+            if now >= due:
+                self.refresh()
+            # Another worker may have refreshed meanwhile; re-read before sleeping
+            time.sleep(max(1.0, min(self._due(self._state()) - self.clock(), self.ttl)))
+
+
+@functools.lru_cache(maxsize=None)
+def get_calendar_cache() -> CalendarCache:
+    return CalendarCache(
+        ttl=float(getattr(settings, "TRADE_CALENDAR_TTL", 600)),
+        retry=float(getattr(settings, "TRADE_CALENDAR_RETRY_SECONDS", 30)),
+        max_retry=float(getattr(settings, "TRADE_CALENDAR_MAX_RETRY_SECONDS", 900)),
+    )
+
+
+@receiver(setting_changed)
+def _reset_calendar_cache(*, setting: str, **kwargs) -> None:
+    if setting.startswith("TRADE_CALENDAR_") or setting in {"CACHES", "TRADE_UPSTREAM_CACHE"}:
+        get_calendar_cache.cache_clear()
+
+
+def get_calendar(force_refresh: bool = False, wait: float = 0) -> Dict[str, Any]:
+    cache = get_calendar_cache()
+    if getattr(settings, "TRADE_CALENDAR_BACKGROUND_REFRESH", True):
+        cache.start_refresher()
+    return cache.get(force_refresh=force_refresh, wait=wait)
+
+
+def build_index(groups: List[Dict[str, object]]) -> Dict[str, Any]:
+    """Lookup structures built once per refresh (JSON-safe, for the shared cache).
+
+    Events are referred to by their position in ``groups`` flattened.
+    ``order`` lists those positions in time order, undated events last;
+    ``times`` holds the timestamps of the dated ones, so events from a
+    moment on start at ``bisect(times, moment)``; ``by_impact`` and
+    ``by_currency`` map to ascending ranks in ``order``.
+    """
+    flat = [ev for group in groups for ev in group["events"]]
+    dated = sorted((i for i, ev in enumerate(flat) if ev.get("ts") is not None), key=lambda i: flat[i]["ts"])
+    order = dated + [i for i, ev in enumerate(flat) if ev.get("ts") is None]
+    by_impact: Dict[str, List[int]] = {}
+    by_currency: Dict[str, List[int]] = {}
+    for rank, i in enumerate(order):
+        ev = flat[i]
+        if ev["impact"]:
+            by_impact.setdefault(ev["impact"], []).append(rank)
+        if ev["currency"]:
+            by_currency.setdefault(ev["currency"].upper(), []).append(rank)
+    return {"order": order, "times": [flat[i]["ts"] for i in dated], "by_impact": by_impact, "by_currency": by_currency}
+
+
+def resolve_index(groups: List[Dict[str, object]], index: Dict[str, Any]) -> Dict[str, Any]:
+    """``index`` plus ``events``: the events themselves (with their day ``date``) in time order.
+
+    Done once per process and state, never stored in the shared cache.
+    """
+    flat = [{**ev, "date": group["label"]} for group in groups for ev in group["events"]]
+    return {**index, "events": [flat[i] for i in index["order"]]}
+
+
+def select_events(
+    index: Dict[str, Any],
+    currencies: Sequence[str] = (),
+    impacts: Sequence[str] = (),
+    since: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Events matching any of ``currencies`` and any of ``impacts``, in time order.
+
+    ``index`` comes from ``resolve_index``. ``since`` skips dated events before that epoch second (undated ones are
+    always kept). Only the matching positions are touched.
+    """
+    positions: Sequence[int] = range(len(index["events"]))
+    for key, wanted in (("by_currency", currencies), ("by_impact", impacts)):
+        if wanted:
+            lists = [index[key].get(value, []) for value in wanted]
+            found = lists[0] if len(lists) == 1 else sorted(set().union(*lists))
+            positions = found if isinstance(positions, range) else sorted(set(positions).intersection(found))
+    if since is not None:
+        positions = positions[bisect_left(positions, bisect_left(index["times"], since)):]
+    if limit is not None:
+        positions = positions[:limit]
+    events = index["events"]
+    return [events[i] for i in positions]
+
+
+def impact_choices(index: Dict[str, Any]) -> List[str]:
+    """Impacts present in ``index``, most severe first."""
+    return sorted(index["by_impact"], key=lambda i: (_IMPACT_RANK.get(i, len(_IMPACT_RANK)), i))
+
+
+def regroup(events: List[Dict[str, Any]]) -> List[Dict[str, object]]:
+    """Day groups (as in the cached calendar) for a selection of indexed events."""
+    days: Dict[str, List[Dict[str, Any]]] = {}
+    for ev in events:
+        days.setdefault(ev["date"], []).append(ev)
+    return [{"label": label, "events": day} for label, day in days.items()]
+
+
+def fetch_forex_factory_calendar_html() -> str:
+    headers = {"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"}
+    return get_client().get_text("https://www.forexfactory.com/calendar", headers=headers)
+
+
+def parse_forex_factory_calendar(html: str) -> List[Dict[str, object]]:
+    groups: List[Dict[str, object]] = []
+    if not BeautifulSoup:
+        return groups
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Attempt 1: New FF calendar structure with day containers
+    day_containers = soup.select('[data-day], .calendar__day, .day')
+    if day_containers:
+        for day in day_containers:
+            # Day label
+            label = day.get("data-day") or day.get_text(strip=True)[:20]
+            title_el = day.find(class_=re.compile(r"(calendar__day|day__title|calendar-day|date)", re.I))
+            if title_el:
+                label = title_el.get_text(strip=True) or label
+
+            events: List[Dict[str, str]] = []
+            # Rows within a day
+            rows = day.select('[data-event-id], [data-eventid], .calendar__row, tr') or []
+            for r in rows:
+                # Skip if row is a header with no event
+                if r.name == "tr" and r.find("th"):
+                    continue
+                # Extract fields with flexible selectors
+                def pick_text(sel_list: List[str]) -> str:
+                    for sel in sel_list:
+                        el = r.select_one(sel)
+                        if el and el.get_text(strip=True):
+                            return el.get_text(strip=True)
+                    return ""
+
+                time_txt = pick_text([".time", ".calendar__time", "td.time", "[data-col='time']"]) or "—"
+                currency = pick_text([".currency", ".calendar__currency", "td.currency", "[data-col='currency']"]) or ""
+                event = pick_text([".event", ".calendar__event-title", "td.event", "[data-col='event']"]) or ""
+                if not event:
+                    continue
+
+                impact_txt = pick_text([".impact", ".calendar__impact", "td.impact", "[data-col='impact']"]) or ""
+                # Normalize impact severity if possible
+                severity = ""
+                if impact_txt:
+                    m = re.search(r"(low|medium|high|holiday|non-economic)", impact_txt, re.I)
+                    if m:
+                        severity = m.group(1).capitalize()
+                if not severity:
+                    # Count impact icons as heuristic
+                    icons = r.select(".impact img[alt], .impact i")
+                    if icons:
+                        count = len(icons)
+                        severity = {1: "Low", 2: "Medium", 3: "High"}.get(count, "")
+
+                actual = pick_text([".actual", "td.actual", "[data-col='actual']"]) or ""
+                forecast = pick_text([".forecast", "td.forecast", "[data-col='forecast']"]) or ""
+                previous = pick_text([".previous", "td.previous", "[data-col='previous']"]) or ""
+                link_el = r.select_one("a[href]")
+                url = link_el.get("href") if link_el else ""
+                if url and url.startswith("/"):
+                    url = "https://www.forexfactory.com" + url
+                events.append(
+                    {
+                        "time": time_txt,
+                        "currency": currency,
+                        "event": event,
+                        "impact": severity,
+                        "actual": actual,
+                        "forecast": forecast,
+                        "previous": previous,
+                        "url": url,
+                    }
+                )
+            if events:
+                groups.append({"label": label, "events": events})
+        if groups:
+            return groups
+
+    # Attempt 2: Global table approach
+    table = soup.find("table")
+    if table:
+        current_label = ""
+        events: List[Dict[str, str]] = []
+        for row in table.find_all("tr"):
+            # Detect day header rows
+            if "date" in (row.get("class") or []) or row.find("th"):
+                if events and current_label:
+                    groups.append({"label": current_label, "events": events})
+                    events = []
+                current_label = row.get_text(" ", strip=True)
+                continue
+            cols = [c.get_text(strip=True) for c in row.find_all("td")]
+            if len(cols) >= 4:
+                time_txt = cols[0] or "—"
+                currency = cols[1] if len(cols) > 1 else ""
+                event = cols[2] if len(cols) > 2 else ""
+                impact = cols[3] if len(cols) > 3 else ""
+                actual = cols[4] if len(cols) > 4 else ""
+                forecast = cols[5] if len(cols) > 5 else ""
+                previous = cols[6] if len(cols) > 6 else ""
+                if event:
+                    events.append({
+                        "time": time_txt, "currency": currency, "event": event,
+                        "impact": impact, "actual": actual, "forecast": forecast, "previous": previous, "url": ""
+                    })
+        if events and current_label:
+            groups.append({"label": current_label, "events": events})
+    return groups
+
+
+def fetch_ff_calendar_body() -> bytes:
+    # Known endpoints mirrored on FF CDN; try in order
+    endpoints = [
+        "https://nfs.faireconomy.media/ff_calendar_thisweek.json",
+        "https://cdn-nfs.faireconomy.media/ff_calendar_thisweek.json",
+    ]
+    client = get_client()
+    last_exc: Optional[Exception] = None
+    for url in endpoints:
+        try:
+            # Some CDNs serve it as text/plain, so don't insist on the content type
+            return client.get(url)
+        except UpstreamError as exc:
+            last_exc = exc
+    if last_exc:
+        raise last_exc
+    return b"[]"
+
+
+UNKNOWN_DATE = "Unknown Date"
+NO_TIME = "—"
+_IMPACT_LEVELS = {1: "Low", 2: "Medium", 3: "High"}
+_IMPACT_RANK = {"High": 0, "Medium": 1, "Low": 2, "Holiday": 3}
+_DATETIME_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?:[ T](\d{2}):(\d{2}))?")
+# Sort keys are minutes since 0001-01-01, all-day entries last in their day
+_DAY = 24 * 60 + 1
+_UNDATED = sys.maxsize
+_CLOCK = [f"{h:02d}:{m:02d}" for h in range(24) for m in range(60)]  # by minute of day
+
+
+class CalendarEvent:
+    """One calendar entry with its time as a real ``datetime``.
+
+    ``when`` keeps the feed's own offset (clock times are shown as
+    published); ``all_day`` marks date-only entries, ``when`` is ``None``
+    when the feed gave no usable date.
+    """
+
+    __slots__ = ("when", "all_day", "currency", "event", "impact", "actual", "forecast", "previous", "url", "sort_key")
+
+    def __init__(
+        self,
+        when: Optional[_dt.datetime],
+        all_day: bool,
+        currency: str,
+        event: str,
+        impact: str,
+        actual: str = "",
+        forecast: str = "",
+        previous: str = "",
+        url: str = "",
+    ):
+        self.when = when
+        self.all_day = all_day
+        self.currency = currency
+        self.event = event
+        self.impact = impact
+        self.actual = actual
+        self.forecast = forecast
+        self.previous = previous
+        self.url = url
+        if when is None:
+            self.sort_key = _UNDATED
+        else:
+            self.sort_key = when.toordinal() * _DAY + (_DAY - 1 if all_day else when.hour * 60 + when.minute)
+
+    @property
+    def date_label(self) -> str:
+        w = self.when
+        return f"{w.year:04d}-{w.month:02d}-{w.day:02d}" if w is not None else UNKNOWN_DATE
+
+    @property
+    def time(self) -> str:
+        # Table lookup instead of formatting a clock string per event
+        return NO_TIME if self.when is None or self.all_day else _CLOCK[self.sort_key % _DAY]
+
+    @property
+    def timestamp(self) -> Optional[int]:
+        """Epoch seconds (clock times without an offset are taken as UTC)."""
+        w = self.when
+        if w is None:
+            return None
+        return int((w if w.tzinfo is not None else w.replace(tzinfo=_dt.timezone.utc)).timestamp())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The plain form kept in the shared cache and used by the templates."""
+        return {
+            "ts": self.timestamp,
+            "time": self.time,
+            "currency": self.currency,
+            "event": self.event,
+            "impact": self.impact,
+            "actual": self.actual,
+            "forecast": self.forecast,
+            "previous": self.previous,
+            "url": self.url,
+        }
+
+    def __repr__(self) -> str:
+        return f"CalendarEvent({self.date_label} {self.time} {self.currency} {self.event!r})"
+
+
+def _normalize_impact(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return _IMPACT_LEVELS.get(int(value), "")
+    s = str(value).strip().lower()
+    if "high" in s:
+        return "High"
+    if "med" in s:
+        return "Medium"
+    if "low" in s:
+        return "Low"
+    return s.capitalize()
+
+
+# A feed only uses a handful of impact spellings
+_impact = functools.lru_cache(maxsize=64)(_normalize_impact)
+
+
+def _when(raw: Any) -> Tuple[Optional[_dt.datetime], bool]:
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        return _dt.datetime.fromtimestamp(int(raw), _dt.timezone.utc), False
+    if not isinstance(raw, str) or not raw:
+        return None, False
+    try:
+        when = _dt.datetime.fromisoformat(raw)
+        return when, len(raw) == 10  # "YYYY-MM-DD"
+    except ValueError:
+        pass
+    m = _DATETIME_RE.match(raw)  # e.g. "2025-08-31 13:30 ET"
+    if m is None:
+        return None, False
+    y, mo, d, h, mi = m.groups()
+    try:
+        return _dt.datetime(int(y), int(mo), int(d), int(h or 0), int(mi or 0)), h is None
+    except ValueError:
+        return None, False
+
+
+def _text(value: Any, fallback: Any) -> str:
+    if value is None or value == "":
+        value = fallback
+    if value is None:
+        return ""
+    return value.strip() if isinstance(value, str) else str(value)
+
+
+def parse_ff_events(data: List[Dict[str, Any]]) -> List[CalendarEvent]:
+    """Typed events from the decoded ForexFactory JSON feed (a few schemas)."""
+    events = []
+    for ev in data:
+        get = ev.get
+        title = (get("title") or get("event") or "").strip()
+        if not title:
+            continue
+        when, all_day = _when(get("timestamp") or get("time") or get("date"))
+        event_id = get("id")
+        impact = get("impact")
+        events.append(CalendarEvent(
+            when,
+            all_day,
+            (get("country") or get("currency") or "").strip(),
+            title,
+            _impact(impact) if isinstance(impact, (str, int, float)) else _normalize_impact(impact),
+            _text(get("actual"), get("actualValue")),
+            _text(get("forecast"), get("forecastValue")),
+            _text(get("previous"), get("previousValue")),
+            f"https://www.forexfactory.com/calendar?event={event_id}" if event_id else "",
+        ))
+    return events
+
+
+def group_events(events: List[CalendarEvent]) -> List[Dict[str, object]]:
+    """Day groups (``{"label", "events"}``), by date then time of day."""
+    groups: List[Dict[str, object]] = []
+    current = None
+    for ev in sorted(events, key=attrgetter("sort_key")):
+        if ev.sort_key // _DAY != current:
+            current = ev.sort_key // _DAY
+            day: List[Dict[str, str]] = []
+            groups.append({"label": ev.date_label, "events": day})
+        day.append(ev.as_dict())
+    return groups
+
+
+def parse_ff_calendar_json(data: List[Dict[str, Any]]) -> List[Dict[str, object]]:
+    return group_events(parse_ff_events(data)) if data else []
+
+
+_PARSED_MAX = 4
+_parsed: "OrderedDict[bytes, List[Dict[str, object]]]" = OrderedDict()
+_parsed_lock = threading.Lock()
+
+
+def parse_ff_calendar_payload(body: bytes) -> List[Dict[str, object]]:
+    """Groups for a raw feed body, cached by its hash.
+
+    The weekly feed rarely changes between refreshes, so an unchanged body
+    is neither decoded nor parsed again. Callers must not mutate the result.
+    """
+    digest = hashlib.sha256(body).digest()
+    with _parsed_lock:
+        groups = _parsed.get(digest)
+        if groups is not None:
+            _parsed.move_to_end(digest)
+            return groups
+    try:
+        data = json.loads(body)
+    except ValueError as exc:
+        raise CalendarError(PARSE_ERROR) from exc
+    groups = parse_ff_calendar_json(data if isinstance(data, list) else [])
+    with _parsed_lock:
+        _parsed[digest] = groups
+        while len(_parsed) > _PARSED_MAX:
+            _parsed.popitem(last=False)
+    return groups
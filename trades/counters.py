@@ -0,0 +1,46 @@
+"""Incremental updates of counter tables derived from ``Trade``.
+
+The stats rollup, the heatmap cube and the symbol table all keep one row
+per key with a count and a few sums. ``increment`` adds deltas to such
+rows: an ``UPDATE ... SET f = f + delta`` per key, creating the row when
+it does not exist yet and deleting rows whose count drops to zero.
+"""
+from __future__ import annotations
+
+from functools import reduce
+from operator import or_
+from typing import Any, Dict, Sequence, Tuple, Type
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+
+
+def increment(
+    model: Type[models.Model],
+    key_fields: Sequence[str],
+    value_fields: Sequence[str],
+    deltas: Dict[Tuple[Any, ...], Sequence[Any]],
+) -> None:
+    """Add ``deltas`` (key values -> value deltas) to rows of ``model``.
+
+    ``value_fields[0]`` is the row count: rows are only created for a
+    positive count, and rows whose count was lowered are deleted once it
+    reaches zero.
+    """
+    changed = {k: v for k, v in deltas.items() if any(v)}
+    if not changed:
+        return
+    with transaction.atomic():
+        for key_values, values in changed.items():
+            key = dict(zip(key_fields, key_values))
+            incr = {f: F(f) + v for f, v in zip(value_fields, values)}
+            if not model.objects.filter(**key).update(**incr) and values[0] > 0:
+                try:
+                    with transaction.atomic():
+                        model.objects.create(**key, **dict(zip(value_fields, values)))
+                except IntegrityError:  # created concurrently
+                    model.objects.filter(**key).update(**incr)
+        lowered = [dict(zip(key_fields, k)) for k, v in changed.items() if v[0] < 0]
+        if lowered:
+            # Only the rows just lowered, through the key's unique index
+            model.objects.filter(reduce(or_, (Q(**key) for key in lowered)), **{f"{value_fields[0]}__lte": 0}).delete()
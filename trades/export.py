@@ -0,0 +1,167 @@
+"""Streaming export of (filtered) trades as CSV, Parquet or Arrow IPC.
+
+Trades are read with ``values_list(...).iterator()`` in ``chunk_size``
+batches, so neither model instances nor image data are ever loaded and
+memory stays flat for any number of rows. Tags cost one query per batch.
+Each batch is serialized and handed out as soon as it is ready, which
+lets ``StreamingHttpResponse`` send it while the next one is read. Under
+ASGI the chunks are wrapped by ``async_chunks``: Django 4.2 would otherwise
+collect a sync iterator whole before sending the first byte.
+
+Parquet and Arrow need ``pyarrow`` (optional); CSV works without it. CSV
+columns match what ``trades.importer`` reads, so an export can be imported
+again.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import QuerySet
+
+from .models import Trade
+
+try:  # optional, only the columnar formats need it
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # pragma: no cover
+    pa = pq = None  # type: ignore
+
+# Scalar columns read from the Trade table (never the image metadata)
+FIELDS = (
+    "id",
+    "type",
+    "symbol",
+    "direction",
+    "result",
+    "price",
+    "stop_loss_price",
+    "volume",
+    "date",
+    "risk_percent",
+    "risk_reward_ratio",
+    "comment",
+    "created_at",
+    "updated_at",
+)
+COLUMNS = FIELDS + ("tags",)
+
+FORMATS = {
+    # format: (content type, file extension, needs pyarrow)
+    "csv": ("text/csv; charset=utf-8", "csv", False),
+    "parquet": ("application/vnd.apache.parquet", "parquet", True),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows", True),
+}
+
+
+def available_formats() -> List[str]:
+    return [name for name, (_, _, needs_arrow) in FORMATS.items() if pa is not None or not needs_arrow]
+
+
+def default_chunk_size() -> int:
+    return int(getattr(settings, "TRADE_EXPORT_CHUNK_SIZE", 2000))
+
+
+def batches(qs: QuerySet, chunk_size: Optional[int] = None) -> Iterator[List[Tuple[Any, ...]]]:
+    """Rows of ``COLUMNS`` in lists of up to ``chunk_size``; tags as a list of names."""
+    chunk_size = chunk_size or default_chunk_size()
+    rows = qs.values_list(*FIELDS).iterator(chunk_size=chunk_size)
+    links = Trade.tags.through.objects
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        tags: Dict[int, List[str]] = {}
+        pairs = links.filter(trade_id__in=[r[0] for r in batch]).order_by("tag__name").values_list("trade_id", "tag__name")
+        for trade_id, name in pairs:
+            tags.setdefault(trade_id, []).append(name)
+        yield [row + (tags.get(row[0], []),) for row in batch]
+
+
+def csv_chunks(qs: QuerySet, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for batch in batches(qs, chunk_size):
+        writer.writerows(row[:-1] + (", ".join(row[-1]),) for row in batch)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()  # header of an empty export
+
+
+def arrow_schema():
+    decimal = {f.name: pa.decimal128(f.max_digits, f.decimal_places) for f in Trade._meta.fields if f.get_internal_type() == "DecimalField"}
+    timestamp = pa.timestamp("us", tz="UTC")
+    types = {"id": pa.int64(), "date": timestamp, "created_at": timestamp, "updated_at": timestamp, "tags": pa.list_(pa.string())}
+    return pa.schema([(name, decimal.get(name) or types.get(name) or pa.string()) for name in COLUMNS])
+
+
+class _Drain:
+    """Write-only file object whose contents are taken after each batch."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _columnar_chunks(fmt: str, qs: QuerySet, chunk_size: Optional[int]) -> Iterator[bytes]:
+    if pa is None:
+        raise RuntimeError(f"The {fmt} export needs pyarrow.")
+    schema = arrow_schema()
+    drain = _Drain()
+    sink = pa.PythonFile(drain, mode="w")
+    # One Parquet row group / Arrow record batch per chunk
+    writer = pq.ParquetWriter(sink, schema) if fmt == "parquet" else pa.ipc.new_stream(sink, schema)
+    try:
+        for batch in batches(qs, chunk_size):
+            columns = list(zip(*batch))
+            writer.write_batch(pa.record_batch([pa.array(col, type=t) for col, t in zip(columns, schema.types)], schema=schema))
+            data = drain.take()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield drain.take()
+
+
+def export_chunks(fmt: str, qs: QuerySet, chunk_size: Optional[int] = None) -> Iterable[bytes]:
+    """Serialized export of ``qs`` in format ``fmt`` (see ``FORMATS``)."""
+    if fmt == "csv":
+        return csv_chunks(qs, chunk_size)
+    if fmt in FORMATS:
+        return _columnar_chunks(fmt, qs, chunk_size)
+    raise ValueError(f"Unknown export format {fmt!r}")
+
+
+async def async_chunks(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    """``chunks`` one at a time, each produced on the sync thread (where the ORM runs)."""
+    it = iter(chunks)
+    pull = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await pull(it, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        close = getattr(it, "close", None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
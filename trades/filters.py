@@ -0,0 +1,58 @@
+"""Reusable Trade queryset filters."""
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db.models import Exists, OuterRef, QuerySet
+from django.http import QueryDict
+
+from . import symbols
+from .models import Trade
+
+TAG_MATCH_ANY = "any"
+TAG_MATCH_ALL = "all"
+
+TradeTag = Trade.tags.through
+
+
+def filter_by_tags(qs: QuerySet, tag_ids: Iterable[int], mode: str = TAG_MATCH_ANY) -> QuerySet:
+    """Keep trades carrying any (or all) of ``tag_ids``.
+
+    Uses correlated EXISTS subqueries on the (trade_id, tag_id) unique index
+    rather than a join, so no DISTINCT is needed and rows are never duplicated.
+    """
+    tag_ids = sorted(set(tag_ids))
+    if not tag_ids:
+        return qs
+    links = TradeTag.objects.filter(trade_id=OuterRef("pk"))
+    if mode == TAG_MATCH_ALL:
+        for tag_id in tag_ids:
+            qs = qs.filter(Exists(links.filter(tag_id=tag_id)))
+        return qs
+    return qs.filter(Exists(links.filter(tag_id__in=tag_ids)))
+
+
+def filter_trades(qs: QuerySet, params: QueryDict) -> QuerySet:
+    """Apply the trade list's GET filters (type, result, direction, tags, symbol)."""
+    types = params.getlist("type")
+    results = params.getlist("result")
+    directions = params.getlist("direction")
+    tags = params.getlist("tags")  # tag ids
+    symbol = (params.get("symbol") or "").strip()
+
+    if types:
+        qs = qs.filter(type__in=types)
+    if results:
+        qs = qs.filter(result__in=results)
+    if directions:
+        qs = qs.filter(direction__in=directions)
+    if tags:
+        try:
+            tag_ids = [int(t) for t in tags]
+        except ValueError:
+            tag_ids = []
+        qs = filter_by_tags(qs, tag_ids, mode=params.get("tag_mode") or TAG_MATCH_ANY)
+    if symbol:
+        # Resolve against the small Symbol table, then hit the symbol index
+        qs = qs.filter(symbol__in=symbols.matching(symbol).values("name"))
+    return qs
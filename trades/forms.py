@@ -1,5 +1,11 @@
+from functools import partial
+
 from django import forms
+from django.db import transaction
+
+from .image_store import get_image_store
 from .models import Trade, Tag, Strategy
+from .thumbnails import schedule_thumbnail
 
 
 class DateTimeLocalInput(forms.DateTimeInput):
@@ -7,7 +13,7 @@ class DateTimeLocalInput(forms.DateTimeInput):
 
 
 class TradeForm(forms.ModelForm):
-    # File inputs bound to DB binary fields via save()
+    # File inputs stored in the image store via save()
     large_timeframe_image = forms.ImageField(required=False, label="Large timeframe image")
     medium_timeframe_image = forms.ImageField(required=False, label="Medium timeframe image")
     short_timeframe_image = forms.ImageField(required=False, label="Short timeframe image")
@@ -81,27 +87,22 @@ class TradeForm(forms.ModelForm):
                     tag, _ = Tag.objects.get_or_create(name=name)
                     instance.tags.add(tag)
 
-        # Store uploaded images into DB binary fields
-        def set_image(kind: str, file_field_name: str):
+        # Stream uploaded images into the content-addressed image store
+        store = get_image_store()
+        for kind, file_field_name in (
+            ("large", "large_timeframe_image"),
+            ("medium", "medium_timeframe_image"),
+            ("short", "short_timeframe_image"),
+        ):
             f = self.cleaned_data.get(file_field_name)
             if f:
-                data = f.read()
-                if kind == "large":
-                    instance.large_image = data
-                    instance.large_image_content_type = getattr(f, "content_type", None) or "application/octet-stream"
-                    instance.large_image_name = getattr(f, "name", None) or "large"
-                elif kind == "medium":
-                    instance.medium_image = data
-                    instance.medium_image_content_type = getattr(f, "content_type", None) or "application/octet-stream"
-                    instance.medium_image_name = getattr(f, "name", None) or "medium"
-                elif kind == "short":
-                    instance.short_image = data
-                    instance.short_image_content_type = getattr(f, "content_type", None) or "application/octet-stream"
-                    instance.short_image_name = getattr(f, "name", None) or "short"
-
-        set_image("large", "large_timeframe_image")
-        set_image("medium", "medium_timeframe_image")
-        set_image("short", "short_timeframe_image")
+                digest, size = store.save(f)
+                # Render the list preview off the request thread
+                transaction.on_commit(partial(schedule_thumbnail, digest))
+                setattr(instance, f"{kind}_image_sha256", digest)
+                setattr(instance, f"{kind}_image_size", size)
+                setattr(instance, f"{kind}_image_content_type", getattr(f, "content_type", None) or "application/octet-stream")
+                setattr(instance, f"{kind}_image_name", getattr(f, "name", None) or kind)
 
         if commit:
             instance.save()
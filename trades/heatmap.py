@@ -0,0 +1,133 @@
+"""Incremental maintenance of the ``TradeHeatmapCell`` cube.
+
+Every trade contributes ``(count=1, wins, r)`` to exactly one cell keyed by
+``(type, weekday, hour)`` of its date in the local time zone, where ``r``
+is ``risk_reward_ratio`` for a take-profit and -1 for a stopped-out trade.
+Saves, deletes and imports apply differences the same way ``trades.rollups``
+does, so the cube always equals a ``GROUP BY`` over ``Trade`` and the
+heatmap reads at most 3 x 7 x 24 rows instead of extracting weekday and
+hour from every trade.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, QuerySet, Sum, Value, When
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+
+from . import counters, rollups
+from .models import Trade, TradeHeatmapCell
+
+# (type, weekday, hour) -> [count, wins, r_sum]
+Key = Tuple[str, int, int]
+Deltas = Dict[Key, List[Any]]
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+HOURS = tuple(range(24))
+
+
+def _local(value):
+    return timezone.localtime(value) if timezone.is_aware(value) else value
+
+
+def contribution(values: Dict[str, Any]) -> Tuple[Key, List[Any]]:
+    when = _local(values["date"])
+    win = values["result"] == Trade.Result.TAKE
+    r = rollups.to_decimal("risk_reward_ratio", values["risk_reward_ratio"]) if win else Decimal(-1)
+    return (values["type"], when.isoweekday(), when.hour), [1, int(win), r]
+
+
+def add_deltas(deltas: Deltas, values: Dict[str, Any], sign: int) -> None:
+    key, (count, wins, r) = contribution(values)
+    acc = deltas.setdefault(key, [0, 0, Decimal(0)])
+    acc[0] += sign * count
+    acc[1] += sign * wins
+    acc[2] += sign * r
+
+
+def apply_deltas(deltas: Deltas) -> None:
+    counters.increment(TradeHeatmapCell, ("type", "weekday", "hour"), ("count", "wins", "r_sum"), deltas)
+
+
+def _grouped(qs: QuerySet):
+    # Extract* use the current time zone, like timezone.localtime() above
+    r = Case(
+        When(result=Trade.Result.TAKE, then=F("risk_reward_ratio")),
+        default=Value(Decimal(-1)),
+        output_field=DecimalField(max_digits=8, decimal_places=2),
+    )
+    return (
+        qs.order_by()
+        .annotate(weekday=ExtractIsoWeekDay("date"), hour=ExtractHour("date"))
+        .values("type", "weekday", "hour")
+        .annotate(n=Count("id"), wins=Count("id", filter=Q(result=Trade.Result.TAKE)), r=Sum(r))
+    )
+
+
+def deltas_for_queryset(qs: QuerySet, sign: int) -> Deltas:
+    """Grouped contribution of every trade in ``qs`` (one query)."""
+    return {
+        (row["type"], row["weekday"], row["hour"]): [sign * row["n"], sign * row["wins"], sign * Decimal(row["r"] or 0)]
+        for row in _grouped(qs)
+    }
+
+
+def rebuild() -> int:
+    """Recompute every cell from scratch; returns the number of cells."""
+    cells = [
+        TradeHeatmapCell(
+            type=r["type"], weekday=r["weekday"], hour=r["hour"],
+            count=r["n"], wins=r["wins"], r_sum=r["r"] or 0,
+        )
+        for r in _grouped(Trade.objects.all())
+    ]
+    with transaction.atomic():
+        TradeHeatmapCell.objects.all().delete()
+        TradeHeatmapCell.objects.bulk_create(cells, batch_size=1000)
+    return len(cells)
+
+
+def trade_changed(previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> None:
+    """Move one trade's contribution from its old cell to its new one."""
+    deltas: Deltas = {}
+    if previous is not None:
+        add_deltas(deltas, previous, -1)
+    if current is not None:
+        add_deltas(deltas, current, +1)
+    apply_deltas(deltas)
+
+
+def cube(trade_type: Optional[str] = None) -> Dict[str, Any]:
+    """Weekday x hour grids of trades, win rate and average R (``None`` where empty).
+
+    ``trade_type`` restricts the cells to one ``Trade.TradeType``; by default
+    all types are summed.
+    """
+    qs = TradeHeatmapCell.objects.all()
+    if trade_type:
+        qs = qs.filter(type=trade_type)
+    trades = [[0] * len(HOURS) for _ in WEEKDAYS]
+    wins = [[0] * len(HOURS) for _ in WEEKDAYS]
+    r_sum = [[Decimal(0)] * len(HOURS) for _ in WEEKDAYS]
+    for weekday, hour, count, won, r in qs.values_list("weekday", "hour", "count", "wins", "r_sum"):
+        trades[weekday - 1][hour] += count
+        wins[weekday - 1][hour] += won
+        r_sum[weekday - 1][hour] += r
+
+    def grid(value):
+        return [
+            [value(d, h) if trades[d][h] else None for h in HOURS]
+            for d in range(len(WEEKDAYS))
+        ]
+
+    return {
+        "type": trade_type or None,
+        "weekdays": list(WEEKDAYS),
+        "hours": list(HOURS),
+        "trades": trades,
+        "win_rate": grid(lambda d, h: round(wins[d][h] / trades[d][h] * 100, 2)),
+        "avg_r": grid(lambda d, h: round(float(r_sum[d][h]) / trades[d][h], 2)),
+    }
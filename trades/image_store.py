@@ -0,0 +1,181 @@
+"""Content-addressed storage for trade screenshots.
+
+Images are keyed by the SHA-256 of their bytes, so uploading the same
+screenshot twice stores it once. The backend is selected with the
+``TRADE_IMAGE_STORE`` setting::
+
+    TRADE_IMAGE_STORE = {
+        "BACKEND": "trades.image_store.FileSystemImageStore",
+        "OPTIONS": {"location": BASE_DIR / "media" / "trade_images"},
+    }
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Tuple, Union
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _iter_chunks(content: Union[bytes, IO[bytes]], chunk_size: int) -> Iterator[bytes]:
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        yield bytes(content)
+        return
+    chunks = getattr(content, "chunks", None)
+    if chunks is not None:  # Django UploadedFile / File
+        yield from chunks(chunk_size)
+        return
+    while True:
+        block = content.read(chunk_size)
+        if not block:
+            break
+        yield block
+
+
+class ImageStore:
+    """Interface every image storage backend implements."""
+
+    def save(self, content: Union[bytes, IO[bytes]]) -> Tuple[str, int]:
+        """Store ``content`` and return ``(sha256 hex digest, size in bytes)``."""
+        raise NotImplementedError
+
+    def open(self, digest: str) -> IO[bytes]:
+        """Open a stored image for binary reading; raise FileNotFoundError if absent."""
+        raise NotImplementedError
+
+    def exists(self, digest: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, digest: str) -> None:
+        raise NotImplementedError
+
+    def digests(self) -> Iterable[str]:
+        """Every digest currently held by the store."""
+        raise NotImplementedError
+
+    # Derived renditions (thumbnails) cached next to an original
+    def save_variant(self, digest: str, variant: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def open_variant(self, digest: str, variant: str) -> IO[bytes]:
+        raise NotImplementedError
+
+    def delete_variants(self, digest: str) -> None:
+        raise NotImplementedError
+
+
+class FileSystemImageStore(ImageStore):
+    """Stores each image once under ``<location>/<aa>/<bb>/<digest>``.
+
+    Variants go to ``<location>/variants/<aa>/<bb>/<digest>.<variant>``.
+    """
+
+    def __init__(self, location: Union[str, Path], chunk_size: int = 64 * 1024):
+        self.location = Path(location)
+        self.chunk_size = chunk_size
+
+    def path(self, digest: str) -> Path:
+        if not _DIGEST_RE.match(digest or ""):
+            raise ValueError(f"Invalid image digest: {digest!r}")
+        return self.location / digest[:2] / digest[2:4] / digest
+
+    def save(self, content: Union[bytes, IO[bytes]]) -> Tuple[str, int]:
+        self.location.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        # Stream into a temp file next to the final location, then move it
+        # into place atomically once the digest is known.
+        fd, tmp_name = tempfile.mkstemp(dir=self.location, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for block in _iter_chunks(content, self.chunk_size):
+                    hasher.update(block)
+                    size += len(block)
+                    tmp.write(block)
+            digest = hasher.hexdigest()
+            target = self.path(digest)
+            if target.exists():
+                os.unlink(tmp_name)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_name, target)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return digest, size
+
+    def open(self, digest: str) -> IO[bytes]:
+        return open(self.path(digest), "rb")
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def delete(self, digest: str) -> None:
+        try:
+            self.path(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+    def digests(self) -> Iterable[str]:
+        if not self.location.exists():
+            return
+        for p in self.location.glob("??/??/*"):
+            if _DIGEST_RE.match(p.name):
+                yield p.name
+
+    def variant_path(self, digest: str, variant: str) -> Path:
+        if not variant.isalnum():
+            raise ValueError(f"Invalid image variant: {variant!r}")
+        original = self.path(digest)
+        return self.location / "variants" / original.parent.relative_to(self.location) / f"{digest}.{variant}"
+
+    def save_variant(self, digest: str, variant: str, data: bytes) -> None:
+        target = self.variant_path(digest, variant)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".variant-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_name, target)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def open_variant(self, digest: str, variant: str) -> IO[bytes]:
+        return open(self.variant_path(digest, variant), "rb")
+
+    def delete_variants(self, digest: str) -> None:
+        folder = self.variant_path(digest, "x").parent
+        for p in folder.glob(f"{digest}.*"):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+
+
+@functools.lru_cache(maxsize=None)
+def get_image_store() -> ImageStore:
+    config = getattr(settings, "TRADE_IMAGE_STORE", None) or {}
+    backend = import_string(config.get("BACKEND", "trades.image_store.FileSystemImageStore"))
+    options = dict(config.get("OPTIONS") or {})
+    if backend is FileSystemImageStore:
+        options.setdefault("location", Path(settings.MEDIA_ROOT) / "trade_images")
+    return backend(**options)
+
+
+@receiver(setting_changed)
+def _reset_image_store(*, setting: str, **kwargs) -> None:
+    if setting in {"TRADE_IMAGE_STORE", "MEDIA_ROOT"}:
+        get_image_store.cache_clear()
@@ -0,0 +1,284 @@
+"""Bulk import of trades from broker CSV / JSON exports.
+
+Files are read one row at a time (CSV, JSON Lines, or a JSON array decoded
+incrementally), so memory stays flat however large the file is. Each row
+is validated by ``TradeImportForm`` — ``TradeForm``'s fields and model
+rules, with tags given by name. Valid rows are inserted ``chunk_size`` at a
+time, each chunk in one transaction:
+
+* tag names of the whole chunk are resolved with one lookup (missing tags
+  are created with one ``bulk_create``);
+* trades and their tag links go in with ``bulk_create``;
+* the stats rollup, the heatmap cube and the symbol table get one grouped update per chunk
+  instead of one per row (``trades.signals`` is bypassed).
+
+Columns are the ``Trade`` field names (headers are matched case-insensitively,
+spaces count as underscores); ``tags`` is a comma/semicolon separated string
+or, in JSON, a list.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+import re
+import time
+from collections import Counter
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django import forms
+from django.conf import settings
+from django.db import transaction
+
+from . import heatmap, rollups, signals, symbols
+from .forms import TradeForm
+from .models import Tag, Trade
+
+FORMATS = ("csv", "json", "jsonl")
+MAX_REPORTED_ERRORS = 100
+_READ_SIZE = 64 * 1024
+# Longest token a buffer boundary can split ("-1.5e+" of a number, "\uXXXX")
+_CUT_OFF_CHARS = 32
+_TAG_SPLIT_RE = re.compile(r"[,;|]")
+_WS_RE = re.compile(r"\s")
+
+
+class TradeImportForm(TradeForm):
+    """``TradeForm`` validation for one imported row; tags come as names."""
+
+    large_timeframe_image = medium_timeframe_image = short_timeframe_image = new_tags = None
+    tags = forms.CharField(required=False)
+
+    class Meta(TradeForm.Meta):
+        fields = [f for f in TradeForm.Meta.fields if f != "tags"]
+
+    def clean_tags(self) -> List[str]:
+        raw = self.cleaned_data.get("tags") or ""
+        names = [n.strip() for n in _TAG_SPLIT_RE.split(raw) if n.strip()]
+        max_length = Tag._meta.get_field("name").max_length
+        too_long = [n for n in names if len(n) > max_length]
+        if too_long:
+            raise forms.ValidationError(f"Tag names are limited to {max_length} characters: {', '.join(too_long)}")
+        return list(dict.fromkeys(names))
+
+
+# Reading
+
+def _header(name: str) -> str:
+    return _WS_RE.sub("_", name.strip().lower())
+
+
+def read_csv(stream: IO[bytes], encoding: str = "utf-8-sig") -> Iterator[Dict[str, Any]]:
+    text = codecs.getreader(encoding)(stream)
+    reader = csv.reader(text)
+    try:
+        header = [_header(h) for h in next(reader, [])]
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                yield dict(zip(header, row))
+    except csv.Error as exc:
+        # Same contract as the JSON readers: a malformed file is a ValueError
+        raise ValueError(f"line {reader.line_num}: {exc}") from exc
+
+
+def read_jsonl(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _cut_off(exc: json.JSONDecodeError, size: int) -> bool:
+    """Whether decoding failed only because the buffer ends mid-object.
+
+    An unterminated string reports where the string starts; anything else
+    fails at the end of the buffer, or just before it for a literal or
+    escape cut in half. Other errors are in the data itself, and are raised
+    without reading the rest of the file.
+    """
+    return exc.msg.startswith("Unterminated string") or exc.pos >= size - _CUT_OFF_CHARS
+
+
+def read_json(stream: IO[bytes], read_size: int = _READ_SIZE) -> Iterator[Dict[str, Any]]:
+    """Objects of a top-level JSON array, decoded as the file is read."""
+    decoder = json.JSONDecoder()
+    reader = codecs.getincrementaldecoder("utf-8-sig")()
+    buf, pos, started, eof = "", 0, False, False
+    while True:
+        # Skip whitespace and separators; refill the buffer as needed
+        while True:
+            while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ",")):
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = stream.read(read_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + reader.decode(chunk, final=eof), 0
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON array")
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON array of trades")
+            started, pos = True, pos + 1
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as exc:
+            if eof or not _cut_off(exc, len(buf)):
+                raise
+            # Object continues past the buffer: read more and retry
+            chunk = stream.read(read_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + reader.decode(chunk, final=eof), 0
+            continue
+        yield obj
+        pos = end
+        if pos > read_size:
+            buf, pos = buf[pos:], 0
+
+
+READERS = {"csv": read_csv, "json": read_json, "jsonl": read_jsonl}
+
+
+def guess_format(name: str) -> Optional[str]:
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    return {"csv": "csv", "json": "json", "jsonl": "jsonl", "ndjson": "jsonl"}.get(ext)
+
+
+# Validation and inserting
+
+def form_data(row: Dict[str, Any]) -> Dict[str, Any]:
+    data = {_header(str(k)): v for k, v in row.items()}
+    tags = data.get("tags")
+    if isinstance(tags, (list, tuple)):
+        data["tags"] = ",".join(str(t) for t in tags)
+    return {k: ("" if v is None else v) for k, v in data.items()}
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors: List[Tuple[int, str]] = []  # first MAX_REPORTED_ERRORS only
+        self.error_count = 0
+        self.seconds = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Rows processed per second."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def add_error(self, row_number: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+    def summary(self) -> str:
+        return (
+            f"Imported {self.created} of {self.rows} row(s), {self.error_count} invalid, "
+            f"in {self.seconds:.2f}s ({self.rate:,.0f} rows/s)"
+        )
+
+
+def _errors_text(form: forms.Form) -> str:
+    return "; ".join(f"{field}: {' '.join(errs)}" for field, errs in form.errors.items())
+
+
+class TagResolver:
+    """Tag name -> id, filled one batch at a time and kept for the whole import."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def resolve(self, names: Iterable[str]) -> None:
+        missing = set(names) - self.ids.keys()
+        if not missing:
+            return
+        self.ids.update(Tag.objects.filter(name__in=missing).values_list("name", "pk"))
+        new = missing - self.ids.keys()
+        if new:
+            Tag.objects.bulk_create([Tag(name=n) for n in new], ignore_conflicts=True)
+            self.ids.update(Tag.objects.filter(name__in=new).values_list("name", "pk"))
+
+
+def insert_chunk(chunk: List[Tuple[Trade, List[str]]], tags: TagResolver) -> None:
+    """Insert validated trades with their tags and derived-table updates, atomically."""
+    with transaction.atomic():
+        tags.resolve(name for _, names in chunk for name in names)
+        trades = Trade.objects.bulk_create([trade for trade, _ in chunk])
+        Link = Trade.tags.through
+        Link.objects.bulk_create(
+            [Link(trade_id=trade.pk, tag_id=tags.ids[name]) for trade, names in zip(trades, (n for _, n in chunk)) for name in names],
+            ignore_conflicts=True,
+        )
+        deltas: rollups.Deltas = {}
+        cells: heatmap.Deltas = {}
+        symbol_counts: Counter = Counter()
+        for trade in trades:
+            values = signals.instance_values(trade)
+            rollups.add_deltas(deltas, values, +1)
+            heatmap.add_deltas(cells, values, +1)
+            symbol_counts[trade.symbol] += 1
+        rollups.apply_deltas(deltas)
+        heatmap.apply_deltas(cells)
+        symbols.adjust_counts(symbol_counts)
+        signals.bump_data_version()
+
+
+def default_chunk_size() -> int:
+    return int(getattr(settings, "TRADE_IMPORT_CHUNK_SIZE", 1000))
+
+
+def import_rows(
+    rows: Iterable[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+    progress=None,
+) -> ImportResult:
+    """Validate and insert ``rows``; invalid rows are reported and skipped.
+
+    ``progress(result)`` is called after every chunk.
+    """
+    chunk_size = chunk_size or default_chunk_size()
+    result = ImportResult()
+    tags = TagResolver()
+    chunk: List[Tuple[Trade, List[str]]] = []
+    started = time.perf_counter()
+
+    def flush():
+        if chunk and not dry_run:
+            insert_chunk(chunk, tags)
+        result.created += len(chunk)
+        chunk.clear()
+        result.seconds = time.perf_counter() - started
+        if progress is not None:
+            progress(result)
+
+    with signals.suppressed():
+        for number, row in enumerate(rows, start=1):
+            result.rows = number
+            if not isinstance(row, dict):
+                result.add_error(number, "not an object")
+                continue
+            form = TradeImportForm(data=form_data(row))
+            if not form.is_valid():
+                result.add_error(number, _errors_text(form))
+                continue
+            chunk.append((form.instance, form.cleaned_data["tags"]))
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+    return result
+
+
+def import_file(stream: IO[bytes], fmt: str, **kwargs) -> ImportResult:
+    """Import a binary file-like object in format ``fmt`` (see ``FORMATS``).
+
+    A malformed file stops the import with ``ValueError`` after the chunks
+    already inserted.
+    """
+    if fmt not in READERS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    return import_rows(READERS[fmt](stream), **kwargs)
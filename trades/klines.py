@@ -0,0 +1,414 @@
+"""Binance kline (candlestick) data for the crypto chart.
+
+Candles are kept per ``(symbol, interval)`` as one growing series instead
+of being re-downloaded on every cache miss:
+
+* the first request fetches the latest ``FETCH_LIMIT`` candles;
+* afterwards, at most every ``REFRESH_SECONDS``, only candles from the
+  first one that was still open are fetched (``startTime``) and merged in,
+  normally one or two rows;
+* requests for more history than is held are backfilled by paging
+  backwards with ``endTime``, past Binance's 1000-candle cap.
+
+Series live in a bounded in-process LRU, are published to the shared
+upstream cache (``trades.upstream_cache``) so other workers can adopt them
+without calling Binance, and can optionally be persisted to disk
+(``TRADE_KLINES_CACHE["DIRECTORY"]``) to survive restarts. Timeframes
+Binance doesn't serve (``10m``, ``3h``...) are resampled from the series of
+a native interval (``trades.resample``).
+"""
+from __future__ import annotations
+
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+import numpy as np
+
+from . import resample
+from .lru import LRUCache
+from .upstream import get_client
+from .upstream_cache import SharedCache, decode, encode, get_shared_cache
+
+# Binance intervals: 1m,3m,5m,15m,30m,1h,2h,4h,6h,8h,12h,1d,3d,1w,1M
+INTERVALS = {"1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M"}
+FETCH_LIMIT = 1000  # Binance's maximum per request
+CATCH_UP_PAGES = 5  # beyond this many pages behind, start over from the latest window
+SYMBOL_RE = re.compile(r"^[A-Z0-9]{2,20}$")
+LOCK_STRIPES = 64  # refresh locks; series whose keys hash alike share one
+
+OPEN_TIME, CLOSE_TIME = 0, 6  # columns of a Binance kline row
+
+Rows = List[List[Any]]
+
+
+def fetch_klines(
+    symbol: str,
+    interval: str,
+    limit: int = 500,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+) -> Rows:
+    base = getattr(settings, "BINANCE_API_BASE", "https://api.binance.com").rstrip("/") + "/api/v3/klines"
+    params = {"symbol": symbol, "interval": interval, "limit": str(limit)}
+    if start_time is not None:
+        params["startTime"] = str(start_time)
+    if end_time is not None:
+        params["endTime"] = str(end_time)
+    return get_client().get_json(base, params=params)
+
+
+def series_size(rows: Rows) -> int:
+    """Approximate resident size of a kline list in bytes."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+    return size
+
+
+def merge(rows: Rows, newer: Rows) -> Rows:
+    """Overlay ``newer`` (ascending, contiguous) onto the tail of ``rows``.
+
+    Candles with an open time already held replace the old row, which is how
+    the still-open last candle gets its final values.
+    """
+    if not newer:
+        return rows
+    keep = len(rows)
+    while keep and rows[keep - 1][OPEN_TIME] >= newer[0][OPEN_TIME]:
+        keep -= 1
+    return rows[:keep] + newer
+
+
+def series_version(series: Dict[str, Any]) -> str:
+    """Digest identifying the content of ``series``.
+
+    Closed candles never change, so the row count, the first open time, the
+    last (possibly still open) candle and when it was fetched pin down the
+    rows. Unlike a counter, equal versions from different workers mean
+    equal rows.
+    """
+    rows = series["rows"]
+    ident = [len(rows), rows[0][OPEN_TIME] if rows else None, rows[-1] if rows else None, series["checked_at"]]
+    return hashlib.blake2b(json.dumps(ident).encode(), digest_size=12).hexdigest()
+
+
+class KlineStore:
+    """Per-``(symbol, interval)`` candle series, fetched incrementally."""
+
+    def __init__(
+        self,
+        fetch: Optional[Callable[..., Rows]] = None,
+        refresh_seconds: float = 30,
+        max_candles: int = 20_000,
+        local: Optional[LRUCache] = None,
+        shared: Optional[SharedCache] = None,
+        directory: Optional[os.PathLike] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.fetch = fetch
+        self.refresh_seconds = refresh_seconds
+        self.max_candles = max_candles
+        self.local = local if local is not None else LRUCache(ttl=3600)
+        self.shared = shared
+        self.directory = Path(directory) if directory else None
+        self.clock = clock
+        self.requests = self.candles_fetched = 0
+        # Striped rather than one per key, so unknown symbols can't grow a dict
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _lock(self, key: str) -> threading.Lock:
+        return self._locks[hash(key) % LOCK_STRIPES]
+
+    def _fetch(self, symbol: str, interval: str, **kwargs) -> Rows:
+        rows = (self.fetch or fetch_klines)(symbol, interval, FETCH_LIMIT, **kwargs)
+        self.requests += 1
+        self.candles_fetched += len(rows)
+        return rows
+
+    # Persistence tiers: local LRU -> shared cache -> disk
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (key.replace(":", "-") + ".json.z")
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        series = self.local.get(key)
+        if series is not None:
+            return series
+        if self.shared is not None:
+            series = self.shared.get(key)
+        if series is None and self.directory is not None:
+            try:
+                series = decode(self._path(key).read_bytes())
+            except (OSError, ValueError):
+                series = None
+        if series is not None:
+            self.local.set(key, series, series_size(series["rows"]))
+        return series
+
+    def _adopt_newer(self, key: str, series: Dict[str, Any]) -> Dict[str, Any]:
+        # Another worker may have refreshed this series more recently
+        if self.shared is not None:
+            other = self.shared.get(key)
+            if other is not None and other["checked_at"] > series["checked_at"]:
+                self.local.set(key, other, series_size(other["rows"]))
+                return other
+        return series
+
+    def _save(self, key: str, series: Dict[str, Any]) -> None:
+        series["version"] = series_version(series)
+        self.local.set(key, series, series_size(series["rows"]))
+        if self.shared is not None:
+            self.shared.set(key, series, self.local.ttl)
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(encode(series))
+            os.replace(tmp, self._path(key))
+
+    # Fetching
+
+    def _refresh(self, symbol: str, interval: str, series: Dict[str, Any], now: float) -> None:
+        rows = series["rows"]
+        if not rows:
+            series["rows"], series["checked_at"] = self._fetch(symbol, interval), now
+            return
+        last = rows[-1]
+        # Re-fetch from the first candle that was still open when last seen
+        start = last[OPEN_TIME] if last[CLOSE_TIME] >= series["checked_at"] * 1000 else last[CLOSE_TIME] + 1
+        for _ in range(CATCH_UP_PAGES):
+            page = self._fetch(symbol, interval, start_time=start)
+            rows = merge(rows, page)
+            if len(page) < FETCH_LIMIT:
+                break
+            start = page[-1][CLOSE_TIME] + 1
+        else:
+            # Too far behind to page forward; restart from the latest window
+            rows = self._fetch(symbol, interval)
+            series["complete"] = False
+        series["rows"] = rows
+        series["checked_at"] = now
+
+    def _backfill(self, symbol: str, interval: str, series: Dict[str, Any], limit: int) -> None:
+        rows = series["rows"]
+        while len(rows) < limit:
+            first = rows[0][OPEN_TIME]
+            older = [r for r in self._fetch(symbol, interval, end_time=first - 1) if r[OPEN_TIME] < first]
+            if not older:
+                series["complete"] = True  # no earlier history
+                break
+            rows = older + rows
+        series["rows"] = rows
+
+    def get(self, symbol: str, interval: str, limit: int) -> Rows:
+        """The latest ``limit`` candles (oldest first)."""
+        return self.get_series(symbol, interval, limit)[0]
+
+    def get_series(self, symbol: str, interval: str, limit: int) -> Tuple[Rows, str]:
+        """Like ``get``, plus the series version, which changes whenever its rows do."""
+        key = f"klines:{symbol}:{interval}"
+        with self._lock(key):
+            now = self.clock()
+            series = self._load(key)
+            changed = False
+            if series is None:
+                series = {"rows": self._fetch(symbol, interval), "checked_at": now, "complete": False}
+                changed = True
+            elif now - series["checked_at"] >= self.refresh_seconds:
+                series = self._adopt_newer(key, series)
+                if now - series["checked_at"] >= self.refresh_seconds:
+                    self._refresh(symbol, interval, series, now)
+                    changed = True
+            if series["rows"] and len(series["rows"]) < limit and not series.get("complete"):
+                self._backfill(symbol, interval, series, min(limit, self.max_candles))
+                changed = True
+            if changed:
+                if len(series["rows"]) > self.max_candles:
+                    series["rows"] = series["rows"][-self.max_candles:]
+                    series["complete"] = False
+                self._save(key, series)
+            return series["rows"][-limit:], series.get("version", "")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.local.stats(), "upstream_requests": self.requests, "candles_fetched": self.candles_fetched}
+
+
+def _options() -> Dict[str, Any]:
+    return getattr(settings, "TRADE_KLINES_CACHE", None) or {}
+
+
+def max_limit() -> int:
+    """Largest ``limit`` the chart API accepts."""
+    return int(_options().get("MAX_LIMIT", 5000))
+
+
+@functools.lru_cache(maxsize=None)
+def get_kline_store() -> KlineStore:
+    options = _options()
+    return KlineStore(
+        refresh_seconds=float(options.get("REFRESH_SECONDS", 30)),
+        max_candles=int(options.get("MAX_CANDLES", 20_000)),
+        local=LRUCache(
+            max_entries=int(options.get("MAX_ENTRIES", 256)),
+            max_bytes=int(options.get("MAX_BYTES", 64 * 1024 * 1024)),
+            ttl=float(options.get("IDLE_SECONDS", 3600)),
+        ),
+        shared=get_shared_cache(),
+        directory=options.get("DIRECTORY"),
+    )
+
+
+@receiver(setting_changed)
+def _reset_kline_store(*, setting: str, **kwargs) -> None:
+    if setting in {"TRADE_KLINES_CACHE", "CACHES", "TRADE_UPSTREAM_CACHE", "BINANCE_API_BASE"}:
+        get_kline_store.cache_clear()
+
+
+def get_klines(symbol: str, interval: str, limit: int) -> Rows:
+    return get_kline_store().get(symbol, interval, limit)
+
+
+def to_columns(rows: Rows) -> Dict[str, Any]:
+    """Column-oriented numeric form of ``rows`` for the chart.
+
+    Only the fields the chart draws are kept. Open times are delta-encoded
+    (``t0`` plus the gaps ``dt``, nearly all equal), and prices and volume
+    are numbers instead of strings, so the payload is small and compresses
+    well.
+    """
+    times = [r[OPEN_TIME] for r in rows]
+    return {
+        "t0": times[0] if times else None,
+        "dt": [b - a for a, b in zip(times, times[1:])],
+        "o": [float(r[1]) for r in rows],
+        "h": [float(r[2]) for r in rows],
+        "l": [float(r[3]) for r in rows],
+        "c": [float(r[4]) for r in rows],
+        "v": [float(r[5]) for r in rows],
+    }
+
+
+FORMATS = {
+    "raw": lambda rows: {"klines": rows},
+    "columns": lambda rows: {"format": "columns", **to_columns(rows)},
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoded_cache() -> LRUCache:
+    options = _options()
+    return LRUCache(
+        max_entries=int(options.get("ENCODED_ENTRIES", 512)),
+        max_bytes=int(options.get("ENCODED_BYTES", 16 * 1024 * 1024)),
+        ttl=float(options.get("IDLE_SECONDS", 3600)),
+    )
+
+
+@receiver(setting_changed)
+def _reset_encoded_cache(*, setting: str, **kwargs) -> None:
+    if setting == "TRADE_KLINES_CACHE":
+        get_encoded_cache.cache_clear()
+
+
+def resolve_interval(interval: str) -> Optional[Tuple[str, int]]:
+    """Native interval ``interval`` is built from, and how many of its candles make one.
+
+    ``None`` if ``interval`` is neither native nor a multiple of one.
+    """
+    if interval in INTERVALS:
+        return interval, 1
+    target = resample.timeframe_ms(interval)
+    source = resample.source_interval(target) if target else None
+    if source is None:
+        return None
+    return source, target // resample.NATIVE_MS[source]
+
+
+def _derived(rows: Rows, interval: str, factor: int, limit: int, points: Optional[int], fmt: str) -> Dict[str, Any]:
+    """Payload for a resampled and/or LTTB-downsampled view of ``rows``."""
+    prices = np.array([r[1:6] for r in rows], dtype=np.float64).reshape(-1, 5)
+    cols = {"t": np.array([r[OPEN_TIME] for r in rows], dtype=np.int64)}
+    cols.update(zip("ohlcv", prices.T))
+    if factor > 1:
+        cols = resample.resample(cols, resample.timeframe_ms(interval), resample.origin_ms(interval))
+    cols = {k: v[-limit:] for k, v in cols.items()}
+    if points:
+        keep = resample.lttb(cols["t"], cols["c"], points)
+        cols = resample.select(cols, keep)
+    if fmt == "columns":
+        t = cols["t"]
+        return {
+            "format": "columns",
+            "t0": int(t[0]) if len(t) else None,
+            "dt": np.diff(t).tolist(),
+            **{k: cols[k].tolist() for k in "ohlcv"},
+        }
+    if factor == 1:
+        tail = rows[-limit:]
+        return {"klines": [tail[i] for i in keep] if points else tail}
+    step = resample.timeframe_ms(interval)
+    return {"klines": [
+        [t, str(o), str(h), str(l), str(c), str(v), t + step - 1]
+        for t, o, h, l, c, v in zip(*(cols[k].tolist() for k in "tohlcv"))
+    ]}
+
+
+def latest_klines(symbol: str, interval: str, count: int = 2) -> Rows:
+    """The newest ``count`` candles straight from Binance, for live updates."""
+    source, factor = resolve_interval(interval)
+    if factor == 1:
+        return fetch_klines(symbol, source, count)
+    rows = fetch_klines(symbol, source, min(FETCH_LIMIT, (count + 1) * factor))
+    return _derived(rows, interval, factor, count, None, "raw")["klines"]
+
+
+def encoded_klines(
+    symbol: str, interval: str, limit: int, fmt: str = "raw", gzipped: bool = False, points: Optional[int] = None
+) -> bytes:
+    """Serialized (and optionally gzipped) API payload, cached per series version.
+
+    Repeated requests for an unchanged series return the stored bytes
+    without touching JSON or zlib again. Non-native intervals are resampled
+    from the cached series of their source interval, and ``points`` thins
+    the result with LTTB (see ``trades.resample``).
+    """
+    source, factor = resolve_interval(interval)
+    store = get_kline_store()
+    # One extra bucket's worth covers a leading bucket that starts mid-way
+    source_limit = limit if factor == 1 else min(store.max_candles, (limit + 1) * factor)
+    rows, version = store.get_series(symbol, source, source_limit)
+    cache = get_encoded_cache()
+    key = (symbol, interval, limit, fmt, points, version)
+    entry = cache.get(key)
+    changed = entry is None
+    if changed:
+        if factor > 1 or points:
+            payload = _derived(rows, interval, factor, limit, points, fmt)
+        else:
+            payload = FORMATS[fmt](rows)
+        entry = {"json": json.dumps(payload, separators=(",", ":")).encode()}
+    variant = "gzip" if gzipped else "json"
+    if variant not in entry:
+        entry["gzip"] = gzip.compress(entry["json"], 6)
+        changed = True
+    if changed:
+        cache.set(key, entry, sum(len(b) for b in entry.values()))
+    return entry[variant]
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {**get_kline_store().stats(), "encoded": get_encoded_cache().stats()}
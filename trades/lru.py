@@ -0,0 +1,104 @@
+"""Thread-safe in-process LRU cache bounded by entries, bytes and age."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """Least-recently-used cache with a per-entry TTL.
+
+    Callers pass the size of each value (``set(key, value, size)``); the
+    cache evicts least recently used entries until both ``max_entries``
+    and ``max_bytes`` hold. Expired entries are dropped when touched and
+    swept whenever an insert needs room.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        # key -> (value, size, expires_at)
+        self._data: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self.evictions = {"expired": 0, "entries": 0, "bytes": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _drop(self, key: Hashable, reason: str) -> None:
+        _, size, _ = self._data.pop(key)
+        self.bytes -= size
+        self.evictions[reason] += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[2] <= self.clock():
+                self._drop(key, "expired")
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: Optional[float] = None) -> bool:
+        """Insert ``value``; returns False if it alone exceeds ``max_bytes``."""
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._data:
+                _, old_size, _ = self._data.pop(key)
+                self.bytes -= old_size
+            self._data[key] = (value, size, self.clock() + (self.ttl if ttl is None else ttl))
+            self.bytes += size
+            if len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                self._sweep()
+            while len(self._data) > self.max_entries:
+                self._drop(next(iter(self._data)), "entries")
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._data)), "bytes")
+        return True
+
+    def _sweep(self) -> None:
+        now = self.clock()
+        for key in [k for k, (_, _, expires) in self._data.items() if expires <= now]:
+            self._drop(key, "expired")
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                _, size, _ = self._data.pop(key)
+                self.bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": dict(self.evictions),
+            }
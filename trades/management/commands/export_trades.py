@@ -0,0 +1,51 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from trades import export
+from trades.filters import TAG_MATCH_ALL, TAG_MATCH_ANY, filter_trades
+from trades.models import Trade
+
+
+class Command(BaseCommand):
+    help = "Export trades, optionally filtered like the trade list, as CSV, Parquet or Arrow."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(export.FORMATS), default="csv")
+        parser.add_argument("-o", "--output", default="-", help="Output file ('-' for stdout).")
+        parser.add_argument("--chunk-size", type=int, help="Rows read per query (default: TRADE_EXPORT_CHUNK_SIZE).")
+        parser.add_argument("--type", action="append", default=[], help="Repeatable.")
+        parser.add_argument("--result", action="append", default=[], help="Repeatable.")
+        parser.add_argument("--direction", action="append", default=[], help="Repeatable.")
+        parser.add_argument("--tag", dest="tags", action="append", default=[], help="Tag id; repeatable.")
+        parser.add_argument("--tag-mode", choices=[TAG_MATCH_ANY, TAG_MATCH_ALL], default=TAG_MATCH_ANY)
+        parser.add_argument("--symbol", default="")
+
+    def handle(self, *args, format, output, chunk_size=None, **options):
+        if format not in export.available_formats():
+            raise CommandError(f"The {format} export needs pyarrow (pip install pyarrow).")
+        if chunk_size is not None and chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+        params = QueryDict(mutable=True)
+        for key in ("type", "result", "direction", "tags"):
+            params.setlist(key, options[key])
+        params["tag_mode"] = options["tag_mode"]
+        params["symbol"] = options["symbol"]
+        qs = filter_trades(Trade.objects.all(), params)
+
+        started = time.perf_counter()
+        size = 0
+        stream = sys.stdout.buffer if output == "-" else open(output, "wb")
+        try:
+            for chunk in export.export_chunks(format, qs, chunk_size):
+                stream.write(chunk)
+                size += len(chunk)
+        finally:
+            if output == "-":
+                stream.flush()
+            else:
+                stream.close()
+        if output != "-":
+            self.stdout.write(f"Wrote {size} bytes to {output} in {time.perf_counter() - started:.2f}s.")
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from trades import importer
+
+
+class Command(BaseCommand):
+    help = "Import trades from a broker CSV, JSON array or JSON Lines export."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import (format guessed from the extension unless --format is given).")
+        parser.add_argument("--format", choices=importer.FORMATS, help="Input format.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Rows validated and inserted per transaction (default: TRADE_IMPORT_CHUNK_SIZE).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; insert nothing.")
+
+    def handle(self, *args, path, format=None, chunk_size=None, dry_run=False, **options):
+        fmt = format or importer.guess_format(path)
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+        if chunk_size is not None and chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        def progress(result):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {result.rows} row(s), {result.rate:,.0f} rows/s")
+
+        try:
+            with open(path, "rb") as stream:
+                result = importer.import_file(stream, fmt, chunk_size=chunk_size, dry_run=dry_run, progress=progress)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except ValueError as exc:
+            raise CommandError(f"Malformed {fmt} file: {exc}")
+        for number, message in result.errors:
+            self.stderr.write(f"Row {number}: {message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... {result.error_count - len(result.errors)} more invalid row(s)")
+        self.stdout.write(("Dry run: " if dry_run else "") + result.summary())
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from trades.image_store import get_image_store
+from trades.models import Trade
+
+
+class Command(BaseCommand):
+    help = "Delete stored screenshots that no trade references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+
+    def handle(self, *args, dry_run=False, **options):
+        store = get_image_store()
+        referenced = set()
+        for kind in ("large", "medium", "short"):
+            referenced.update(
+                Trade.objects.exclude(**{f"{kind}_image_sha256__isnull": True})
+                .values_list(f"{kind}_image_sha256", flat=True)
+                .distinct()
+            )
+        orphans = [d for d in store.digests() if d not in referenced]
+        if not dry_run:
+            for digest in orphans:
+                store.delete(digest)
+                store.delete_variants(digest)
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(f"{verb} {len(orphans)} unreferenced image(s).")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from trades import heatmap, rollups, symbols
+from trades.models import Symbol, Trade, TradeHeatmapCell
+from trades.stats import summarize, trade_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the tables derived from Trade (TradeStatsBucket, TradeHeatmapCell, Symbol), or verify them with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Compare the derived tables with live aggregates instead of rebuilding; exit non-zero on mismatch.",
+        )
+
+    def handle(self, *args, check=False, **options):
+        if check:
+            live = trade_stats(Trade.objects.all())
+            rolled = summarize(rollups.bucket_rows())
+            if live != rolled:
+                raise CommandError(f"Rollup is out of date.\nlive:   {live}\nrollup: {rolled}")
+            live_cells = heatmap.deltas_for_queryset(Trade.objects.all(), +1)
+            cells = {
+                (c.type, c.weekday, c.hour): [c.count, c.wins, c.r_sum]
+                for c in TradeHeatmapCell.objects.all()
+            }
+            if live_cells != cells:
+                raise CommandError(f"Heatmap is out of date.\nlive:    {live_cells}\nheatmap: {cells}")
+            live_symbols = dict(symbols.counts_for_queryset(Trade.objects.all(), +1))
+            table = dict(Symbol.objects.values_list("name", "trade_count"))
+            if live_symbols != table:
+                raise CommandError(f"Symbol table is out of date.\nlive:  {live_symbols}\ntable: {table}")
+            self.stdout.write("Rollup, heatmap and symbols match live aggregates.")
+            return
+        count = rollups.rebuild()
+        cells = heatmap.rebuild()
+        names = symbols.rebuild()
+        self.stdout.write(f"Rebuilt {count} bucket(s), {cells} heatmap cell(s) and {names} symbol(s).")
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:22
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Length
+
+
+def backfill_image_sizes(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    Trade.objects.update(
+        large_image_size=Coalesce(Length("large_image"), 0),
+        medium_image_size=Coalesce(Length("medium_image"), 0),
+        short_image_size=Coalesce(Length("short_image"), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0004_strategy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trade',
+            name='large_image_size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='medium_image_size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='short_image_size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_image_sizes, migrations.RunPython.noop),
+    ]
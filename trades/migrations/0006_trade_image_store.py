@@ -0,0 +1,109 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:23
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations, models
+
+KINDS = ("large", "medium", "short")
+
+
+# The layout FileSystemImageStore used when this migration was written,
+# kept here so later changes to trades.image_store can't alter it.
+def image_location():
+    options = (getattr(settings, "TRADE_IMAGE_STORE", None) or {}).get("OPTIONS") or {}
+    return Path(options.get("location") or Path(settings.MEDIA_ROOT) / "trade_images")
+
+
+def image_path(location, digest):
+    return location / digest[:2] / digest[2:4] / digest
+
+
+def save_image(location, data):
+    digest = hashlib.sha256(data).hexdigest()
+    target = image_path(location, digest)
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".upload-")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        os.replace(tmp_name, target)
+    return digest, len(data)
+
+
+def move_blobs_to_store(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    location = image_location()
+    for kind in KINDS:
+        blob_field = f"{kind}_image"
+        rows = (
+            Trade.objects.filter(**{f"{blob_field}__isnull": False})
+            .values_list("pk", blob_field)
+            .iterator(chunk_size=20)
+        )
+        for pk, data in rows:
+            if not data:
+                continue
+            digest, size = save_image(location, bytes(data))
+            Trade.objects.filter(pk=pk).update(
+                **{f"{kind}_image_sha256": digest, f"{kind}_image_size": size}
+            )
+
+
+def restore_blobs_from_store(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    location = image_location()
+    for kind in KINDS:
+        digest_field = f"{kind}_image_sha256"
+        rows = (
+            Trade.objects.filter(**{f"{digest_field}__isnull": False})
+            .values_list("pk", digest_field)
+            .iterator(chunk_size=20)
+        )
+        for pk, digest in rows:
+            try:
+                data = image_path(location, digest).read_bytes()
+            except FileNotFoundError:
+                continue
+            Trade.objects.filter(pk=pk).update(**{f"{kind}_image": data})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0005_trade_image_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trade',
+            name='large_image_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='medium_image_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='trade',
+            name='short_image_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(move_blobs_to_store, restore_blobs_from_store),
+        migrations.RemoveField(
+            model_name='trade',
+            name='large_image',
+        ),
+        migrations.RemoveField(
+            model_name='trade',
+            name='medium_image',
+        ),
+        migrations.RemoveField(
+            model_name='trade',
+            name='short_image',
+        ),
+    ]
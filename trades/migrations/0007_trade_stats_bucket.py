@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:27
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def build_rollup(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    TradeStatsBucket = apps.get_model("trades", "TradeStatsBucket")
+    rows = (
+        Trade.objects.order_by()
+        .annotate(day=TruncDate("date"))
+        .values("type", "direction", "result", "day")
+        .annotate(n=Count("id"), rr=Sum("risk_reward_ratio"), risk=Sum("risk_percent"))
+    )
+    TradeStatsBucket.objects.bulk_create(
+        [
+            TradeStatsBucket(
+                type=r["type"], direction=r["direction"], result=r["result"], day=r["day"],
+                count=r["n"], rr_sum=r["rr"] or 0, risk_sum=r["risk"] or 0,
+            )
+            for r in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0006_trade_image_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TradeStatsBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('crypto', 'Crypto'), ('forex', 'Forex'), ('index', 'Index')], max_length=10)),
+                ('direction', models.CharField(choices=[('long', 'Long'), ('short', 'Short')], max_length=10)),
+                ('result', models.CharField(choices=[('take', 'Take'), ('loss', 'Loss')], max_length=10)),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('rr_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('risk_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='tradestatsbucket',
+            constraint=models.UniqueConstraint(fields=('type', 'direction', 'result', 'day'), name='trade_stats_bucket_key'),
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0007_trade_stats_bucket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['-date', '-created_at'], name='trade_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['type', '-date', '-created_at'], name='trade_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['result', '-date', '-created_at'], name='trade_result_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['direction', '-date', '-created_at'], name='trade_direction_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['type', 'direction', 'result', 'risk_reward_ratio', 'risk_percent'], name='trade_stats_cover_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:30
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_symbols(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    Symbol = apps.get_model("trades", "Symbol")
+    rows = Trade.objects.order_by().exclude(symbol="").values("symbol").annotate(n=Count("id"))
+    Symbol.objects.bulk_create([Symbol(name=r["symbol"], trade_count=r["n"]) for r in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0008_trade_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Symbol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('trade_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(build_symbols, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0009_symbol'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='trade',
+            options={'ordering': ['-date', '-created_at', '-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='trade',
+            name='trade_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trade',
+            name='trade_type_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trade',
+            name='trade_result_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trade',
+            name='trade_direction_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='trade_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['type', '-date', '-created_at', '-id'], name='trade_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['result', '-date', '-created_at', '-id'], name='trade_result_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['direction', '-date', '-created_at', '-id'], name='trade_direction_date_idx'),
+        ),
+    ]
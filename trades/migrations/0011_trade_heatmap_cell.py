@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:21
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+
+
+def build_heatmap(apps, schema_editor):
+    Trade = apps.get_model("trades", "Trade")
+    TradeHeatmapCell = apps.get_model("trades", "TradeHeatmapCell")
+    r = Case(
+        When(result="take", then=F("risk_reward_ratio")),
+        default=Value(Decimal(-1)),
+        output_field=DecimalField(max_digits=8, decimal_places=2),
+    )
+    rows = (
+        Trade.objects.order_by()
+        .annotate(weekday=ExtractIsoWeekDay("date"), hour=ExtractHour("date"))
+        .values("type", "weekday", "hour")
+        .annotate(n=Count("id"), wins=Count("id", filter=Q(result="take")), r=Sum(r))
+    )
+    TradeHeatmapCell.objects.bulk_create(
+        [
+            TradeHeatmapCell(
+                type=row["type"], weekday=row["weekday"], hour=row["hour"],
+                count=row["n"], wins=row["wins"], r_sum=row["r"] or 0,
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0010_trade_keyset_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TradeHeatmapCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('crypto', 'Crypto'), ('forex', 'Forex'), ('index', 'Index')], max_length=10)),
+                ('weekday', models.PositiveSmallIntegerField(help_text='ISO weekday in the local time zone, Monday = 1')),
+                ('hour', models.PositiveSmallIntegerField(help_text='Hour of day in the local time zone')),
+                ('count', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('r_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='tradeheatmapcell',
+            constraint=models.UniqueConstraint(fields=('type', 'weekday', 'hour'), name='trade_heatmap_cell_key'),
+        ),
+        migrations.RunPython(build_heatmap, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:42
+
+from django.db import migrations, models
+
+
+def create_row(apps, schema_editor):
+    apps.get_model("trades", "DataVersion").objects.create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trades', '0011_trade_heatmap_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_row, migrations.RunPython.noop),
+    ]
@@ -14,6 +14,10 @@ class Tag(models.Model):
         return self.name
 
 
+# URL kind -> field prefix of the screenshot columns on Trade
+IMAGE_KINDS = {"ltf": "large", "mtf": "medium", "stf": "short"}
+
+
 class Trade(models.Model):
     class TradeType(models.TextChoices):
         CRYPTO = "crypto", "Crypto"
@@ -37,18 +41,22 @@ class Trade(models.Model):
     direction = models.CharField(max_length=10, choices=Direction.choices)
     date = models.DateTimeField(default=timezone.now)
 
-    # Image binaries stored in DB (not filesystem)
-    large_image = models.BinaryField(null=True, blank=True, editable=False)
+    # Screenshots live in the content-addressed image store (trades.image_store);
+    # the row only keeps the SHA-256 digest and metadata.
+    large_image_sha256 = models.CharField(max_length=64, null=True, blank=True, editable=False)
     large_image_content_type = models.CharField(max_length=100, null=True, blank=True)
     large_image_name = models.CharField(max_length=255, null=True, blank=True)
+    large_image_size = models.PositiveIntegerField(default=0, editable=False)
 
-    medium_image = models.BinaryField(null=True, blank=True, editable=False)
+    medium_image_sha256 = models.CharField(max_length=64, null=True, blank=True, editable=False)
     medium_image_content_type = models.CharField(max_length=100, null=True, blank=True)
     medium_image_name = models.CharField(max_length=255, null=True, blank=True)
+    medium_image_size = models.PositiveIntegerField(default=0, editable=False)
 
-    short_image = models.BinaryField(null=True, blank=True, editable=False)
+    short_image_sha256 = models.CharField(max_length=64, null=True, blank=True, editable=False)
     short_image_content_type = models.CharField(max_length=100, null=True, blank=True)
     short_image_name = models.CharField(max_length=255, null=True, blank=True)
+    short_image_size = models.PositiveIntegerField(default=0, editable=False)
 
     risk_percent = models.DecimalField(max_digits=6, decimal_places=2, help_text="% of account at risk")
     risk_reward_ratio = models.DecimalField(max_digits=8, decimal_places=2)
@@ -59,7 +67,20 @@ class Trade(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ["-date", "-created_at"]
+        # id makes the order total, which keyset pagination (trades.pagination) relies on
+        ordering = ["-date", "-created_at", "-id"]
+        indexes = [
+            # List page: ORDER BY -date, -created_at, -id, optionally narrowed by one filter
+            models.Index(fields=["-date", "-created_at", "-id"], name="trade_date_idx"),
+            models.Index(fields=["type", "-date", "-created_at", "-id"], name="trade_type_date_idx"),
+            models.Index(fields=["result", "-date", "-created_at", "-id"], name="trade_result_date_idx"),
+            models.Index(fields=["direction", "-date", "-created_at", "-id"], name="trade_direction_date_idx"),
+            # Covers the stats GROUP BY type, direction (trades.stats) without touching the table
+            models.Index(
+                fields=["type", "direction", "result", "risk_reward_ratio", "risk_percent"],
+                name="trade_stats_cover_idx",
+            ),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.get_type_display()} {self.get_direction_display()} {self.date:%Y-%m-%d %H:%M}"
@@ -90,3 +111,82 @@ class Strategy(models.Model):
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.get_type_display()} — {self.name}"
+
+
+class TradeStatsBucket(models.Model):
+    """Per-day rollup of trade counts and sums backing the stats page.
+
+    Maintained incrementally by ``trades.rollups``; rebuild with
+    ``python manage.py rebuild_trade_stats``.
+    """
+
+    type = models.CharField(max_length=10, choices=Trade.TradeType.choices)
+    direction = models.CharField(max_length=10, choices=Trade.Direction.choices)
+    result = models.CharField(max_length=10, choices=Trade.Result.choices)
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+    rr_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    risk_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["type", "direction", "result", "day"], name="trade_stats_bucket_key"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.day} {self.type}/{self.direction}/{self.result}: {self.count}"
+
+
+class TradeHeatmapCell(models.Model):
+    """Trade counts, wins and R sum per ``(type, weekday, hour)`` of ``Trade.date``.
+
+    At most 3 x 7 x 24 rows backing the stats heatmap. Maintained
+    incrementally by ``trades.heatmap``; rebuilt with the stats rollup by
+    ``python manage.py rebuild_trade_stats``.
+    """
+
+    type = models.CharField(max_length=10, choices=Trade.TradeType.choices)
+    weekday = models.PositiveSmallIntegerField(help_text="ISO weekday in the local time zone, Monday = 1")
+    hour = models.PositiveSmallIntegerField(help_text="Hour of day in the local time zone")
+    count = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    r_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["type", "weekday", "hour"], name="trade_heatmap_cell_key"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.type} weekday {self.weekday} {self.hour:02d}h: {self.count}"
+
+
+class Symbol(models.Model):
+    """Distinct non-empty ``Trade.symbol`` values with their trade counts.
+
+    Kept in sync by ``trades.symbols`` so symbol search and suggestions never
+    scan the trades table.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    trade_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return self.name
+
+
+class DataVersion(models.Model):
+    """Single row whose ``version`` goes up with every change to trades or their tags.
+
+    Bumped by ``trades.signals`` in the same transaction as the change, so
+    every worker process sees the same value; it keys caches of results
+    computed from the whole trade table.
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"v{self.version}"
@@ -0,0 +1,151 @@
+"""Monte Carlo risk of ruin by bootstrapping trade returns.
+
+Each simulation draws ``horizon`` trades with replacement from the
+observed per-trade returns and compounds them. The simulations are split
+into fixed-size shards, each seeded from one ``SeedSequence``, so results
+depend only on the inputs and ``seed``, however many processes run them.
+Shards run on a ``ProcessPoolExecutor`` and only return per-simulation
+summaries (final equity, max drawdown, equity at a few checkpoints), which
+are merged exactly.
+
+This module deliberately imports nothing from Django: pool workers are
+spawned processes that only need NumPy.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+CHECKPOINTS = 50
+HISTOGRAM_BINS = 40
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    global _executor, _executor_workers
+    with _lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # spawn, not fork: the web process has threads (thumbnails, calendar refresh)
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def simulate_shard(
+    log_returns: np.ndarray,
+    simulations: int,
+    horizon: int,
+    checkpoints: np.ndarray,
+    seed: np.random.SeedSequence,
+) -> Dict[str, np.ndarray]:
+    """Summaries of ``simulations`` bootstrapped paths (log equity, start 0)."""
+    rng = np.random.default_rng(seed)
+    paths = np.cumsum(log_returns[rng.integers(0, len(log_returns), size=(simulations, horizon))], axis=1)
+    # The starting equity is the first peak
+    peak = np.maximum.accumulate(np.maximum(paths, 0.0), axis=1)
+    return {
+        "final": paths[:, -1],
+        "trough": paths.min(axis=1),
+        "max_drawdown": (paths - peak).min(axis=1),
+        "checkpoints": paths[:, checkpoints],
+    }
+
+
+def _shard_sizes(simulations: int, horizon: int, shard_cells: int) -> List[int]:
+    per_shard = max(1, shard_cells // horizon)
+    sizes = [per_shard] * (simulations // per_shard)
+    if simulations % per_shard:
+        sizes.append(simulations % per_shard)
+    return sizes
+
+
+def _pct(values: np.ndarray) -> np.ndarray:
+    """Log equity -> percent change of equity (``inf`` past float range)."""
+    with np.errstate(over="ignore"):
+        return np.expm1(values) * 100.0
+
+
+def _finite(values: np.ndarray) -> List[Any]:
+    """As a list, with overflowed values (a strong edge over a long horizon) as ``None``."""
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+def _percentiles(log_values: np.ndarray, percentiles, axis=None) -> np.ndarray:
+    # Taken in log space, where values never overflow, then converted
+    return _pct(np.percentile(log_values, percentiles, axis=axis))
+
+
+def simulate(
+    returns: np.ndarray,
+    simulations: int = 10_000,
+    horizon: Optional[int] = None,
+    ruin_pct: float = 50.0,
+    seed: int = 0,
+    workers: int = 1,
+    shard_cells: int = 2_000_000,
+) -> Dict[str, Any]:
+    """Bootstrap ``returns`` (percent of equity per trade) and summarize.
+
+    Ruin is losing ``ruin_pct`` percent of the starting equity at any point
+    of a path. ``horizon`` defaults to the number of observed trades.
+    Returns beyond float range (compounding a strong edge over thousands of
+    trades) are reported as ``None``.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if not len(returns):
+        return {"trades": 0, "simulations": 0}
+    horizon = horizon or len(returns)
+    log_returns = np.log1p(np.maximum(returns, -99.99) / 100.0)
+    checkpoints = np.unique(np.linspace(0, horizon - 1, min(CHECKPOINTS, horizon)).round().astype(np.int64))
+    sizes = _shard_sizes(simulations, horizon, shard_cells)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(log_returns, n, horizon, checkpoints, s) for n, s in zip(sizes, seeds)]
+    if workers > 1 and len(args) > 1:
+        parts = list(_get_executor(workers).map(simulate_shard, *zip(*args)))
+    else:
+        parts = [simulate_shard(*a) for a in args]
+    merged = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+    final = merged["final"]  # log equity; its percent form may overflow
+    max_drawdown = -_pct(merged["max_drawdown"])
+    ruin_level = np.log1p(-min(ruin_pct, 99.99) / 100.0)
+    # Bins of equal width in log equity
+    counts, edges = np.histogram(final, bins=HISTOGRAM_BINS)
+    bands = _percentiles(merged["checkpoints"], BAND_PERCENTILES, axis=0)
+    mean = float(_pct(np.log(np.mean(np.exp(final - final.max()))) + final.max()))
+    return {
+        "trades": int(len(returns)),
+        "simulations": int(simulations),
+        "horizon": int(horizon),
+        "seed": seed,
+        "ruin_pct": ruin_pct,
+        "risk_of_ruin": float((merged["trough"] <= ruin_level).mean()),
+        "probability_of_profit": float((final > 0).mean()),
+        "mean_return_pct": mean if np.isfinite(mean) else None,
+        "final_return_pct": dict(zip(map(str, PERCENTILES), _finite(_percentiles(final, PERCENTILES)))),
+        "max_drawdown_pct": {str(p): float(v) for p, v in zip(PERCENTILES, np.percentile(max_drawdown, PERCENTILES))},
+        "histogram": {"edges": _finite(np.round(_pct(edges), 4)), "counts": counts.tolist()},
+        "bands": {
+            "trade": (checkpoints + 1).tolist(),
+            **{str(p): _finite(np.round(row, 4)) for p, row in zip(BAND_PERCENTILES, bands)},
+        },
+    }
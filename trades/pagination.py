@@ -0,0 +1,104 @@
+"""Keyset (cursor) pagination over ``Trade.Meta.ordering``.
+
+Pages are addressed by the ``(date, created_at, id)`` of their boundary
+rows instead of an OFFSET, so every page is one index range scan with a
+LIMIT, no ``COUNT(*)`` is needed, and links stay valid while trades are
+inserted or deleted.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+Key = Tuple[datetime, datetime, int]
+
+
+def encode_cursor(obj: Any) -> str:
+    raw = json.dumps([obj.date.isoformat(), obj.created_at.isoformat(), obj.pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Key:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        date, created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(date), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        raise Http404("Invalid cursor")
+
+
+def _older_than(key: Key) -> Q:
+    """Rows listed after ``key`` in ``-date, -created_at, -id`` order."""
+    date, created_at, pk = key
+    # The leading date__lte bound lets the (date, created_at, id) index do a range scan
+    return Q(date__lte=date) & (
+        Q(date__lt=date) | Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+    )
+
+
+def _newer_than(key: Key) -> Q:
+    """Rows listed before ``key`` in ``-date, -created_at, -id`` order."""
+    date, created_at, pk = key
+    return Q(date__gte=date) & (
+        Q(date__gt=date) | Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+    )
+
+
+class CursorPage:
+    """Duck-types the parts of ``django.core.paginator.Page`` templates use."""
+
+    def __init__(self, object_list: List[Any], has_next: bool, has_previous: bool):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        return encode_cursor(self.object_list[-1]) if self._has_next else None
+
+    @property
+    def previous_cursor(self) -> Optional[str]:
+        return encode_cursor(self.object_list[0]) if self._has_previous else None
+
+
+class CursorPaginator:
+    ordering = ("-date", "-created_at", "-id")
+
+    def __init__(self, queryset: QuerySet, per_page: int):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, after: Optional[str] = None, before: Optional[str] = None) -> CursorPage:
+        qs = self.queryset.order_by(*self.ordering)
+        if before:
+            # Walk backwards from the cursor, then restore display order
+            reverse = [f.lstrip("-") for f in self.ordering]
+            rows = list(qs.filter(_newer_than(decode_cursor(before))).order_by(*reverse)[: self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[: self.per_page][::-1]
+            return CursorPage(rows, has_next=True, has_previous=has_previous)
+        if after:
+            qs = qs.filter(_older_than(decode_cursor(after)))
+        rows = list(qs[: self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[: self.per_page], has_next=has_next, has_previous=bool(after))
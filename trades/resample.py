@@ -0,0 +1,114 @@
+"""OHLCV resampling and LTTB downsampling for chart data (NumPy).
+
+Timeframes Binance doesn't serve (``10m``, ``3h``, ``2d``...) are built from
+the largest native interval that divides them, so a higher timeframe is
+derived from an already cached lower one instead of another upstream
+series. Line charts can additionally be thinned to a point budget with
+Largest-Triangle-Three-Buckets, which keeps the visual shape of a series
+far better than taking every n-th point.
+
+Both functions work on the column dicts produced by ``klines.to_columns``
+(``t``: open times in ms, ``o``/``h``/``l``/``c``/``v``: floats).
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, Optional
+
+import numpy as np
+
+UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+# Native Binance intervals usable as a resampling source (1M has no fixed length)
+NATIVE_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000, "8h": 28_800_000,
+    "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
+# Binance weeks open on Monday; the Unix epoch was a Thursday
+WEEK_ORIGIN_MS = 4 * UNIT_MS["d"]
+_TIMEFRAME_RE = re.compile(r"^([1-9]\d{0,3})([mhdw])$")
+
+Columns = Dict[str, np.ndarray]
+
+
+def timeframe_ms(timeframe: str) -> Optional[int]:
+    """Length of e.g. ``"10m"`` or ``"2d"`` in ms, or ``None`` if malformed."""
+    m = _TIMEFRAME_RE.match(timeframe)
+    return int(m.group(1)) * UNIT_MS[m.group(2)] if m else None
+
+
+def source_interval(target_ms: int) -> Optional[str]:
+    """The coarsest native interval whose candles tile ``target_ms`` exactly."""
+    best = None
+    for name, ms in NATIVE_MS.items():
+        if ms <= target_ms and target_ms % ms == 0 and (best is None or ms > NATIVE_MS[best]):
+            best = name
+    return best
+
+
+def as_arrays(columns: Dict[str, list]) -> Columns:
+    out = {"t": np.asarray(columns["t"], dtype=np.int64)}
+    for name in "ohlcv":
+        out[name] = np.asarray(columns[name], dtype=np.float64)
+    return out
+
+
+def origin_ms(timeframe: str) -> int:
+    """Offset bucket boundaries of ``timeframe`` are aligned to."""
+    return WEEK_ORIGIN_MS if timeframe.endswith("w") else 0
+
+
+def resample(cols: Columns, target_ms: int, origin: int = 0) -> Columns:
+    """Aggregate candles into ``target_ms`` buckets aligned to ``origin``.
+
+    Open is the first candle's open, close the last one's close, high/low the
+    extremes and volume the sum. A leading bucket the source doesn't cover
+    from its start is dropped rather than reported with a wrong open.
+    """
+    t = cols["t"]
+    if not len(t):
+        return cols
+    bucket = t - (t - origin) % target_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(t)] - 1
+    out = {
+        "t": bucket[starts],
+        "o": cols["o"][starts],
+        "h": np.maximum.reduceat(cols["h"], starts),
+        "l": np.minimum.reduceat(cols["l"], starts),
+        "c": cols["c"][ends],
+        "v": np.add.reduceat(cols["v"], starts),
+    }
+    if t[0] != bucket[0] and len(starts) > 1:
+        out = {k: v[1:] for k, v in out.items()}
+    return out
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the ``threshold`` points LTTB keeps (first and last always)."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    # Interior points split into threshold - 2 buckets of near-equal size
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def select(cols: Columns, index: np.ndarray) -> Columns:
+    return {k: v[index] for k, v in cols.items()}
@@ -0,0 +1,119 @@
+"""Incremental maintenance of the ``TradeStatsBucket`` rollup.
+
+Every trade contributes ``(count=1, rr_sum, risk_sum)`` to exactly one bucket
+keyed by ``(type, direction, result, day)``. Saves and deletes apply the
+difference between a trade's old and new contribution, so the table always
+equals a ``GROUP BY`` over ``Trade`` and the stats page can read it in
+O(number of buckets).
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import counters
+from .models import Trade, TradeStatsBucket
+
+# (type, direction, result, day) -> [count, rr_sum, risk_sum]
+Key = Tuple[str, str, str, Any]
+Deltas = Dict[Key, List[Any]]
+
+ROLLUP_FIELDS = ("type", "direction", "result", "date", "risk_reward_ratio", "risk_percent")
+_CENTS = Decimal("0.01")
+
+
+def _day(value):
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def to_decimal(field_name: str, value: Any) -> Decimal:
+    # Same coercion the model field applies, so floats don't leak binary noise
+    return (Trade._meta.get_field(field_name).to_python(value) or Decimal(0)).quantize(_CENTS)
+
+
+def contribution(values: Dict[str, Any]) -> Tuple[Key, List[Any]]:
+    key = (values["type"], values["direction"], values["result"], _day(values["date"]))
+    return key, [1, to_decimal("risk_reward_ratio", values["risk_reward_ratio"]), to_decimal("risk_percent", values["risk_percent"])]
+
+
+def add_deltas(deltas: Deltas, values: Dict[str, Any], sign: int) -> None:
+    key, (count, rr, risk) = contribution(values)
+    acc = deltas.setdefault(key, [0, Decimal(0), Decimal(0)])
+    acc[0] += sign * count
+    acc[1] += sign * rr
+    acc[2] += sign * risk
+
+
+def apply_deltas(deltas: Deltas) -> None:
+    counters.increment(TradeStatsBucket, ("type", "direction", "result", "day"), ("count", "rr_sum", "risk_sum"), deltas)
+
+
+def deltas_for_queryset(qs: QuerySet, sign: int) -> Deltas:
+    """Grouped contribution of every trade in ``qs`` (one query)."""
+    rows = (
+        qs.order_by()
+        .annotate(day=TruncDate("date"))
+        .values("type", "direction", "result", "day")
+        .annotate(n=Count("id"), rr=Sum("risk_reward_ratio"), risk=Sum("risk_percent"))
+    )
+    deltas: Deltas = {}
+    for row in rows:
+        key = (row["type"], row["direction"], row["result"], row["day"])
+        deltas[key] = [sign * row["n"], sign * Decimal(row["rr"] or 0), sign * Decimal(row["risk"] or 0)]
+    return deltas
+
+
+def rebuild() -> int:
+    """Recompute every bucket from scratch; returns the number of buckets."""
+    rows = (
+        Trade.objects.order_by()
+        .annotate(day=TruncDate("date"))
+        .values("type", "direction", "result", "day")
+        .annotate(n=Count("id"), rr=Sum("risk_reward_ratio"), risk=Sum("risk_percent"))
+    )
+    buckets = [
+        TradeStatsBucket(
+            type=r["type"], direction=r["direction"], result=r["result"], day=r["day"],
+            count=r["n"], rr_sum=r["rr"] or 0, risk_sum=r["risk"] or 0,
+        )
+        for r in rows
+    ]
+    with transaction.atomic():
+        TradeStatsBucket.objects.all().delete()
+        TradeStatsBucket.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
+
+
+def bucket_rows(filters: Optional[Q] = None) -> Iterable[Dict[str, Any]]:
+    """``(type, direction)`` rows in the shape ``trades.stats.summarize`` takes."""
+    qs = TradeStatsBucket.objects.all()
+    if filters is not None:
+        qs = qs.filter(filters)
+    return (
+        qs.order_by()
+        .values("type", "direction")
+        .annotate(
+            total=Sum("count"),
+            wins=Sum("count", filter=Q(result=Trade.Result.TAKE), default=0),
+            losses=Sum("count", filter=Q(result=Trade.Result.LOSS), default=0),
+            rr_sum=Sum("rr_sum"),
+            risk_sum=Sum("risk_sum"),
+        )
+    )
+
+
+def trade_changed(previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> None:
+    """Move one trade's contribution from its old bucket to its new one."""
+    deltas: Deltas = {}
+    if previous is not None:
+        add_deltas(deltas, previous, -1)
+    if current is not None:
+        add_deltas(deltas, current, +1)
+    apply_deltas(deltas)
@@ -0,0 +1,121 @@
+"""Keep tables derived from ``Trade`` (stats rollup, heatmap cube, symbols) in sync.
+
+Per-row saves and deletes go through the model signals below. Bulk paths
+(``delete_trades``, imports) account for whole querysets with grouped
+queries and run the row operations inside ``suppressed()``.
+
+Every change to trades or their tags also increments the ``DataVersion``
+row in the same transaction (``data_version``), which keys caches of
+results computed from the whole table (Monte Carlo simulations). Being in
+the database, it is the same for every worker whatever the cache backend.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+from . import heatmap, rollups, symbols
+from .models import DataVersion, Tag, Trade
+
+TRACKED_FIELDS = rollups.ROLLUP_FIELDS + ("symbol",)
+
+_state = threading.local()
+
+
+@contextmanager
+def suppressed() -> Iterator[None]:
+    """Skip per-row signal updates while a caller accounts for them in bulk."""
+    previous = getattr(_state, "suppressed", False)
+    _state.suppressed = True
+    try:
+        yield
+    finally:
+        _state.suppressed = previous
+
+
+def is_suppressed() -> bool:
+    return getattr(_state, "suppressed", False)
+
+
+def data_version() -> str:
+    """Token that changes whenever trades or their tags change (one small query)."""
+    version = DataVersion.objects.filter(pk=1).values_list("version", flat=True).first()
+    return str(version or 0)
+
+
+def bump_data_version() -> None:
+    """Increment the data version as part of the current transaction."""
+    if not DataVersion.objects.filter(pk=1).update(version=F("version") + 1):
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(pk=1, version=1)
+        except IntegrityError:  # created concurrently
+            DataVersion.objects.filter(pk=1).update(version=F("version") + 1)
+
+
+def instance_values(instance: Trade) -> Dict[str, Any]:
+    values = {f: getattr(instance, f) for f in TRACKED_FIELDS}
+    values["date"] = Trade._meta.get_field("date").to_python(values["date"])
+    return values
+
+
+def remember_previous(sender, instance: Trade, raw=False, **kwargs) -> None:
+    instance._tracked_previous = None
+    if raw or instance.pk is None or is_suppressed():
+        return
+    instance._tracked_previous = Trade.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+
+
+def trade_saved(sender, instance: Trade, raw=False, **kwargs) -> None:
+    if raw or is_suppressed():
+        return
+    previous = getattr(instance, "_tracked_previous", None)
+    current = instance_values(instance)
+    rollups.trade_changed(previous, current)
+    heatmap.trade_changed(previous, current)
+    symbols.trade_changed(previous and previous["symbol"], current["symbol"])
+    bump_data_version()
+
+
+def trade_deleted(sender, instance: Trade, **kwargs) -> None:
+    if is_suppressed():
+        return
+    values = instance_values(instance)
+    rollups.trade_changed(values, None)
+    heatmap.trade_changed(values, None)
+    symbols.trade_changed(values["symbol"], None)
+    bump_data_version()
+
+
+def tags_changed(sender, action: str, **kwargs) -> None:
+    if action in ("post_add", "post_remove", "post_clear") and not is_suppressed():
+        bump_data_version()
+
+
+def tag_deleted(sender, instance: Tag, **kwargs) -> None:
+    bump_data_version()  # its links go with it
+
+
+def delete_trades(qs: QuerySet) -> int:
+    """Delete ``qs``, updating derived tables with grouped queries."""
+    with transaction.atomic():
+        rollups.apply_deltas(rollups.deltas_for_queryset(qs, -1))
+        heatmap.apply_deltas(heatmap.deltas_for_queryset(qs, -1))
+        symbols.adjust_counts(symbols.counts_for_queryset(qs, -1))
+        with suppressed():
+            _, per_model = qs.delete()
+        bump_data_version()
+    return per_model.get(Trade._meta.label, 0)
+
+
+def connect() -> None:
+    pre_save.connect(remember_previous, sender=Trade, dispatch_uid="trades.signals.pre_save")
+    post_save.connect(trade_saved, sender=Trade, dispatch_uid="trades.signals.post_save")
+    post_delete.connect(trade_deleted, sender=Trade, dispatch_uid="trades.signals.post_delete")
+    m2m_changed.connect(tags_changed, sender=Trade.tags.through, dispatch_uid="trades.signals.tags_changed")
+    post_delete.connect(tag_deleted, sender=Tag, dispatch_uid="trades.signals.tag_deleted")
@@ -0,0 +1,79 @@
+"""Trade statistics shared by the list sidebar and the stats page.
+
+Everything is derived from a single ``GROUP BY type, direction`` query with
+conditional aggregates: totals and both breakdowns are just different sums
+over the same handful of bucket rows.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from django.db.models import Count, Q, QuerySet, Sum
+
+from .models import Trade
+
+
+def _avg(total_sum: Any, count: int) -> Any:
+    return (Decimal(total_sum or 0) / count) if count else 0
+
+
+def summarize(buckets: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the stats dict from ``(type, direction)`` bucket rows.
+
+    Each row carries ``type``, ``direction``, ``total``, ``wins``, ``losses``,
+    ``rr_sum`` and ``risk_sum``.
+    """
+    totals = {"total": 0, "wins": 0, "losses": 0, "rr_sum": Decimal(0), "risk_sum": Decimal(0)}
+    by: Dict[str, Dict[str, Dict[str, Any]]] = {"type": {}, "direction": {}}
+    for row in buckets:
+        for key in totals:
+            totals[key] += row[key] or 0
+        for dim in ("type", "direction"):
+            acc = by[dim].setdefault(row[dim], {dim: row[dim], "total": 0, "wins": 0, "losses": 0, "rr_sum": Decimal(0)})
+            for key in ("total", "wins", "losses", "rr_sum"):
+                acc[key] += row[key] or 0
+
+    def breakdown(dim: str) -> List[Dict[str, Any]]:
+        out = []
+        for value in sorted(by[dim]):
+            acc = by[dim][value]
+            rr_sum = acc.pop("rr_sum")
+            acc["avg_rr"] = _avg(rr_sum, acc["total"])
+            out.append(acc)
+        return out
+
+    total = totals["total"]
+    return {
+        "total": total,
+        "wins": totals["wins"],
+        "losses": totals["losses"],
+        "win_rate": (totals["wins"] / total * 100) if total else 0,
+        "avg_rr": _avg(totals["rr_sum"], total),
+        "avg_risk_pct": _avg(totals["risk_sum"], total),
+        "by_type": breakdown("type"),
+        "by_direction": breakdown("direction"),
+    }
+
+
+def bucket_rows(qs: QuerySet) -> QuerySet:
+    """Per ``(type, direction)`` counts and sums for ``qs`` in one query."""
+    if qs.query.distinct:
+        # A DISTINCT over joined rows would inflate the counts
+        qs = Trade.objects.filter(pk__in=qs.values("pk"))
+    return (
+        qs.order_by()
+        .prefetch_related(None)
+        .values("type", "direction")
+        .annotate(
+            total=Count("id"),
+            wins=Count("id", filter=Q(result=Trade.Result.TAKE)),
+            losses=Count("id", filter=Q(result=Trade.Result.LOSS)),
+            rr_sum=Sum("risk_reward_ratio"),
+            risk_sum=Sum("risk_percent"),
+        )
+    )
+
+
+def trade_stats(qs: QuerySet) -> Dict[str, Any]:
+    return summarize(bucket_rows(qs))
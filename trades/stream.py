@@ -0,0 +1,155 @@
+"""Live candle updates for the crypto chart over Server-Sent Events.
+
+Each open chart subscribes to a ``(symbol, interval)`` channel. A channel
+has exactly one poller, started with its first subscriber and stopped with
+its last, which fetches the newest candles every ``POLL_SECONDS`` and
+pushes only the ones that changed to every subscriber. Upstream load is
+therefore one small request per active channel and poll period, however
+many tabs are open.
+
+Subscribers never block the poller: pending candles are merged per open
+time, so a slow client simply receives the latest state of each candle
+when it catches up. The hub is asyncio-based and needs the ASGI entry
+point (``config/asgi.py``); under WSGI the stream view answers 204 so
+browsers don't reconnect.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from . import klines
+
+logger = logging.getLogger(__name__)
+
+Rows = klines.Rows
+
+
+class Subscription:
+    def __init__(self):
+        self._pending: Dict[int, List[Any]] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, rows: Rows) -> None:
+        for row in rows:
+            self._pending[row[klines.OPEN_TIME]] = row
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Rows:
+        """Candles changed since the last call, or ``[]`` after ``timeout`` seconds."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return [pending[t] for t in sorted(pending)]
+
+
+class _Channel:
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self.latest: Dict[int, List[Any]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+
+class KlineHub:
+    def __init__(
+        self,
+        fetch: Optional[Callable[[str, str], Rows]] = None,
+        poll_seconds: float = 2.0,
+    ):
+        self.fetch = fetch
+        self.poll_seconds = poll_seconds
+        self.polls = 0
+        self._channels: Dict[Tuple[str, str], _Channel] = {}
+
+    @contextlib.contextmanager
+    def subscribe(self, symbol: str, interval: str) -> Iterator[Subscription]:
+        key = (symbol, interval)
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel()
+            channel.task = asyncio.ensure_future(self._poll(key, channel))
+        sub = Subscription()
+        if channel.latest:
+            sub.push(list(channel.latest.values()))  # catch up with the last poll
+        channel.subscribers.add(sub)
+        try:
+            yield sub
+        finally:
+            channel.subscribers.discard(sub)
+            if not channel.subscribers:
+                del self._channels[key]
+                channel.task.cancel()
+
+    async def _poll(self, key: Tuple[str, str], channel: _Channel) -> None:
+        fetch = self.fetch or klines.latest_klines
+        while True:
+            try:
+                rows = await asyncio.to_thread(fetch, *key)
+            except Exception as exc:
+                logger.warning("Kline poll for %s %s failed: %s", *key, exc)
+                rows = []
+            self.polls += 1
+            changed = [r for r in rows if channel.latest.get(r[klines.OPEN_TIME]) != r]
+            if changed:
+                for row in changed:
+                    channel.latest[row[klines.OPEN_TIME]] = row
+                for t in sorted(channel.latest)[:-len(rows)]:
+                    del channel.latest[t]
+                for sub in channel.subscribers:
+                    sub.push(changed)
+            await asyncio.sleep(self.poll_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "channels": {f"{s}:{i}": len(c.subscribers) for (s, i), c in self._channels.items()},
+            "polls": self.polls,
+        }
+
+
+def _options() -> Dict[str, Any]:
+    return getattr(settings, "TRADE_KLINES_STREAM", None) or {}
+
+
+# One hub per event loop: its tasks and events belong to that loop
+_hubs: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, KlineHub]" = weakref.WeakKeyDictionary()
+
+
+def get_hub() -> KlineHub:
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = KlineHub(poll_seconds=float(_options().get("POLL_SECONDS", 2)))
+    return hub
+
+
+@receiver(setting_changed)
+def _reset_hubs(*, setting: str, **kwargs) -> None:
+    if setting == "TRADE_KLINES_STREAM":
+        _hubs.clear()
+
+
+def _event(name: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+async def events(symbol: str, interval: str) -> AsyncIterator[bytes]:
+    """SSE body: ``candles`` events (columns format) and keep-alive comments."""
+    heartbeat = float(_options().get("HEARTBEAT_SECONDS", 15))
+    # A plain context manager: its cleanup also runs when the generator is
+    # finalized without being awaited
+    with get_hub().subscribe(symbol, interval) as sub:
+        yield b"retry: 5000\n\n"
+        while True:
+            rows = await sub.next(heartbeat)
+            yield _event("candles", klines.FORMATS["columns"](rows)) if rows else b": ping\n\n"
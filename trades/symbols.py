@@ -0,0 +1,61 @@
+"""Maintenance and search of the ``Symbol`` lookup table."""
+from __future__ import annotations
+
+from collections import Counter
+from typing import List, Optional
+
+from django.db import transaction
+from django.db.models import Count, QuerySet
+
+from . import counters
+from .models import Symbol, Trade
+
+
+def adjust_counts(deltas: Counter) -> None:
+    counters.increment(Symbol, ("name",), ("trade_count",), {(name,): (n,) for name, n in deltas.items() if name})
+
+
+def trade_changed(old: Optional[str], new: Optional[str]) -> None:
+    if old == new:
+        return
+    deltas: Counter = Counter()
+    if old:
+        deltas[old] -= 1
+    if new:
+        deltas[new] += 1
+    adjust_counts(deltas)
+
+
+def counts_for_queryset(qs: QuerySet, sign: int) -> Counter:
+    rows = qs.order_by().exclude(symbol="").values("symbol").annotate(n=Count("id"))
+    return Counter({r["symbol"]: sign * r["n"] for r in rows})
+
+
+def rebuild() -> int:
+    rows = Trade.objects.order_by().exclude(symbol="").values("symbol").annotate(n=Count("id"))
+    symbols = [Symbol(name=r["symbol"], trade_count=r["n"]) for r in rows]
+    with transaction.atomic():
+        Symbol.objects.all().delete()
+        Symbol.objects.bulk_create(symbols, batch_size=1000)
+    return len(symbols)
+
+
+def matching(query: str) -> QuerySet:
+    """Symbols containing ``query`` (case-insensitive), as a subquery-ready queryset."""
+    return Symbol.objects.filter(name__icontains=query.strip())
+
+
+def suggest(query: str, limit: int = 10) -> List[str]:
+    """Prefix matches first, then other substring matches, most traded first."""
+    query = query.strip()
+    base = Symbol.objects.filter(trade_count__gt=0).order_by("-trade_count", "name")
+    if not query:
+        return list(base.values_list("name", flat=True)[:limit])
+    names = list(base.filter(name__istartswith=query).values_list("name", flat=True)[:limit])
+    if len(names) < limit:
+        names += list(
+            base.filter(name__icontains=query)
+            .exclude(name__istartswith=query)
+            .values_list("name", flat=True)[: limit - len(names)]
+        )
+    return names
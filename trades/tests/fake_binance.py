@@ -0,0 +1,89 @@
+"""Local stand-in for Binance's ``GET /api/v3/klines`` used in tests.
+
+Candles exist from ``history_start`` up to the one containing ``now``
+(both in ms, settable by tests); the last candle is open and its close
+price moves with ``now``. Every request's query is recorded in
+``requests``.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+_UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def interval_ms(interval: str) -> int:
+    return int(interval[:-1]) * _UNIT_MS[interval[-1]]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.server.requests.append(query)
+        if url.path != "/api/v3/klines" or not query.get("symbol", "").endswith("USDT"):
+            status, body = 400, b'{"code":-1121,"msg":"Invalid symbol."}'
+        else:
+            status, body = 200, json.dumps(self.server.klines(query)).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeBinanceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, now: int = 1_700_000_000_000, history_start: int = 1_600_000_000_000):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.now = now
+        self.history_start = history_start
+        self.requests: List[Dict[str, str]] = []
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def candle(self, open_time: int, step: int) -> List[Any]:
+        close_time = open_time + step - 1
+        price = 100 + (open_time // step) % 50
+        close = price + (min(self.now, close_time) - open_time) / step  # moves while open
+        return [open_time, f"{price:.2f}", f"{price + 1:.2f}", f"{price - 1:.2f}", f"{close:.4f}", "10.0",
+                close_time, "1000.0", 7, "5.0", "500.0", "0"]
+
+    def klines(self, query: Dict[str, str]) -> List[List[Any]]:
+        step = interval_ms(query["interval"])
+        limit = min(1000, int(query.get("limit", 500)))
+        first = self.history_start - self.history_start % step
+        last = self.now - self.now % step
+        start: Optional[int] = int(query["startTime"]) if "startTime" in query else None
+        end: Optional[int] = int(query["endTime"]) if "endTime" in query else None
+        lo = first if start is None else max(first, start + (-start) % step)
+        hi = last if end is None else min(last, end - end % step)
+        if hi < lo:
+            return []
+        if start is None:
+            lo = max(lo, hi - (limit - 1) * step)
+        else:
+            hi = min(hi, lo + (limit - 1) * step)
+        return [self.candle(t, step) for t in range(lo, hi + 1, step)]
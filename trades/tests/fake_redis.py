@@ -0,0 +1,138 @@
+"""Minimal in-process RESP server standing in for Redis in tests.
+
+Implements only the commands ``django.core.cache.backends.redis`` issues
+(GET/SET with EX/PX/NX, DEL, EXISTS, MGET, EXPIRE, PERSIST, INCRBY,
+FLUSHDB, plus the CLIENT/PING/SELECT/HELLO handshake of redis-py).
+"""
+from __future__ import annotations
+
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        proto = 2
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            if args[0].upper() == b"HELLO" and len(args) > 1:
+                proto = int(args[1])
+            self.wfile.write(self.server.execute(args, null=_NULL3 if proto == 3 else _NULL2))
+            self.wfile.flush()
+
+
+# Null bulk string; RESP3 (redis-py's default) spells it differently
+_NULL2 = b"$-1\r\n"
+_NULL3 = b"_\r\n"
+
+
+def _bulk(value: Optional[bytes], null: bytes = _NULL2) -> bytes:
+    if value is None:
+        return null
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _int(value: int) -> bytes:
+    return b":%d\r\n" % value
+
+
+OK = b"+OK\r\n"
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands: List[bytes] = []
+        self.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"redis://{host}:{port}/0"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args: List[bytes], null: bytes = _NULL2) -> bytes:
+        cmd, rest = args[0].upper(), args[1:]
+        with self.lock:
+            self.commands.append(cmd)
+            if cmd in (b"CLIENT", b"SELECT"):
+                return OK
+            if cmd == b"HELLO":
+                proto = int(rest[0]) if rest else 2
+                fields = _bulk(b"server") + _bulk(b"redis") + _bulk(b"proto") + _int(proto)
+                # RESP3 replies to HELLO with a map, RESP2 with a flat array
+                return (b"%2\r\n" if proto == 3 else b"*4\r\n") + fields
+            if cmd == b"PING":
+                return b"+PONG\r\n"
+            if cmd == b"GET":
+                return _bulk(self._get(rest[0]), null)
+            if cmd == b"MGET":
+                return b"*%d\r\n" % len(rest) + b"".join(_bulk(self._get(k), null) for k in rest)
+            if cmd == b"SET":
+                key, value, opts = rest[0], rest[1], [o.upper() for o in rest[2:]]
+                expires = None
+                if b"EX" in opts:
+                    expires = time.monotonic() + int(rest[2 + opts.index(b"EX") + 1])
+                if b"PX" in opts:
+                    expires = time.monotonic() + int(rest[2 + opts.index(b"PX") + 1]) / 1000
+                if b"NX" in opts and self._get(key) is not None:
+                    return null
+                self.data[key] = (value, expires)
+                return OK
+            if cmd == b"DEL":
+                return _int(sum(self.data.pop(k, None) is not None for k in rest))
+            if cmd == b"EXISTS":
+                return _int(sum(self._get(k) is not None for k in rest))
+            if cmd in (b"EXPIRE", b"PERSIST"):
+                value = self._get(rest[0])
+                if value is None:
+                    return _int(0)
+                expires = time.monotonic() + int(rest[1]) if cmd == b"EXPIRE" else None
+                self.data[rest[0]] = (value, expires)
+                return _int(1)
+            if cmd in (b"INCRBY", b"INCR"):
+                current = int(self._get(rest[0]) or 0) + (int(rest[1]) if len(rest) > 1 else 1)
+                self.data[rest[0]] = (str(current).encode(), self.data.get(rest[0], (None, None))[1])
+                return _int(current)
+            if cmd == b"FLUSHDB":
+                self.data.clear()
+                return OK
+            return b"-ERR unknown command '%s'\r\n" % cmd
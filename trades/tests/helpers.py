@@ -0,0 +1,73 @@
+import itertools
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import override_settings
+from django.utils import timezone
+
+from trades import calendar_feed
+from trades.models import Trade
+from trades.upstream_cache import SharedCache
+
+_store_names = itertools.count()
+
+
+def private_store():
+    """A shared-cache wrapper over a fresh, empty local-memory cache."""
+    return SharedCache(LocMemCache(f"test-store-{next(_store_names)}", {}))
+
+
+class TempImageStoreMixin:
+    """Point the image store at a per-test temporary directory."""
+
+    def setUp(self):
+        super().setUp()
+        self.image_dir = tempfile.mkdtemp(prefix="trade-images-")
+        store_settings = override_settings(
+            TRADE_IMAGE_STORE={
+                "BACKEND": "trades.image_store.FileSystemImageStore",
+                "OPTIONS": {"location": self.image_dir},
+            }
+        )
+        store_settings.enable()
+        self.addCleanup(store_settings.disable)
+        self.addCleanup(shutil.rmtree, self.image_dir, ignore_errors=True)
+
+
+class OfflineCalendarMixin:
+    """Give pages an empty, already refreshed calendar cache of their own.
+
+    Pages read the calendar on every request; without this they would
+    fetch the real feed on background threads that outlive the test.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cache = calendar_feed.CalendarCache(loader=list, store=private_store())
+        cache.refresh()
+        patcher = mock.patch.object(calendar_feed, "get_calendar_cache", return_value=cache)
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
+        no_refresher = override_settings(TRADE_CALENDAR_BACKGROUND_REFRESH=False)
+        no_refresher.enable()
+        cls.addClassCleanup(no_refresher.disable)
+
+
+def make_trade(**kwargs):
+    fields = dict(
+        type=Trade.TradeType.CRYPTO,
+        symbol="BTC/USDT",
+        price=100,
+        stop_loss_price=90,
+        volume=1,
+        result=Trade.Result.TAKE,
+        direction=Trade.Direction.LONG,
+        date=timezone.now(),
+        risk_percent=1,
+        risk_reward_ratio=2,
+    )
+    fields.update(kwargs)
+    return Trade.objects.create(**fields)
@@ -0,0 +1,136 @@
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from trades import analytics
+from trades.models import Tag, Trade
+from trades.tests.helpers import make_trade
+
+START = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def reference(trades, window):
+    """Straightforward per-trade loop over ``(date, win, risk, rr)`` tuples."""
+    equity, peak, peak_at = 1.0, 1.0, trades[0][0]
+    max_dd = max_days = 0.0
+    gains = losses = r_sum = 0.0
+    for date, win, risk, rr in trades:
+        ret = rr * risk if win else -risk
+        gains += max(ret, 0)
+        losses += max(-ret, 0)
+        r_sum += rr if win else -1
+        equity *= 1 + ret / 100
+        if equity >= peak:
+            peak, peak_at = equity, date
+        else:
+            max_dd = max(max_dd, 1 - equity / peak)
+            max_days = max(max_days, (date - peak_at).total_seconds() / 86_400)
+    last = trades[-window:]
+    return {
+        "trades": len(trades),
+        "wins": sum(t[1] for t in trades),
+        "expectancy_r": r_sum / len(trades),
+        "profit_factor": gains / losses if losses else None,
+        "total_return_pct": (equity - 1) * 100,
+        "max_drawdown_pct": max_dd * 100,
+        "max_drawdown_days": max_days,
+        "rolling_win_rate": sum(t[1] for t in last) / len(last) * 100,
+    }
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        caches["upstream"].clear()
+        rng = random.Random(7)
+        self.tags = [Tag.objects.create(name=n) for n in ("breakout", "news")]
+        self.rows = []
+        for i in range(120):
+            win = rng.random() < 0.45
+            fields = dict(
+                date=START + timedelta(hours=rng.randrange(0, 24 * 90)),
+                result=Trade.Result.TAKE if win else Trade.Result.LOSS,
+                risk_percent=rng.choice([0.5, 1, 2]),
+                risk_reward_ratio=rng.choice([1, 1.5, 2, 3]),
+                type=rng.choice(list(Trade.TradeType.values)),
+                symbol=rng.choice(["BTC/USDT", "EUR/USD", "US500"]),
+                direction=rng.choice(list(Trade.Direction.values)),
+            )
+            trade = make_trade(**fields)
+            tags = [t for t in self.tags if rng.random() < 0.4]
+            trade.tags.set(tags)
+            self.rows.append((trade.pk, fields, {t.name for t in tags}))
+
+    def expected(self, keep=lambda fields, tags: True, window=20):
+        chosen = sorted((f["date"], pk, f) for pk, f, tags in self.rows if keep(f, tags))
+        return reference(
+            [(d, f["result"] == Trade.Result.TAKE, float(f["risk_percent"]), float(f["risk_reward_ratio"])) for d, _, f in chosen],
+            window,
+        )
+
+    def assertMatches(self, got, want):
+        for key, value in want.items():
+            if value is None:
+                self.assertIsNone(got[key], key)
+            else:
+                self.assertAlmostEqual(got[key], value, places=3, msg=key)
+
+    def test_summary_matches_a_plain_loop(self):
+        result = analytics.trade_analytics(Trade.objects.all())
+        self.assertMatches(result["summary"], self.expected())
+        self.assertGreater(result["summary"]["max_drawdown_trades"], 0)
+
+    def test_every_group_matches_a_plain_loop(self):
+        data = analytics.load(Trade.objects.all())
+        for row in analytics.breakdown(data, "symbol", window=5):
+            self.assertMatches(row, self.expected(lambda f, tags: f["symbol"] == row["key"], window=5))
+        for row in analytics.breakdown(data, "type"):
+            self.assertMatches(row, self.expected(lambda f, tags: f["type"] == row["key"]))
+        by_tag = analytics.breakdown(data, "tag")
+        self.assertEqual({r["key"] for r in by_tag}, {"breakout", "news"})
+        for row in by_tag:
+            self.assertMatches(row, self.expected(lambda f, tags: row["key"] in tags))
+
+    def test_curve_is_downsampled(self):
+        result = analytics.trade_analytics(Trade.objects.all(), points=50)
+        curve = result["curve"]
+        self.assertEqual(len(curve["t"]), 50)
+        self.assertEqual(curve["t"], sorted(curve["t"]))
+        full = analytics.trade_analytics(Trade.objects.all(), points=None)["curve"]
+        self.assertEqual(len(full["equity"]), 120)
+        self.assertEqual(curve["equity"][-1], full["equity"][-1])
+        self.assertAlmostEqual(max(full["drawdown"]), result["summary"]["max_drawdown_pct"], places=3)
+
+    def test_empty(self):
+        result = analytics.trade_analytics(Trade.objects.none())
+        self.assertIsNone(result["summary"])
+        self.assertEqual(result["by_tag"], [])
+
+    def test_cached_until_the_data_changes(self):
+        with mock.patch.object(analytics, "load", wraps=analytics.load) as load:
+            first = analytics.trade_analytics(Trade.objects.all())
+            self.assertEqual(analytics.trade_analytics(Trade.objects.all()), first)
+            self.assertEqual(load.call_count, 1)
+            analytics.trade_analytics(Trade.objects.filter(symbol="US500"))
+            self.assertEqual(load.call_count, 2)
+            make_trade(date=START)
+            self.assertEqual(analytics.trade_analytics(Trade.objects.all())["summary"]["trades"], 121)
+            self.assertEqual(load.call_count, 3)
+
+    def test_endpoint_applies_list_filters(self):
+        url = reverse("trades:stats_analytics")
+        data = self.client.get(url, {"symbol": "eur", "tags": [self.tags[1].pk], "window": 10}).json()
+        self.assertMatches(
+            data["summary"], self.expected(lambda f, tags: f["symbol"] == "EUR/USD" and "news" in tags, window=10)
+        )
+        self.assertEqual([r["key"] for r in data["by_symbol"]], ["EUR/USD"])
+        self.assertEqual(self.client.get(url, {"window": "x"}).status_code, 400)
+
+    def test_stats_page_has_the_analytics_section(self):
+        response = self.client.get(reverse("trades:stats"))
+        self.assertContains(response, reverse("trades:stats_analytics"))
+        self.assertContains(response, 'data-dim="tag"')
@@ -0,0 +1,336 @@
+import json
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from trades import calendar_feed
+from trades.calendar_feed import FEED_ERROR, LOADING_ERROR, CalendarCache, CalendarError
+from trades.tests.helpers import private_store
+
+GROUPS = [{"label": "2025-01-06", "events": [{"time": "13:30", "currency": "USD", "event": "CPI", "impact": "High", "url": ""}]}]
+
+
+def shown(result):
+    """What pages get from ``CalendarCache.get``, minus the index."""
+    return {"calendar": result["calendar"], "error": result["error"]}
+
+
+def settle(cache):
+    """Let the background refresh started by ``get()`` finish; False on timeout."""
+    with cache._lock:
+        pending = cache._inflight
+    return pending is None or pending.wait(5)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CalendarCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.calls = 0
+        self.results = []
+        # Every cache here has a fake loader; the real feed must never be fetched
+        fetch = mock.patch.object(calendar_feed, "fetch_ff_calendar_body", side_effect=AssertionError("feed fetched"))
+        fetch.start()
+        self.addCleanup(fetch.stop)
+
+    def loader(self):
+        self.calls += 1
+        result = self.results.pop(0) if self.results else GROUPS
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def cache(self, **kwargs):
+        kwargs.setdefault("store", private_store())
+        cache = CalendarCache(loader=self.loader, ttl=600, retry=30, max_retry=120, clock=self.clock, **kwargs)
+        # No refresh started by get() outlives the test
+        self.addCleanup(self.settle, cache)
+        return cache
+
+    def settle(self, cache):
+        self.assertTrue(settle(cache))
+
+    def test_cold_get_does_not_block(self):
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return GROUPS
+
+        cache = CalendarCache(loader=slow, clock=self.clock, store=private_store())
+        self.addCleanup(self.settle, cache)
+        self.addCleanup(release.set)
+        started = time.monotonic()
+        res = cache.get()
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(shown(res), {"calendar": [], "error": LOADING_ERROR})
+        release.set()
+        self.settle(cache)
+        self.assertEqual(cache.get()["calendar"], GROUPS)
+
+    def test_wait_returns_fresh_data_on_cold_cache(self):
+        self.assertEqual(shown(self.cache().get(wait=5)), {"calendar": GROUPS, "error": None})
+
+    def test_single_flight_under_concurrency(self):
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return GROUPS
+
+        cache = CalendarCache(loader=slow, clock=self.clock, store=private_store())
+        self.addCleanup(self.settle, cache)
+        self.addCleanup(release.set)
+        threads = [threading.Thread(target=cache.get) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        release.set()
+        self.settle(cache)
+        self.assertEqual(len(calls), 1)
+
+    def test_serves_stale_while_revalidating(self):
+        cache = self.cache()
+        cache.refresh()
+        self.clock.now += 601
+        fresher = [{"label": "2025-01-07", "events": []}]
+        self.results = [fresher]
+        self.assertEqual(cache.get()["calendar"], GROUPS)
+        self.settle(cache)
+        self.assertEqual(cache.get()["calendar"], fresher)
+        self.assertEqual(self.calls, 2)
+
+    def test_failure_keeps_stale_data_and_backs_off(self):
+        cache = self.cache()
+        cache.refresh()
+        self.clock.now += 601
+        self.results = [CalendarError(FEED_ERROR)] * 3
+        self.assertFalse(cache.refresh())
+        self.assertEqual(shown(cache.get()), {"calendar": GROUPS, "error": FEED_ERROR})
+        self.assertEqual(self.calls, 2)
+
+        # No retry inside the 30s backoff, however many requests arrive
+        self.clock.now += 29
+        for _ in range(5):
+            cache.get()
+        self.assertEqual(self.calls, 2)
+
+        self.clock.now += 1
+        cache.get()
+        self.settle(cache)
+        self.assertEqual(self.calls, 3)
+        # Second failure doubles the backoff
+        self.clock.now += 59
+        cache.get()
+        self.assertEqual(self.calls, 3)
+        self.clock.now += 1
+        cache.get()
+        self.settle(cache)
+        self.assertEqual(self.calls, 4)
+
+        # Success clears the error and the backoff
+        self.clock.now += 120
+        cache.get()
+        self.settle(cache)
+        self.assertEqual(shown(cache.get()), {"calendar": GROUPS, "error": None})
+
+    def test_unexpected_errors_are_reported_generically(self):
+        self.results = [ValueError("boom")]
+        cache = self.cache()
+        self.assertEqual(shown(cache.get(wait=5)), {"calendar": [], "error": FEED_ERROR})
+
+    def test_processes_share_state_and_refresh_once(self):
+        store = private_store()
+        first, second = self.cache(store=store), self.cache(store=store)
+        # Simulate another worker holding the refresh lock
+        store.add(CalendarCache.lock_key, 0, 60)
+        self.assertEqual(shown(first.get()), {"calendar": [], "error": LOADING_ERROR})
+        self.assertFalse(first.refresh())
+        self.assertEqual(self.calls, 0)
+        store.delete(CalendarCache.lock_key)
+
+        self.assertTrue(second.refresh())
+        self.assertEqual(first.get()["calendar"], GROUPS)
+        self.assertEqual(self.calls, 1)
+
+    def test_warm_reads_skip_the_state_and_follow_other_writers(self):
+        store = private_store()
+        reader, writer = self.cache(store=store), self.cache(store=store)
+        writer.refresh()
+        # The stored index refers to events by position instead of copying them
+        self.assertEqual(store.get(CalendarCache.state_key)["index"]["order"], [0])
+        self.assertEqual(reader.get()["index"]["events"][0]["date"], "2025-01-06")
+
+        with mock.patch.object(store, "get", wraps=store.get) as get:
+            self.assertEqual(reader.get()["calendar"], GROUPS)
+        self.assertEqual([c.args[0] for c in get.call_args_list], [CalendarCache.stamp_key])
+
+        fresher = [{"label": "2025-01-07", "events": []}]
+        self.results = [fresher]
+        self.clock.now += 601
+        writer.refresh()
+        self.assertEqual(reader.get()["calendar"], fresher)
+
+    def test_force_refresh_respects_backoff(self):
+        self.results = [CalendarError(FEED_ERROR)]
+        cache = self.cache()
+        cache.refresh()
+        cache.get(force_refresh=True, wait=5)
+        self.assertEqual(self.calls, 1)
+
+
+FEED = [
+    {"title": "CPI m/m", "country": "USD", "date": "2025-01-07T08:30:00-05:00", "impact": "High", "forecast": "0.3%", "previous": 0.2, "id": 7},
+    {"title": "Bank Holiday", "country": "JPY", "date": "2025-01-06", "impact": "Holiday"},
+    {"title": "PMI", "currency": "EUR", "timestamp": 1736150400, "impact": 2, "actual": "", "actualValue": "51.2"},
+    {"title": "", "country": "GBP", "date": "2025-01-06T09:00:00+00:00"},
+    {"title": "Speech", "country": "AUD", "date": "soon"},
+    {"event": "Retail Sales", "country": "CAD", "date": "2025-01-06 13:30:00", "impact": "low"},
+]
+
+
+class CalendarParserTests(SimpleTestCase):
+    def setUp(self):
+        calendar_feed._parsed.clear()
+
+    def test_typed_events(self):
+        events = calendar_feed.parse_ff_events(FEED)
+        self.assertEqual(len(events), 5)
+        cpi = events[0]
+        self.assertEqual(cpi.when.utcoffset().total_seconds(), -5 * 3600)
+        self.assertEqual((cpi.time, cpi.date_label, cpi.impact), ("08:30", "2025-01-07", "High"))
+        self.assertEqual((cpi.forecast, cpi.previous), ("0.3%", "0.2"))
+        self.assertEqual(cpi.url, "https://www.forexfactory.com/calendar?event=7")
+        holiday = events[1]
+        self.assertTrue(holiday.all_day)
+        self.assertEqual(holiday.time, "—")
+        self.assertEqual((events[2].time, events[2].impact, events[2].actual), ("08:00", "Medium", "51.2"))
+        self.assertIsNone(events[3].when)
+        self.assertFalse(hasattr(cpi, "__dict__"))
+
+    def test_str_subclasses_and_unhashable_impacts(self):
+        class Text(str):
+            pass
+
+        events = calendar_feed.parse_ff_events([
+            {"title": "GDP", "country": "USD", "date": "2025-01-07", "impact": Text(" High "), "forecast": Text(" 2.1% ")},
+            {"title": "NFP", "country": "USD", "date": "2025-01-07", "impact": ["high"]},
+        ])
+        self.assertEqual((events[0].impact, events[0].forecast), ("High", "2.1%"))
+        self.assertEqual(events[1].impact, "High")
+
+    def test_groups_sorted_by_date_and_time(self):
+        groups = calendar_feed.parse_ff_calendar_json(FEED)
+        self.assertEqual([g["label"] for g in groups], ["2025-01-06", "2025-01-07", "Unknown Date"])
+        self.assertEqual([e["event"] for e in groups[0]["events"]], ["PMI", "Retail Sales", "Bank Holiday"])
+        self.assertEqual(set(groups[0]["events"][0]), {"ts", "time", "currency", "event", "impact", "actual", "forecast", "previous", "url"})
+
+    def test_payload_parsed_once_per_hash(self):
+        body = json.dumps(FEED).encode()
+        with mock.patch.object(calendar_feed, "parse_ff_events", wraps=calendar_feed.parse_ff_events) as parse:
+            first = calendar_feed.parse_ff_calendar_payload(body)
+            self.assertIs(calendar_feed.parse_ff_calendar_payload(bytes(body)), first)
+            self.assertEqual(parse.call_count, 1)
+            calendar_feed.parse_ff_calendar_payload(json.dumps(FEED[:2]).encode())
+            self.assertEqual(parse.call_count, 2)
+
+    def test_invalid_payload(self):
+        with self.assertRaisesMessage(CalendarError, calendar_feed.PARSE_ERROR):
+            calendar_feed.parse_ff_calendar_payload(b"<html>")
+
+
+class CalendarIndexTests(SimpleTestCase):
+    def setUp(self):
+        groups = calendar_feed.parse_ff_calendar_json(FEED)
+        self.index = calendar_feed.resolve_index(groups, calendar_feed.build_index(groups))
+
+    def names(self, **kwargs):
+        return [e["event"] for e in calendar_feed.select_events(self.index, **kwargs)]
+
+    def test_events_in_time_order_undated_last(self):
+        # Date-only entries count from midnight (UTC when no offset is given)
+        self.assertEqual(self.names(), ["Bank Holiday", "PMI", "Retail Sales", "CPI m/m", "Speech"])
+        self.assertEqual(self.index["times"], sorted(self.index["times"]))
+        self.assertEqual(len(self.index["times"]), 4)
+
+    def test_filters(self):
+        self.assertEqual(self.names(impacts=["High"]), ["CPI m/m"])
+        self.assertEqual(self.names(currencies=["EUR", "USD"]), ["PMI", "CPI m/m"])
+        self.assertEqual(self.names(currencies=["EUR", "USD"], impacts=["Medium"]), ["PMI"])
+        self.assertEqual(self.names(currencies=["CHF"]), [])
+        self.assertEqual(calendar_feed.impact_choices(self.index), ["High", "Medium", "Low", "Holiday"])
+
+    def test_since_and_limit(self):
+        after_pmi = self.index["times"][1] + 1
+        self.assertEqual(self.names(since=after_pmi), ["Retail Sales", "CPI m/m", "Speech"])
+        self.assertEqual(self.names(since=after_pmi, limit=2), ["Retail Sales", "CPI m/m"])
+        self.assertEqual(self.names(since=2e9), ["Speech"])
+
+    def test_regroup(self):
+        groups = calendar_feed.regroup(calendar_feed.select_events(self.index, currencies=["EUR", "USD"]))
+        self.assertEqual([(g["label"], len(g["events"])) for g in groups], [("2025-01-06", 1), ("2025-01-07", 1)])
+
+
+@override_settings(TRADE_CALENDAR_BACKGROUND_REFRESH=False)
+class CalendarViewTests(TestCase):
+    def test_trade_list_never_waits_on_the_feed(self):
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return GROUPS
+
+        cache = CalendarCache(loader=slow, store=private_store())
+        self.addCleanup(settle, cache)
+        self.addCleanup(release.set)
+        with mock.patch.object(calendar_feed, "get_calendar_cache", return_value=cache):
+            started = time.monotonic()
+            response = self.client.get(reverse("trades:list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(response.context["high_impact_events"], [])
+
+    def test_high_impact_events_come_from_the_cache(self):
+        cache = CalendarCache(loader=lambda: GROUPS, store=private_store())
+        cache.refresh()
+        with mock.patch.object(calendar_feed, "get_calendar_cache", return_value=cache):
+            response = self.client.get(reverse("trades:list"))
+        self.assertEqual([e["event"] for e in response.context["high_impact_events"]], ["CPI"])
+
+    def test_trade_list_shows_upcoming_events_only(self):
+        now = time.time()
+        feed = [
+            {"title": "Past", "country": "USD", "timestamp": int(now) - 3600, "impact": "High"},
+            {"title": "Soon", "country": "USD", "timestamp": int(now) + 3600, "impact": "High"},
+            {"title": "Minor", "country": "USD", "timestamp": int(now) + 7200, "impact": "Low"},
+        ]
+        cache = CalendarCache(loader=lambda: calendar_feed.parse_ff_calendar_json(feed), store=private_store())
+        cache.refresh()
+        with mock.patch.object(calendar_feed, "get_calendar_cache", return_value=cache):
+            response = self.client.get(reverse("trades:list"))
+        self.assertEqual([e["event"] for e in response.context["high_impact_events"]], ["Soon"])
+
+    def test_news_filters(self):
+        cache = CalendarCache(loader=lambda: calendar_feed.parse_ff_calendar_json(FEED), store=private_store())
+        cache.refresh()
+        with mock.patch.object(calendar_feed, "get_calendar_cache", return_value=cache):
+            response = self.client.get(reverse("trades:news"), {"currency": "usd"})
+            unfiltered = self.client.get(reverse("trades:news"))
+        self.assertEqual([[e["event"] for e in g["events"]] for g in response.context["calendar"]], [["CPI m/m"]])
+        self.assertEqual(response.context["selected_currencies"], ["USD"])
+        self.assertEqual(response.context["currencies"], ["AUD", "CAD", "EUR", "JPY", "USD"])
+        self.assertEqual(len(unfiltered.context["calendar"]), 3)
+        self.assertContains(response, '<option value="USD" selected>')
@@ -0,0 +1,136 @@
+import asyncio
+import csv
+import io
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.core import signals
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from trades import export, importer
+from trades.models import Tag, Trade
+from trades.tests.helpers import OfflineCalendarMixin, make_trade
+
+
+def read_csv(body):
+    return list(csv.DictReader(io.StringIO(body.decode())))
+
+
+class ExportTests(OfflineCalendarMixin, TestCase):
+    url = reverse("trades:export")
+
+    def setUp(self):
+        self.news = Tag.objects.create(name="news")
+        self.breakout = Tag.objects.create(name="breakout")
+        for i in range(5):
+            t = make_trade(symbol="BTC/USDT" if i % 2 else "EUR/USD", type=Trade.TradeType.CRYPTO if i % 2 else Trade.TradeType.FOREX, price=Decimal("100.125"))
+            t.tags.set([self.news, self.breakout] if i % 2 else [])
+
+    def test_csv_applies_list_filters(self):
+        response = self.client.get(self.url, {"type": "crypto", "tags": [self.news.pk]})
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="trades.csv"')
+        rows = read_csv(b"".join(response.streaming_content))
+        listed = self.client.get(reverse("trades:list"), {"type": "crypto", "tags": [self.news.pk]}).context["trades"]
+        self.assertEqual([int(r["id"]) for r in rows], [t.pk for t in listed])
+        self.assertEqual(rows[0]["tags"], "breakout, news")
+        self.assertEqual(Decimal(rows[0]["price"]), Decimal("100.125"))
+        self.assertNotIn("large_image_sha256", rows[0])
+
+    def test_reads_in_chunks_with_one_tag_query_each(self):
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(export.csv_chunks(Trade.objects.all(), chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(len(queries), 4)  # the streamed select plus one tag query per chunk
+        self.assertNotIn("image", queries[0]["sql"])
+        self.assertEqual(len(read_csv(b"".join(chunks))), 5)
+
+    def test_empty_export_has_a_header(self):
+        body = b"".join(export.csv_chunks(Trade.objects.none()))
+        self.assertEqual(body.decode().strip().split(","), list(export.COLUMNS))
+
+    def test_csv_round_trips_through_the_importer(self):
+        body = b"".join(export.csv_chunks(Trade.objects.all()))
+        Trade.objects.all().delete()
+        result = importer.import_file(io.BytesIO(body), "csv")
+        self.assertEqual((result.created, result.error_count), (5, 0))
+        self.assertEqual(Trade.objects.filter(tags=self.news).count(), 2)
+
+    async def test_asgi_streams_an_async_iterator(self):
+        response = await self.async_client.get(self.url, {"type": "crypto"})
+        self.assertTrue(response.is_async)
+        rows = read_csv(b"".join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual(len(rows), 2)
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(self.url, {"format": "xls"}).status_code, 400)
+
+    @skipUnless(export.pa is not None, "pyarrow is not installed")
+    def test_parquet_and_arrow(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        response = self.client.get(self.url, {"format": "parquet", "symbol": "btc"})
+        table = pq.read_table(pa.BufferReader(b"".join(response.streaming_content)))
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.column("price").to_pylist(), [Decimal("100.125")] * 2)
+        self.assertEqual(table.column("tags").to_pylist(), [["breakout", "news"]] * 2)
+
+        chunks = list(export.export_chunks("arrow", Trade.objects.all(), chunk_size=2))
+        reader = pa.ipc.open_stream(b"".join(chunks))
+        self.assertEqual([b.num_rows for b in reader], [2, 2, 1])
+
+    def test_command(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+        out = io.StringIO()
+        call_command("export_trades", "-o", path, "--type", "forex", stdout=out)
+        self.assertIn("Wrote", out.getvalue())
+        with open(path, "rb") as f:
+            rows = read_csv(f.read())
+        self.assertEqual({r["type"] for r in rows}, {"forex"})
+        self.assertEqual(len(rows), 3)
+
+
+class ExportAsgiStreamingTests(SimpleTestCase):
+    def setUp(self):
+        # As the test client does: the handler must not close the test database connection
+        for signal in (signals.request_started, signals.request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    async def test_first_chunk_is_sent_before_the_rest_is_produced(self):
+        first_sent = threading.Event()
+        produced = []
+
+        def chunks(fmt, qs):
+            produced.append(b"a")
+            yield b"a"
+            # Only reachable if "a" went out without waiting for the whole export
+            self.assertTrue(first_sent.wait(5))
+            produced.append(b"b")
+            yield b"b"
+
+        scope = {"type": "http", "method": "GET", "path": "/export/", "query_string": b"format=csv", "headers": [(b"host", b"testserver")]}
+        inbox = asyncio.Queue()
+        inbox.put_nowait({"type": "http.request", "body": b""})
+        bodies = []
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                bodies.append(message["body"])
+                if len(bodies) == 1:
+                    self.assertEqual(produced, [b"a"])
+                first_sent.set()
+
+        with mock.patch("trades.views.export.export_chunks", chunks):
+            await asyncio.wait_for(ASGIHandler()(scope, inbox.get, send), 10)
+        self.assertEqual(bodies, [b"a", b"b"])
@@ -7,36 +7,66 @@ from django.utils import timezone
 from PIL import Image
 
 from trades.forms import TradeForm
+from trades.image_store import get_image_store
 from trades.models import Tag, Trade
+from trades.tests.helpers import TempImageStoreMixin
+from trades.thumbnails import schedule_thumbnail
 
 
-class TradeFormTests(TestCase):
-    def _create_image(self):
+class TradeFormTests(TempImageStoreMixin, TestCase):
+    def _create_image(self, color="black"):
         buffer = io.BytesIO()
-        Image.new("RGB", (1, 1)).save(buffer, format="PNG")
+        Image.new("RGB", (1, 1), color).save(buffer, format="PNG")
         return buffer.getvalue()
 
+    def _form_data(self, **extra):
+        data = {
+            "type": Trade.TradeType.CRYPTO,
+            "symbol": "ETH/USDT",
+            "price": 1000,
+            "stop_loss_price": 900,
+            "volume": 1,
+            "result": Trade.Result.TAKE,
+            "direction": Trade.Direction.LONG,
+            "date": timezone.now().strftime("%Y-%m-%dT%H:%M"),
+            "risk_percent": 1,
+            "risk_reward_ratio": 2,
+        }
+        data.update(extra)
+        return data
+
     def test_new_tags_and_image_saved(self):
         img_bytes = self._create_image()
         uploaded = SimpleUploadedFile("test.png", img_bytes, content_type="image/png")
-        form = TradeForm(
-            data={
-                "type": Trade.TradeType.CRYPTO,
-                "symbol": "ETH/USDT",
-                "price": 1000,
-                "stop_loss_price": 900,
-                "volume": 1,
-                "result": Trade.Result.TAKE,
-                "direction": Trade.Direction.LONG,
-                "date": timezone.now().strftime("%Y-%m-%dT%H:%M"),
-                "risk_percent": 1,
-                "risk_reward_ratio": 2,
-                "new_tags": "breakout",
-            },
-            files={"large_timeframe_image": uploaded},
-        )
+        form = TradeForm(data=self._form_data(new_tags="breakout"), files={"large_timeframe_image": uploaded})
         self.assertTrue(form.is_valid(), form.errors)
         trade = form.save()
         self.assertTrue(Tag.objects.filter(name="breakout").exists())
-        self.assertIsNotNone(trade.large_image)
+        self.assertIsNotNone(trade.large_image_sha256)
+        with get_image_store().open(trade.large_image_sha256) as fh:
+            self.assertEqual(fh.read(), img_bytes)
+        self.assertEqual(trade.large_image_size, len(img_bytes))
+        self.assertEqual(trade.medium_image_size, 0)
         self.assertTrue(trade.tags.filter(name="breakout").exists())
+
+    def test_replacing_image_keeps_shared_thumbnail(self):
+        store = get_image_store()
+        first = SimpleUploadedFile("a.png", self._create_image("black"), content_type="image/png")
+        form = TradeForm(data=self._form_data(), files={"large_timeframe_image": first})
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            trade = form.save()
+        old_digest = trade.large_image_sha256
+        schedule_thumbnail(old_digest).result(timeout=10)
+        store.open_variant(old_digest, "thumb").close()
+
+        second = SimpleUploadedFile("b.png", self._create_image("white"), content_type="image/png")
+        form = TradeForm(data=self._form_data(), files={"large_timeframe_image": second}, instance=trade)
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            trade = form.save()
+        self.assertNotEqual(trade.large_image_sha256, old_digest)
+        # Other trades may share the old image; prune_trade_images removes it once unreferenced
+        store.open_variant(old_digest, "thumb").close()
+        schedule_thumbnail(trade.large_image_sha256).result(timeout=10)
+        store.open_variant(trade.large_image_sha256, "thumb").close()
@@ -0,0 +1,119 @@
+import io
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from trades import heatmap, importer
+from trades.models import Trade, TradeHeatmapCell
+from trades.tests.helpers import make_trade
+
+# Monday 2024-01-01 22:30 UTC is Tuesday 01:30 in Moscow (UTC+3)
+MONDAY_LATE = datetime(2024, 1, 1, 22, 30, tzinfo=dt_timezone.utc)
+
+
+def stored_cells():
+    return {(c.type, c.weekday, c.hour): [c.count, c.wins, c.r_sum] for c in TradeHeatmapCell.objects.all()}
+
+
+@override_settings(TIME_ZONE="Europe/Moscow")
+class HeatmapCubeTests(TestCase):
+    def assertCubeMatchesLive(self):
+        self.assertEqual(stored_cells(), heatmap.deltas_for_queryset(Trade.objects.all(), +1))
+
+    def test_incremental_updates_match_live_grouping(self):
+        rng = random.Random(7)
+        trades = [
+            make_trade(
+                type=rng.choice(Trade.TradeType.values),
+                result=rng.choice(Trade.Result.values),
+                date=MONDAY_LATE + timedelta(hours=rng.randint(0, 24 * 14)),
+                risk_reward_ratio=Decimal(rng.randint(50, 400)) / 100,
+            )
+            for _ in range(60)
+        ]
+        self.assertCubeMatchesLive()
+
+        for trade in rng.sample(trades, 15):
+            trade.result = rng.choice(Trade.Result.values)
+            trade.type = rng.choice(Trade.TradeType.values)
+            trade.date += timedelta(hours=rng.randint(1, 30))
+            trade.save()
+        self.assertCubeMatchesLive()
+
+        trades[0].delete()
+        self.client.post(reverse("trades:bulk_delete"), {"ids": [t.pk for t in trades[1:20]]})
+        importer.import_rows([{
+            "type": "forex", "symbol": "EURUSD", "direction": "short", "result": "loss", "price": "1.1",
+            "stop_loss_price": "1.2", "volume": "1", "date": "2024-01-03 09:15", "risk_percent": "1",
+            "risk_reward_ratio": "2",
+        }])
+        self.assertEqual(Trade.objects.count(), 41)
+        self.assertCubeMatchesLive()
+
+        before = stored_cells()
+        heatmap.rebuild()
+        self.assertEqual(stored_cells(), before)
+        call_command("rebuild_trade_stats", "--check", stdout=io.StringIO())
+
+    def test_cells_use_local_time(self):
+        make_trade(date=MONDAY_LATE, risk_reward_ratio=3)
+        make_trade(date=MONDAY_LATE, result=Trade.Result.LOSS)
+        make_trade(date=MONDAY_LATE, type=Trade.TradeType.FOREX, risk_reward_ratio="1.5")
+        self.assertEqual(set(TradeHeatmapCell.objects.values_list("weekday", "hour")), {(2, 1)})
+
+        cube = heatmap.cube()
+        self.assertEqual(cube["trades"][1][1], 3)
+        self.assertEqual((cube["win_rate"][1][1], cube["avg_r"][1][1]), (66.67, 1.17))
+        self.assertIsNone(cube["win_rate"][0][22])
+        crypto = heatmap.cube(Trade.TradeType.CRYPTO)
+        self.assertEqual((crypto["trades"][1][1], crypto["win_rate"][1][1], crypto["avg_r"][1][1]), (2, 50.0, 1.0))
+
+    def test_empty_cells_are_removed(self):
+        trade = make_trade()
+        self.assertEqual(TradeHeatmapCell.objects.count(), 1)
+        trade.delete()
+        self.assertEqual(TradeHeatmapCell.objects.count(), 0)
+
+    def test_inserts_never_delete_derived_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            make_trade()
+        self.assertFalse([q for q in queries if q["sql"].startswith("DELETE")])
+        trade = Trade.objects.get()
+        with CaptureQueriesContext(connection) as queries:
+            trade.delete()
+        # Rollup, heatmap and symbols each delete just the emptied row, by key
+        deletes = [q["sql"] for q in queries if q["sql"].startswith("DELETE") and "<= 0" in q["sql"]]
+        self.assertEqual(len(deletes), 3)
+        self.assertTrue(all(" AND " in sql for sql in deletes), deletes)
+        self.assertFalse(TradeHeatmapCell.objects.exists())
+
+    def test_check_detects_drift(self):
+        make_trade()
+        TradeHeatmapCell.objects.update(wins=0)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_trade_stats", "--check", stdout=io.StringIO())
+        call_command("rebuild_trade_stats", stdout=io.StringIO())
+        self.assertCubeMatchesLive()
+
+
+class HeatmapViewTests(TestCase):
+    def test_endpoint_reads_the_cube(self):
+        make_trade(date=MONDAY_LATE)
+        make_trade(date=MONDAY_LATE, type=Trade.TradeType.INDEX, result=Trade.Result.LOSS)
+        url = reverse("trades:stats_heatmap")
+        with self.assertNumQueries(1):
+            data = self.client.get(url).json()
+        self.assertEqual((len(data["trades"]), len(data["trades"][0])), (7, 24))
+        self.assertEqual((data["trades"][0][22], data["win_rate"][0][22], data["avg_r"][0][22]), (2, 50.0, 0.5))
+        self.assertEqual(self.client.get(url, {"type": "index"}).json()["avg_r"][0][22], -1.0)
+        self.assertEqual(self.client.get(url, {"type": "stocks"}).status_code, 400)
+
+    def test_stats_page_links_the_heatmap(self):
+        response = self.client.get(reverse("trades:stats"))
+        self.assertContains(response, reverse("trades:stats_heatmap"))
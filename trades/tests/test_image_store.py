@@ -0,0 +1,46 @@
+import io
+import os
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from trades.image_store import get_image_store
+from trades.models import Trade
+from trades.tests.helpers import TempImageStoreMixin
+
+
+class FileSystemImageStoreTests(TempImageStoreMixin, TestCase):
+    def test_identical_content_is_stored_once(self):
+        store = get_image_store()
+        first = store.save(b"screenshot")
+        second = store.save(io.BytesIO(b"screenshot"))
+        self.assertEqual(first, second)
+        self.assertEqual(list(store.digests()), [first[0]])
+        self.assertTrue(store.path(first[0]).is_relative_to(self.image_dir))
+
+    def test_no_temp_files_left_behind(self):
+        get_image_store().save(b"abc")
+        leftovers = [n for _, _, files in os.walk(self.image_dir) for n in files if n.startswith(".upload-")]
+        self.assertEqual(leftovers, [])
+
+    def test_prune_keeps_referenced_images(self):
+        store = get_image_store()
+        kept, _ = store.save(b"kept")
+        orphan, _ = store.save(b"orphan")
+        Trade.objects.create(
+            type=Trade.TradeType.CRYPTO,
+            symbol="BTC/USDT",
+            price=1,
+            stop_loss_price=1,
+            volume=1,
+            result=Trade.Result.TAKE,
+            direction=Trade.Direction.LONG,
+            date=timezone.now(),
+            risk_percent=1,
+            risk_reward_ratio=2,
+            short_image_sha256=kept,
+        )
+        call_command("prune_trade_images", stdout=io.StringIO())
+        self.assertTrue(store.exists(kept))
+        self.assertFalse(store.exists(orphan))
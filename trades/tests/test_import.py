@@ -0,0 +1,133 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from trades import heatmap, importer, rollups
+from trades.models import Symbol, Tag, Trade, TradeHeatmapCell
+from trades.stats import summarize, trade_stats
+from trades.tests.helpers import make_trade
+
+CSV = """Type,Symbol,Direction,Result,Price,Stop Loss Price,Volume,Date,Risk Percent,Risk Reward Ratio,Tags,Comment
+crypto,BTC/USDT,long,take,100,90,1,2024-03-01T10:00:00Z,1,2,"breakout, news",first
+forex,EUR/USD,short,loss,1.1,1.2,1000,2024-03-02 09:30,0.5,1.5,news,
+crypto,ETH/USDT,sideways,take,10,9,1,2024-03-03,1,2,,bad direction
+"""
+
+
+def row(**kwargs):
+    data = dict(
+        type="crypto", symbol="BTC/USDT", direction="long", result="take", price="100", stop_loss_price="90",
+        volume="1", date="2024-03-01T10:00:00Z", risk_percent="1", risk_reward_ratio="2",
+    )
+    data.update(kwargs)
+    return data
+
+
+class ImporterTests(TestCase):
+    def assertDerivedTablesInSync(self):
+        self.assertEqual(summarize(rollups.bucket_rows()), trade_stats(Trade.objects.all()))
+        counts = {}
+        for symbol in Trade.objects.exclude(symbol="").values_list("symbol", flat=True):
+            counts[symbol] = counts.get(symbol, 0) + 1
+        self.assertEqual(dict(Symbol.objects.values_list("name", "trade_count")), counts)
+        cells = {(c.type, c.weekday, c.hour): [c.count, c.wins, c.r_sum] for c in TradeHeatmapCell.objects.all()}
+        self.assertEqual(cells, heatmap.deltas_for_queryset(Trade.objects.all(), +1))
+
+    def test_csv_rows_are_validated_like_the_form(self):
+        result = importer.import_file(io.BytesIO(CSV.encode()), "csv")
+        self.assertEqual((result.rows, result.created, result.error_count), (3, 2, 1))
+        self.assertEqual(result.errors[0][0], 3)
+        self.assertIn("direction", result.errors[0][1])
+        btc = Trade.objects.get(symbol="BTC/USDT")
+        self.assertEqual(btc.comment, "first")
+        self.assertEqual(sorted(btc.tags.values_list("name", flat=True)), ["breakout", "news"])
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertDerivedTablesInSync()
+
+    def test_json_array_is_read_incrementally(self):
+        rows = [row(symbol=f"S{i}", tags=["a", "b"] if i % 2 else []) for i in range(50)]
+        stream = io.BytesIO(json.dumps(rows, indent=1).encode())
+        self.assertEqual(list(importer.read_json(stream, read_size=64)), rows)
+        stream.seek(0)
+        result = importer.import_file(stream, "json", chunk_size=7)
+        self.assertEqual(result.created, 50)
+        self.assertEqual(Trade.tags.through.objects.count(), 50)
+        self.assertDerivedTablesInSync()
+
+    def test_malformed_json(self):
+        for body in (b'{"type": "crypto"}', b'[{"type": "crypto"}', b"[1, }"):
+            with self.assertRaises(ValueError):
+                list(importer.read_json(io.BytesIO(body), read_size=4))
+        self.assertEqual(list(importer.read_json(io.BytesIO(b" [ ] "))), [])
+
+    def test_malformed_json_fails_without_reading_the_rest(self):
+        rows = [row(symbol=f"S{i}") for i in range(5000)]
+        body = json.dumps(rows).encode().replace(b'"S3"', b'"S3" "oops"', 1)
+        stream = io.BytesIO(body)
+        with self.assertRaises(ValueError):
+            list(importer.read_json(stream, read_size=1024))
+        self.assertLess(stream.tell(), 4096)
+        # Values cut anywhere by the buffer boundary are still read whole
+        body = json.dumps([row(price=-1.5e-7, comment="caf\u00e9 \"x\"")] * 3).encode()
+        for size in range(1, 40):
+            self.assertEqual(len(list(importer.read_json(io.BytesIO(body), read_size=size))), 3)
+
+    def test_json_lines_and_non_object_rows(self):
+        body = "\n".join([json.dumps(row()), "", "[1, 2]", json.dumps(row(price="abc"))]).encode()
+        result = importer.import_file(io.BytesIO(body), "jsonl")
+        self.assertEqual((result.rows, result.created), (3, 1))
+        self.assertEqual([number for number, _ in result.errors], [2, 3])
+
+    def test_queries_scale_with_chunks_not_rows(self):
+        make_trade(symbol="BTC/USDT")
+        Tag.objects.create(name="old")
+        rows = [row(tags=f"old, new{i % 3}") for i in range(100)]
+        with CaptureQueriesContext(connection) as queries:
+            result = importer.import_rows(iter(rows), chunk_size=50)
+        self.assertEqual(result.created, 100)
+        self.assertLess(len(queries), 50)
+        self.assertEqual(Tag.objects.count(), 4)
+        self.assertEqual(Trade.objects.filter(tags__name="old").count(), 100)
+        self.assertDerivedTablesInSync()
+
+    def test_dry_run_inserts_nothing(self):
+        result = importer.import_rows([row(), row(type="stock")], dry_run=True)
+        self.assertEqual((result.created, result.error_count), (1, 1))
+        self.assertFalse(Trade.objects.exists())
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(CSV)
+        self.addCleanup(os.unlink, f.name)
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_trades", f.name, "--chunk-size", "1", stdout=out, stderr=err)
+        self.assertIn("Imported 2 of 3 row(s), 1 invalid", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.assertIn("Row 3:", err.getvalue())
+        self.assertEqual(Trade.objects.count(), 2)
+
+    def test_upload_view(self):
+        self.assertEqual(self.client.get(reverse("trades:import")).status_code, 200)
+        upload = SimpleUploadedFile("export.csv", CSV.encode(), content_type="text/csv")
+        response = self.client.post(reverse("trades:import"), {"file": upload})
+        self.assertEqual(response.context["result"].created, 2)
+        self.assertContains(response, "<td>3</td>", html=False)
+        response = self.client.post(reverse("trades:import"), {"file": SimpleUploadedFile("x.bin", b"")})
+        self.assertIn("format", response.context["error"])
+
+    def test_malformed_csv_upload(self):
+        # A field over csv.field_size_limit() raises csv.Error, not ValueError
+        body = f'{CSV.splitlines()[0]}\ncrypto,"{"x" * 200_000}",long\n'
+        upload = SimpleUploadedFile("export.csv", body.encode(), content_type="text/csv")
+        response = self.client.post(reverse("trades:import"), {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Malformed csv file: line 2", response.context["error"])
+        self.assertFalse(Trade.objects.exists())
@@ -0,0 +1,254 @@
+import gzip
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from trades import klines
+from trades.lru import LRUCache
+from trades.tests.fake_binance import FakeBinanceServer, interval_ms
+from trades.upstream_cache import SharedCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LRUCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_evicts_least_recently_used_beyond_max_entries(self):
+        cache = LRUCache(max_entries=2, max_bytes=1000, ttl=30, clock=self.clock)
+        cache.set("a", 1, 10)
+        cache.set("b", 2, 10)
+        cache.get("a")
+        cache.set("c", 3, 10)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual(cache.stats()["evictions"]["entries"], 1)
+
+    def test_byte_budget(self):
+        cache = LRUCache(max_entries=10, max_bytes=100, ttl=30, clock=self.clock)
+        cache.set("a", "x", 60)
+        cache.set("b", "y", 30)
+        cache.set("c", "z", 30)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.bytes, 60)
+        self.assertEqual(cache.stats()["evictions"]["bytes"], 1)
+        self.assertFalse(cache.set("huge", "!", 101))
+        # Replacing a key re-accounts its size
+        cache.set("b", "y2", 10)
+        self.assertEqual(cache.bytes, 40)
+
+    def test_expired_entries_are_dropped(self):
+        cache = LRUCache(max_entries=2, max_bytes=1000, ttl=30, clock=self.clock)
+        cache.set("a", 1, 10)
+        cache.set("b", 2, 10, ttl=60)
+        self.clock.now = 31
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.clock.now = 61
+        cache.set("c", 3, 10)
+        cache.set("d", 4, 10)
+        # "b" expired, so it goes first without counting as a capacity eviction
+        self.assertEqual(cache.stats()["evictions"], {"expired": 2, "entries": 0, "bytes": 0})
+        self.assertEqual(cache.bytes, 20)
+
+
+def expected_rows(server, interval, count):
+    step = interval_ms(interval)
+    last = server.now - server.now % step
+    return [server.candle(t, step) for t in range(last - (count - 1) * step, last + 1, step)]
+
+
+class KlineStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeBinanceServer(now=1_700_000_030_000)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        override = override_settings(BINANCE_API_BASE=self.server.url)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.shared = SharedCache(LocMemCache(f"kline-store-{id(self)}", {}))
+
+    def store(self, **kwargs):
+        kwargs.setdefault("shared", self.shared)
+        return klines.KlineStore(refresh_seconds=30, clock=lambda: self.server.now / 1000, **kwargs)
+
+    def test_refresh_fetches_only_new_candles(self):
+        store = self.store()
+        self.assertEqual(store.get("BTCUSDT", "1m", 500), expected_rows(self.server, "1m", 500))
+        last_open = store.get("BTCUSDT", "1m", 1)[0][0]
+
+        # Within the refresh interval nothing is fetched
+        self.server.now += 29_000
+        store.get("BTCUSDT", "1m", 500)
+        self.assertEqual(len(self.server.requests), 1)
+
+        self.server.now += 3 * 60_000
+        rows = store.get("BTCUSDT", "1m", 500)
+        self.assertEqual(rows, expected_rows(self.server, "1m", 500))
+        query = self.server.requests[-1]
+        self.assertEqual(int(query["startTime"]), last_open)  # the candle that was still open
+        self.assertEqual(len(self.server.requests), 2)
+        # The previously open candle again plus the four that started since
+        self.assertEqual(store.stats()["candles_fetched"], 1000 + 5)
+
+    def test_backfills_beyond_the_per_request_cap(self):
+        self.server.history_start = self.server.now - 2200 * 3_600_000
+        store = self.store()
+        rows = store.get("ETHUSDT", "1h", 5000)
+        self.assertEqual(rows, expected_rows(self.server, "1h", 2201))
+        self.assertEqual(len(self.server.requests), 4)  # latest window, two full pages back, one empty
+        self.assertTrue(all("endTime" in q for q in self.server.requests[1:]))
+        # History is known to be complete: no further requests
+        store.get("ETHUSDT", "1h", 5000)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_restarts_from_latest_window_when_far_behind(self):
+        store = self.store()
+        store.get("BTCUSDT", "1m", 100)
+        self.server.now += 10_000 * 60_000
+        self.assertEqual(store.get("BTCUSDT", "1m", 1000), expected_rows(self.server, "1m", 1000))
+        self.assertEqual(len(self.server.requests), 1 + klines.CATCH_UP_PAGES + 1)
+
+    def test_series_shared_between_workers(self):
+        self.store().get("BTCUSDT", "1m", 500)
+        self.assertEqual(self.store().get("BTCUSDT", "1m", 500), expected_rows(self.server, "1m", 500))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_series_version_identifies_the_rows(self):
+        _, first = self.store(shared=None).get_series("BTCUSDT", "1m", 500)
+        self.server.now += 2 * 60_000
+        # A second worker's first save: a per-process counter would repeat
+        _, second = self.store(shared=None).get_series("BTCUSDT", "1m", 500)
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.store().get_series("BTCUSDT", "1m", 500)[1], second)
+
+    def test_series_persisted_to_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.store(shared=None, directory=directory).get("SOLUSDT", "15m", 200)
+            restarted = self.store(shared=None, directory=directory)
+            self.assertEqual(restarted.get("SOLUSDT", "15m", 200), expected_rows(self.server, "15m", 200))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_merge_replaces_overlapping_candles(self):
+        rows = [[1, "a"], [2, "b"], [3, "c"]]
+        self.assertEqual(klines.merge(rows, [[3, "C"], [4, "d"]]), [[1, "a"], [2, "b"], [3, "C"], [4, "d"]])
+        self.assertEqual(klines.merge(rows, []), rows)
+
+
+@override_settings(
+    CACHES={"upstream": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "klines-tests"}},
+    TRADE_UPSTREAM_CACHE="upstream",
+    TRADE_KLINES_CACHE={"MAX_ENTRIES": 2, "MAX_BYTES": 10 * 1024 * 1024, "REFRESH_SECONDS": 30, "MAX_LIMIT": 5000},
+)
+class KlinesApiTests(SimpleTestCase):
+    url = reverse("trades:charts_crypto_data")
+
+    def setUp(self):
+        caches["upstream"].clear()
+        self.server = FakeBinanceServer(history_start=1_700_000_000_000 - 1500 * 14_400_000)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        override = override_settings(BINANCE_API_BASE=self.server.url)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def get(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_limits_share_one_series(self):
+        for limit in ("499", "500", "1000", "1"):
+            klines_ = self.get(symbol="ETHUSDT", interval="4h", limit=limit).json()["klines"]
+            self.assertEqual(klines_, expected_rows(self.server, "4h", int(limit)))
+        self.assertEqual(len(self.server.requests), 1)
+        # Longer history is paged in once, then served locally
+        self.assertEqual(len(self.get(symbol="ETHUSDT", interval="4h", limit="5000").json()["klines"]), 1501)
+        self.assertEqual(len(self.get(symbol="ETHUSDT", interval="4h", limit="1200").json()["klines"]), 1200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_local_cache_is_bounded(self):
+        for symbol in ("BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"):
+            self.get(symbol=symbol)
+        stats = klines.cache_stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["evictions"]["entries"], 2)
+        self.assertGreater(stats["bytes"], 0)
+        # Refresh locks don't accumulate per symbol either
+        self.assertEqual(len(klines.get_kline_store()._locks), klines.LOCK_STRIPES)
+
+    def test_rejects_malformed_symbols(self):
+        self.assertEqual(self.get(symbol="../etc").status_code, 400)
+        self.assertEqual(self.server.requests, [])
+
+    def test_upstream_errors_are_502(self):
+        self.assertEqual(self.get(symbol="NOTREAL").status_code, 502)
+
+
+@override_settings(
+    CACHES={"upstream": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "klines-format-tests"}},
+    TRADE_UPSTREAM_CACHE="upstream",
+    TRADE_KLINES_CACHE={"REFRESH_SECONDS": 30},
+)
+class KlinesFormatTests(SimpleTestCase):
+    url = reverse("trades:charts_crypto_data")
+
+    def setUp(self):
+        caches["upstream"].clear()
+        self.server = FakeBinanceServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        override = override_settings(BINANCE_API_BASE=self.server.url)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_columns_round_trip(self):
+        raw = self.client.get(self.url, {"symbol": "BTCUSDT", "interval": "1h", "limit": 300}).json()["klines"]
+        cols = self.client.get(self.url, {"symbol": "BTCUSDT", "interval": "1h", "limit": 300, "format": "columns"}).json()
+        times = [cols["t0"]]
+        for gap in cols["dt"]:
+            times.append(times[-1] + gap)
+        self.assertEqual(times, [r[0] for r in raw])
+        self.assertEqual(set(cols["dt"]), {3_600_000})
+        for name, column in zip("ohlcv", range(1, 6)):
+            self.assertEqual(cols[name], [float(r[column]) for r in raw])
+
+    def test_columns_are_smaller(self):
+        params = {"symbol": "BTCUSDT", "interval": "1m", "limit": 1000}
+        raw = self.client.get(self.url, params).content
+        cols = self.client.get(self.url, {**params, "format": "columns"}).content
+        self.assertLess(len(cols), len(raw) / 2)
+
+    def test_gzip_when_accepted(self):
+        params = {"symbol": "BTCUSDT", "interval": "1h", "limit": 100, "format": "columns"}
+        response = self.client.get(self.url, params, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        plain = self.client.get(self.url, params).content
+        self.assertEqual(gzip.decompress(response.content), plain)
+
+    def test_encoded_payload_is_reused_until_the_series_changes(self):
+        params = {"symbol": "BTCUSDT", "interval": "1h", "limit": 100, "format": "columns"}
+        with mock.patch.object(klines, "to_columns", wraps=klines.to_columns) as encode:
+            first = self.client.get(self.url, params).content
+            self.assertEqual(self.client.get(self.url, params).content, first)
+            self.assertEqual(encode.call_count, 1)
+            # A refresh bumps the series version, so the payload is rebuilt
+            store = klines.get_kline_store()
+            store.clock = lambda: time.time() + 60
+            self.client.get(self.url, params)
+            self.assertEqual(encode.call_count, 2)
+
+    def test_unknown_format(self):
+        response = self.client.get(self.url, {"symbol": "BTCUSDT", "format": "xml"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,125 @@
+import json
+from unittest import mock
+
+import numpy as np
+from django.core.cache import caches
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from trades import analytics, importer, montecarlo, signals
+from trades.models import Tag, Trade
+from trades.tests.helpers import make_trade
+
+
+class SimulateTests(SimpleTestCase):
+    returns = np.where(np.random.default_rng(3).random(200) < 0.4, 2.0, -1.0)
+
+    @classmethod
+    def tearDownClass(cls):
+        montecarlo.shutdown()
+        super().tearDownClass()
+
+    def test_seeded_and_independent_of_workers(self):
+        one = montecarlo.simulate(self.returns, 2000, seed=5, shard_cells=40_000)
+        pooled = montecarlo.simulate(self.returns, 2000, seed=5, shard_cells=40_000, workers=2)
+        self.assertEqual(one, pooled)
+        self.assertNotEqual(one, montecarlo.simulate(self.returns, 2000, seed=6, shard_cells=40_000))
+
+    def test_certain_outcomes(self):
+        losing = montecarlo.simulate(np.full(10, -10.0), 500, ruin_pct=50)
+        self.assertEqual(losing["risk_of_ruin"], 1.0)
+        self.assertAlmostEqual(losing["max_drawdown_pct"]["50"], (1 - 0.9 ** 10) * 100)
+        self.assertAlmostEqual(losing["final_return_pct"]["99"], (0.9 ** 10 - 1) * 100)
+        winning = montecarlo.simulate(np.full(10, 1.0), 500, horizon=20)
+        self.assertEqual((winning["risk_of_ruin"], winning["probability_of_profit"]), (0.0, 1.0))
+        self.assertEqual(winning["max_drawdown_pct"]["99"], 0.0)
+        self.assertEqual(winning["bands"]["trade"][-1], 20)
+
+    def test_overflowing_returns_are_null(self):
+        result = montecarlo.simulate(np.full(20, 20.0), 200, horizon=5000)
+        self.assertIsNone(result["mean_return_pct"])
+        self.assertEqual(set(result["final_return_pct"].values()), {None})
+        self.assertIsNone(result["bands"]["50"][-1])
+        self.assertEqual(sum(result["histogram"]["counts"]), 200)
+        json.dumps(result, allow_nan=False)
+
+    def test_distribution_shapes(self):
+        result = montecarlo.simulate(self.returns, 1000)
+        self.assertEqual(sum(result["histogram"]["counts"]), 1000)
+        self.assertEqual(len(result["bands"]["50"]), len(result["bands"]["trade"]))
+        pcts = list(result["max_drawdown_pct"].values())
+        self.assertEqual(pcts, sorted(pcts))
+        self.assertEqual(montecarlo.simulate(np.empty(0)), {"trades": 0, "simulations": 0})
+
+
+@override_settings(TRADE_MONTE_CARLO={"WORKERS": 1})
+class MonteCarloCacheTests(TestCase):
+    def setUp(self):
+        caches["upstream"].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trades = [make_trade(result=Trade.Result.TAKE if i % 3 else Trade.Result.LOSS) for i in range(30)]
+
+    def run_simulation(self, **params):
+        with mock.patch.object(montecarlo, "simulate", wraps=montecarlo.simulate) as simulate:
+            result = analytics.monte_carlo(Trade.objects.all(), simulations=500, **params)
+        return result, simulate.call_count
+
+    def test_cached_until_the_data_changes(self):
+        first, calls = self.run_simulation()
+        self.assertEqual(calls, 1)
+        self.assertEqual(self.run_simulation(), (first, 0))
+        self.assertEqual(self.run_simulation(seed=1)[1], 1)
+
+        version = signals.data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trades[1].result = Trade.Result.LOSS
+            self.trades[1].save()
+        self.assertNotEqual(signals.data_version(), version)
+        second, calls = self.run_simulation()
+        self.assertEqual(calls, 1)
+        self.assertNotEqual(second["mean_return_pct"], first["mean_return_pct"])
+
+    def test_bulk_paths_and_tags_bump_the_version(self):
+        def bumps(action):
+            before = signals.data_version()
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+            return signals.data_version() != before
+
+        tag = Tag.objects.create(name="news")
+        self.assertTrue(bumps(lambda: self.trades[0].tags.add(tag)))
+        self.assertTrue(bumps(tag.delete))
+        self.assertTrue(bumps(lambda: signals.delete_trades(Trade.objects.filter(pk=self.trades[2].pk))))
+        self.assertTrue(bumps(lambda: importer.import_rows([{
+            "type": "crypto", "symbol": "X", "direction": "long", "result": "take", "price": "1", "stop_loss_price": "1",
+            "volume": "1", "date": "2024-01-01", "risk_percent": "1", "risk_reward_ratio": "2",
+        }])))
+
+    def test_version_lives_in_the_database(self):
+        version = signals.data_version()
+        caches["upstream"].clear()  # e.g. another worker's private cache
+        self.assertEqual(signals.data_version(), version)
+        try:
+            with transaction.atomic():
+                make_trade()
+                self.assertNotEqual(signals.data_version(), version)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(signals.data_version(), version)
+
+    def test_risk_override(self):
+        result, _ = self.run_simulation(risk_pct=10)
+        self.assertEqual(result["risk_pct"], 10)
+        np.testing.assert_allclose(
+            sorted(set(analytics.trade_returns(Trade.objects.all(), risk_pct=10))), [-10.0, 20.0]
+        )
+
+    def test_endpoint(self):
+        url = reverse("trades:stats_simulation")
+        data = self.client.get(url, {"simulations": 500, "ruin": 20, "type": "crypto"}).json()
+        self.assertEqual((data["trades"], data["simulations"], data["ruin_pct"]), (30, 500, 20.0))
+        self.assertEqual(self.client.get(url, {"type": "forex"}).json()["trades"], 0)
+        self.assertEqual(self.client.get(url, {"risk": "lots"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"seed": -1}).status_code, 400)
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from trades.models import Trade
+from trades.pagination import CursorPaginator, decode_cursor, encode_cursor
+from trades.tests.helpers import OfflineCalendarMixin, make_trade
+
+
+class CursorPaginationTests(OfflineCalendarMixin, TestCase):
+    def setUp(self):
+        now = timezone.now().replace(microsecond=0)
+        # Plenty of ties on date so created_at/id have to break them
+        for i in range(23):
+            make_trade(date=now - timedelta(hours=i // 4))
+
+    def walk(self, per_page):
+        paginator = CursorPaginator(Trade.objects.all(), per_page)
+        page = paginator.page()
+        pages = [page]
+        while page.has_next():
+            page = paginator.page(after=page.next_cursor)
+            pages.append(page)
+        return paginator, pages
+
+    def test_forward_walk_matches_model_ordering(self):
+        _, pages = self.walk(5)
+        seen = [t.pk for p in pages for t in p]
+        self.assertEqual(seen, list(Trade.objects.values_list("pk", flat=True)))
+        self.assertEqual([len(p) for p in pages], [5, 5, 5, 5, 3])
+        self.assertFalse(pages[0].has_previous())
+        self.assertFalse(pages[-1].has_next())
+
+    def test_backward_walk_returns_same_pages(self):
+        paginator, pages = self.walk(5)
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = paginator.page(before=page.previous_cursor)
+            self.assertEqual([t.pk for t in page], [t.pk for t in expected])
+        self.assertFalse(page.has_previous())
+
+    def test_links_stay_stable_under_inserts(self):
+        paginator = CursorPaginator(Trade.objects.all(), 5)
+        first = paginator.page()
+        expected = [t.pk for t in paginator.page(after=first.next_cursor)]
+        make_trade(date=timezone.now() + timedelta(days=1))  # lands on page 1
+        self.assertEqual([t.pk for t in paginator.page(after=first.next_cursor)], expected)
+
+    def test_cursor_round_trip(self):
+        trade = Trade.objects.first()
+        self.assertEqual(decode_cursor(encode_cursor(trade)), (trade.date, trade.created_at, trade.pk))
+
+    def test_list_view_cursor_mode(self):
+        url = reverse("trades:list")
+        response = self.client.get(url, {"pager": "cursor", "type": "crypto"})
+        self.assertTrue(response.context["cursor_pagination"])
+        page = response.context["page_obj"]
+        self.assertEqual(len(response.context["trades"]), 23)
+        self.assertFalse(page.has_next())
+        response = self.client.get(url, {"after": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
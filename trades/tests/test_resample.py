@@ -0,0 +1,159 @@
+import numpy as np
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from trades import klines, resample
+from trades.tests.fake_binance import FakeBinanceServer, interval_ms
+
+
+def candles(start, step, count, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(count).cumsum()
+    open_ = np.r_[100.0, close[:-1]]
+    spread = rng.random(count)
+    return {
+        "t": start + step * np.arange(count, dtype=np.int64),
+        "o": open_,
+        "h": np.maximum(open_, close) + spread,
+        "l": np.minimum(open_, close) - spread,
+        "c": close,
+        "v": rng.random(count) * 10,
+    }
+
+
+def brute_force(cols, target):
+    buckets = {}
+    for i, t in enumerate(cols["t"].tolist()):
+        buckets.setdefault(t - t % target, []).append(i)
+    out = []
+    for start, idx in sorted(buckets.items()):
+        out.append((start, cols["o"][idx[0]], max(cols["h"][idx]), min(cols["l"][idx]), cols["c"][idx[-1]], sum(cols["v"][idx])))
+    return out
+
+
+class TimeframeTests(SimpleTestCase):
+    def test_parses_timeframes(self):
+        self.assertEqual(resample.timeframe_ms("10m"), 600_000)
+        self.assertEqual(resample.timeframe_ms("2d"), 172_800_000)
+        self.assertIsNone(resample.timeframe_ms("0h"))
+        self.assertIsNone(resample.timeframe_ms("1y"))
+
+    def test_picks_the_coarsest_source(self):
+        self.assertEqual(klines.resolve_interval("10m"), ("5m", 2))
+        self.assertEqual(klines.resolve_interval("3h"), ("1h", 3))
+        self.assertEqual(klines.resolve_interval("2w"), ("1w", 2))
+        self.assertEqual(klines.resolve_interval("4h"), ("4h", 1))
+        self.assertEqual(klines.resolve_interval("1M"), ("1M", 1))
+        self.assertEqual(klines.resolve_interval("7m"), ("1m", 7))
+        self.assertIsNone(klines.resolve_interval("nonsense"))
+
+
+class ResampleTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        hour = 3_600_000
+        cols = candles(1_700_000_000_000 - 1_700_000_000_000 % (6 * hour), hour, 500)
+        out = resample.resample(cols, 6 * hour)
+        got = list(zip(*(out[k].tolist() for k in "tohlcv")))
+        expected = brute_force(cols, 6 * hour)
+        self.assertEqual(len(got), len(expected))
+        for row, want in zip(got, expected):
+            np.testing.assert_allclose(row, want)
+
+    def test_drops_partial_leading_bucket(self):
+        hour = 3_600_000
+        cols = candles(1_700_002_800_000, hour, 10)  # starts 3 hours into a 4h bucket
+        out = resample.resample(cols, 4 * hour)
+        self.assertEqual(out["t"][0] % (4 * hour), 0)
+        self.assertEqual(out["o"][0], cols["o"][1])
+
+    def test_weeks_open_on_monday(self):
+        day = 86_400_000
+        monday = 1_699_833_600_000  # 2023-11-13
+        cols = candles(monday, 7 * day, 6)
+        out = resample.resample(cols, 14 * day, resample.origin_ms("2w"))
+        self.assertEqual(len(out["t"]), 3)
+        self.assertEqual(out["t"][0], monday)
+
+
+class LTTBTests(SimpleTestCase):
+    def test_keeps_endpoints_and_budget(self):
+        x = np.arange(10_000)
+        y = np.sin(x / 300.0)
+        keep = resample.lttb(x, y, 500)
+        self.assertEqual(len(keep), 500)
+        self.assertEqual((keep[0], keep[-1]), (0, 9_999))
+        self.assertTrue((np.diff(keep) > 0).all())
+
+    def test_keeps_spikes(self):
+        y = np.zeros(1000)
+        y[437] = 50
+        keep = resample.lttb(np.arange(1000), y, 20)
+        self.assertIn(437, keep.tolist())
+
+    def test_small_series_unchanged(self):
+        self.assertEqual(resample.lttb(np.arange(5), np.arange(5), 10).tolist(), [0, 1, 2, 3, 4])
+
+
+@override_settings(
+    CACHES={"upstream": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "resample-tests"}},
+    TRADE_UPSTREAM_CACHE="upstream",
+    TRADE_KLINES_CACHE={"REFRESH_SECONDS": 30, "MAX_LIMIT": 5000},
+)
+class ResampledApiTests(SimpleTestCase):
+    url = reverse("trades:charts_crypto_data")
+
+    def setUp(self):
+        caches["upstream"].clear()
+        self.server = FakeBinanceServer(now=1_700_000_030_000)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        override = override_settings(BINANCE_API_BASE=self.server.url)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def get(self, **params):
+        return self.client.get(self.url, {"symbol": "BTCUSDT", **params})
+
+    def test_higher_timeframe_derived_from_cached_series(self):
+        hour = 3_600_000
+        hourly = self.get(interval="1h", limit=400).json()["klines"]
+        rows = self.get(interval="3h", limit=100).json()["klines"]
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0]["interval"], "1h")
+        self.assertEqual(len(rows), 100)
+        by_time = {r[0]: r for r in hourly}
+        for row in rows:
+            parts = [by_time[t] for t in range(row[0], row[0] + 3 * hour, hour) if t in by_time]
+            self.assertEqual(float(row[1]), float(parts[0][1]))
+            self.assertEqual(float(row[2]), max(float(p[2]) for p in parts))
+            self.assertEqual(float(row[3]), min(float(p[3]) for p in parts))
+            self.assertEqual(float(row[4]), float(parts[-1][4]))
+            self.assertAlmostEqual(float(row[5]), sum(float(p[5]) for p in parts))
+            self.assertEqual(row[6], row[0] + 3 * hour - 1)
+        self.assertEqual(rows[-1][0], hourly[-1][0] - hourly[-1][0] % (3 * hour))
+
+    def test_columns_format(self):
+        cols = self.get(interval="10m", limit=50, format="columns").json()
+        self.assertEqual(self.server.requests[0]["interval"], "5m")
+        self.assertEqual(len(cols["c"]), 50)
+        self.assertEqual(set(cols["dt"]), {interval_ms("10m")})
+
+    def test_points_downsample_line_data(self):
+        cols = self.get(interval="1m", limit=1000, format="columns", points=200).json()
+        self.assertEqual(len(cols["c"]), 200)
+        full = self.get(interval="1m", limit=1000, format="columns").json()
+        self.assertEqual(cols["t0"], full["t0"])
+        self.assertEqual(cols["c"][-1], full["c"][-1])
+        raw = self.get(interval="1m", limit=1000, points=200).json()["klines"]
+        self.assertEqual(len(raw), 200)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_invalid_points(self):
+        self.assertEqual(self.get(points="many").status_code, 400)
+
+    def test_chart_page_offers_derived_intervals(self):
+        response = self.client.get(reverse("trades:charts_crypto"), {"interval": "10m", "limit": "2000"})
+        self.assertEqual(response.context["interval"], "10m")
+        self.assertEqual(response.context["limit"], 2000)
+        self.assertIn("10m", response.context["intervals"])
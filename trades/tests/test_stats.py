@@ -0,0 +1,123 @@
+import io
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from trades import rollups
+from trades.models import Tag, Trade, TradeStatsBucket
+from trades.stats import summarize, trade_stats
+from trades.tests.helpers import OfflineCalendarMixin, make_trade
+
+
+class TradeStatsTests(TestCase):
+    def setUp(self):
+        self.tag_a = Tag.objects.create(name="a")
+        self.tag_b = Tag.objects.create(name="b")
+        t1 = make_trade(risk_reward_ratio=3, risk_percent=2)
+        t1.tags.add(self.tag_a, self.tag_b)
+        make_trade(type=Trade.TradeType.FOREX, result=Trade.Result.LOSS, direction=Trade.Direction.SHORT, risk_reward_ratio=1)
+        make_trade(type=Trade.TradeType.FOREX, result=Trade.Result.TAKE, risk_reward_ratio=2)
+
+    def test_totals_and_breakdowns(self):
+        stats = trade_stats(Trade.objects.all())
+        self.assertEqual((stats["total"], stats["wins"], stats["losses"]), (3, 2, 1))
+        self.assertAlmostEqual(stats["win_rate"], 200 / 3)
+        self.assertEqual(stats["avg_rr"], Decimal(2))
+        self.assertAlmostEqual(float(stats["avg_risk_pct"]), 4 / 3)
+        self.assertEqual(
+            [(r["type"], r["total"], r["wins"], r["losses"], r["avg_rr"]) for r in stats["by_type"]],
+            [("crypto", 1, 1, 0, Decimal(3)), ("forex", 2, 1, 1, Decimal("1.5"))],
+        )
+        self.assertEqual(
+            [(r["direction"], r["total"], r["wins"]) for r in stats["by_direction"]],
+            [("long", 2, 2), ("short", 1, 0)],
+        )
+
+    def test_joined_filters_are_not_double_counted(self):
+        qs = Trade.objects.filter(tags__in=[self.tag_a, self.tag_b]).distinct()
+        self.assertEqual(trade_stats(qs)["total"], 1)
+
+    def test_empty(self):
+        stats = trade_stats(Trade.objects.none())
+        self.assertEqual((stats["total"], stats["win_rate"], stats["avg_rr"]), (0, 0, 0))
+        self.assertEqual(stats["by_type"], [])
+
+
+class StatsQueryCountTests(OfflineCalendarMixin, TestCase):
+    def setUp(self):
+        tag = Tag.objects.create(name="setup")
+        for _ in range(3):
+            make_trade().tags.add(tag)
+        self.tag = tag
+
+    def test_stats_view_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("trades:stats"))
+        self.assertEqual(response.context["total"], 3)
+
+    def test_list_view_query_count(self):
+        # count + page + tag prefetch + stats + tag list
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("trades:list"), {"tags": [self.tag.pk], "type": "crypto"})
+        self.assertEqual(response.context["stats"]["total"], 3)
+
+
+class StatsRollupTests(TestCase):
+    def assertRollupMatchesLive(self):
+        self.assertEqual(summarize(rollups.bucket_rows()), trade_stats(Trade.objects.all()))
+
+    def test_incremental_updates_match_live_aggregates(self):
+        rng = random.Random(42)
+        now = timezone.now()
+        trades = []
+        for _ in range(40):
+            trades.append(
+                make_trade(
+                    type=rng.choice(Trade.TradeType.values),
+                    result=rng.choice(Trade.Result.values),
+                    direction=rng.choice(Trade.Direction.values),
+                    date=now - timedelta(days=rng.randint(0, 5), hours=rng.randint(0, 23)),
+                    risk_reward_ratio=Decimal(rng.randint(50, 400)) / 100,
+                    risk_percent=rng.choice([0.5, 1.1, 2]),
+                )
+            )
+        self.assertRollupMatchesLive()
+
+        for trade in rng.sample(trades, 10):
+            trade.result = rng.choice(Trade.Result.values)
+            trade.type = rng.choice(Trade.TradeType.values)
+            trade.date = trade.date - timedelta(days=3)
+            trade.risk_reward_ratio = Decimal("1.25")
+            trade.save()
+        self.assertRollupMatchesLive()
+
+        trades[0].delete()
+        ids = [t.pk for t in trades[1:15]]
+        self.client.post(reverse("trades:bulk_delete"), {"ids": ids})
+        self.assertEqual(Trade.objects.count(), 25)
+        self.assertRollupMatchesLive()
+
+        before = sorted(TradeStatsBucket.objects.values_list("type", "direction", "result", "day", "count", "rr_sum", "risk_sum"))
+        rollups.rebuild()
+        after = sorted(TradeStatsBucket.objects.values_list("type", "direction", "result", "day", "count", "rr_sum", "risk_sum"))
+        self.assertEqual(before, after)
+        call_command("rebuild_trade_stats", "--check", stdout=io.StringIO())
+
+    def test_empty_buckets_are_removed(self):
+        trade = make_trade()
+        self.assertEqual(TradeStatsBucket.objects.count(), 1)
+        trade.delete()
+        self.assertEqual(TradeStatsBucket.objects.count(), 0)
+
+    def test_check_detects_drift(self):
+        make_trade()
+        TradeStatsBucket.objects.update(count=5)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_trade_stats", "--check", stdout=io.StringIO())
+        call_command("rebuild_trade_stats", stdout=io.StringIO())
+        self.assertRollupMatchesLive()
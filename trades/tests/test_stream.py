@@ -0,0 +1,173 @@
+import asyncio
+import json
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from config.asgi import CancelOnDisconnect
+from trades import stream
+from trades.stream import KlineHub
+from trades.tests.fake_binance import FakeBinanceServer
+
+
+class FakeFeed:
+    """Returns whatever rows the test sets, counting calls."""
+
+    def __init__(self):
+        self.rows = [[0, "1", "2", "0.5", "1.5", "10", 59_999], [60_000, "1.5", "1.6", "1.4", "1.55", "1", 119_999]]
+        self.calls = 0
+
+    def __call__(self, symbol, interval):
+        self.calls += 1
+        return [list(r) for r in self.rows]
+
+
+class KlineHubTests(SimpleTestCase):
+    async def test_one_poller_fans_out_changes(self):
+        feed = FakeFeed()
+        hub = KlineHub(fetch=feed, poll_seconds=0.02)
+        with hub.subscribe("BTCUSDT", "1m") as a, hub.subscribe("BTCUSDT", "1m") as b:
+            self.assertEqual(len(await a.next(1)), 2)
+            self.assertEqual(len(await b.next(1)), 2)
+            # Unchanged polls push nothing
+            polls = hub.polls
+            while hub.polls < polls + 3:
+                await asyncio.sleep(0.01)
+            self.assertEqual(await a.next(0.01), [])
+            # The open candle moves and a new one starts: only those two are sent
+            feed.rows = [feed.rows[1][:4] + ["1.7"] + feed.rows[1][5:], [120_000, "1.7", "1.7", "1.7", "1.7", "0", 179_999]]
+            rows = await a.next(1)
+            self.assertEqual([r[0] for r in rows], [60_000, 120_000])
+            self.assertEqual(rows[0][4], "1.7")
+            self.assertEqual(hub.stats()["channels"], {"BTCUSDT:1m": 2})
+            # A late subscriber catches up from the last poll without another fetch
+            with hub.subscribe("BTCUSDT", "1m") as c:
+                self.assertEqual([r[0] for r in await c.next(1)], [60_000, 120_000])
+        self.assertEqual(hub.stats()["channels"], {})
+        calls = feed.calls
+        await asyncio.sleep(0.1)
+        self.assertEqual(feed.calls, calls)  # poller stopped with its last subscriber
+
+    async def test_slow_subscriber_gets_latest_state(self):
+        feed = FakeFeed()
+        hub = KlineHub(fetch=feed, poll_seconds=0.01)
+        with hub.subscribe("ETHUSDT", "1m") as sub:
+            for close in ("1.6", "1.7", "1.8"):
+                feed.rows = [feed.rows[0], feed.rows[1][:4] + [close] + feed.rows[1][5:]]
+                await asyncio.sleep(0.05)
+            rows = await sub.next(1)
+            self.assertEqual(len(rows), 2)
+            self.assertEqual(rows[-1][4], "1.8")
+
+    async def test_poll_errors_keep_the_channel_alive(self):
+        calls = []
+
+        def failing(symbol, interval):
+            calls.append(1)
+            raise OSError("network down")
+
+        hub = KlineHub(fetch=failing, poll_seconds=0.01)
+        with self.assertLogs("trades.stream", "WARNING"):
+            with hub.subscribe("BTCUSDT", "1h") as sub:
+                self.assertEqual(await sub.next(0.1), [])
+        self.assertGreater(len(calls), 1)
+
+
+@override_settings(TRADE_KLINES_STREAM={"POLL_SECONDS": 0.05, "HEARTBEAT_SECONDS": 0.2})
+class StreamViewTests(SimpleTestCase):
+    url = reverse("trades:charts_crypto_stream")
+
+    def setUp(self):
+        self.server = FakeBinanceServer(now=1_700_000_030_000)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        override = override_settings(BINANCE_API_BASE=self.server.url)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    async def read_event(self, content):
+        while True:
+            chunk = await anext(content)
+            if chunk.startswith(b"event: candles"):
+                return json.loads(chunk.split(b"data: ", 1)[1])
+
+    async def test_streams_changed_candles_with_one_poller(self):
+        first = await self.async_client.get(self.url, {"symbol": "BTCUSDT", "interval": "1m"})
+        second = await self.async_client.get(self.url, {"symbol": "BTCUSDT", "interval": "1m"})
+        self.assertEqual(first["Content-Type"], "text/event-stream")
+        a, b = first.streaming_content, second.streaming_content
+        try:
+            snapshot = await self.read_event(a)
+            self.assertEqual(snapshot["format"], "columns")
+            self.assertEqual(len(snapshot["c"]), 2)
+            await self.read_event(b)
+            # Time moves on: the next candle opens
+            self.server.now += 60_000
+            update = await self.read_event(a)
+            self.assertEqual(update["t0"] + sum(update["dt"]), 1_700_000_040_000)
+            pings = 0
+            while pings < 2:
+                pings += (await anext(b)) == b": ping\n\n"
+        finally:
+            await a.aclose()
+            await b.aclose()
+        # Two tabs, one poller: one upstream request per poll (plus one cut short)
+        polls = stream.get_hub().polls
+        self.assertIn(len(self.server.requests), (polls, polls + 1))
+
+    async def test_derived_intervals_are_resampled(self):
+        response = await self.async_client.get(self.url, {"symbol": "BTCUSDT", "interval": "3h"})
+        content = response.streaming_content
+        try:
+            event = await self.read_event(content)
+        finally:
+            await content.aclose()
+        self.assertEqual(event["t0"] % (3 * 3_600_000), 0)
+        self.assertEqual(self.server.requests[0]["interval"], "1h")
+
+    async def test_rejects_bad_parameters(self):
+        response = await self.async_client.get(self.url, {"symbol": "../x"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_wsgi_is_told_not_to_reconnect(self):
+        self.assertEqual(self.client.get(self.url).status_code, 204)
+
+
+class CancelOnDisconnectTests(SimpleTestCase):
+    async def test_cancels_streams_when_the_client_leaves(self):
+        cleaned = asyncio.Event()
+
+        async def endless(scope, receive, send):
+            self.assertEqual((await receive())["type"], "http.request")
+            try:
+                while True:
+                    await send({"type": "http.response.body", "body": b".", "more_body": True})
+                    await asyncio.sleep(0.01)
+            finally:
+                cleaned.set()
+
+        inbox = asyncio.Queue()
+        inbox.put_nowait({"type": "http.request", "body": b""})
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 3:
+                inbox.put_nowait({"type": "http.disconnect"})
+
+        await asyncio.wait_for(CancelOnDisconnect(endless)({"type": "http", "method": "GET"}, inbox.get, send), 2)
+        self.assertTrue(cleaned.is_set())
+
+    async def test_passes_results_through(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        inbox = asyncio.Queue()
+        inbox.put_nowait({"type": "http.request", "body": b""})
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await CancelOnDisconnect(app)({"type": "http", "method": "GET"}, inbox.get, send)
+        self.assertEqual(sent, [{"type": "http.response.body", "body": b"ok"}])
@@ -0,0 +1,56 @@
+import io
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from trades.models import Symbol, Trade
+from trades.tests.helpers import OfflineCalendarMixin, make_trade
+
+
+class SymbolTableTests(OfflineCalendarMixin, TestCase):
+    def counts(self):
+        return dict(Symbol.objects.values_list("name", "trade_count"))
+
+    def test_kept_in_sync_with_trades(self):
+        eth = make_trade(symbol="ETH/USDT")
+        make_trade(symbol="ETH/USDT")
+        btc = make_trade(symbol="BTC/USDT")
+        make_trade(symbol="")
+        self.assertEqual(self.counts(), {"ETH/USDT": 2, "BTC/USDT": 1})
+
+        eth.symbol = "ETH/BTC"
+        eth.save()
+        self.assertEqual(self.counts(), {"ETH/USDT": 1, "ETH/BTC": 1, "BTC/USDT": 1})
+
+        btc.delete()
+        self.client.post(reverse("trades:bulk_delete"), {"ids": [eth.pk]})
+        self.assertEqual(self.counts(), {"ETH/USDT": 1})
+
+    def test_rebuild_command_repairs_drift(self):
+        make_trade(symbol="ETH/USDT")
+        # A queryset .update() bypasses the signals and leaves the table stale
+        Trade.objects.update(symbol="SOL/USDT")
+        self.assertEqual(len(self.client.get(reverse("trades:list"), {"symbol": "sol"}).context["trades"]), 0)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_trade_stats", "--check", stdout=io.StringIO())
+        call_command("rebuild_trade_stats", stdout=io.StringIO())
+        self.assertEqual(self.counts(), {"SOL/USDT": 1})
+        self.assertEqual(len(self.client.get(reverse("trades:list"), {"symbol": "sol"}).context["trades"]), 1)
+
+    def test_list_filter_matches_substrings(self):
+        eth = make_trade(symbol="ETH/USDT")
+        make_trade(symbol="BTC/USD")
+        response = self.client.get(reverse("trades:list"), {"symbol": "eth/"})
+        self.assertEqual(list(response.context["trades"]), [eth])
+        response = self.client.get(reverse("trades:list"), {"symbol": "usd"})
+        self.assertEqual(len(response.context["trades"]), 2)
+
+    def test_autocomplete_ranks_prefix_matches_first(self):
+        make_trade(symbol="USDJPY")
+        for _ in range(3):
+            make_trade(symbol="EUR/USD")
+        response = self.client.get(reverse("trades:symbols"), {"q": "usd"})
+        self.assertEqual(response.json(), {"symbols": ["USDJPY", "EUR/USD"]})
+        response = self.client.get(reverse("trades:symbols"))
+        self.assertEqual(response.json()["symbols"][0], "EUR/USD")
@@ -0,0 +1,159 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from trades.upstream import CircuitOpen, UpstreamBusy, UpstreamClient, UpstreamError, UpstreamHTTPError, get_client
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.peers.add(self.client_address)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            status = server.script.pop(0) if server.script else 200
+        time.sleep(server.delay)
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.active -= 1
+            server.hits += 1
+
+
+class ScriptedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, script=(), delay=0.0):
+        super().__init__(("127.0.0.1", 0), ScriptedHandler)
+        self.script = list(script)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.peers = set()
+        self.active = self.max_active = self.hits = 0
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f"http://{host}:{port}/feed"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class UpstreamClientTests(SimpleTestCase):
+    def server(self, **kwargs):
+        server = ScriptedServer(**kwargs)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def upstream(self, **kwargs):
+        self.sleeps = []
+        self.clock = FakeClock()
+        kwargs.setdefault("sleep", self.sleeps.append)
+        return UpstreamClient(clock=self.clock, **kwargs)
+
+    def test_reuses_connections(self):
+        server = self.server()
+        client = self.upstream()
+        for _ in range(5):
+            self.assertEqual(client.get_json(server.url), {"ok": True})
+        self.assertEqual(len(server.peers), 1)
+
+    def test_retries_transient_errors_with_jittered_backoff(self):
+        server = self.server(script=[503, 429])
+        client = self.upstream(max_attempts=3, backoff=0.5)
+        self.assertEqual(client.get_json(server.url), {"ok": True})
+        self.assertEqual(server.hits, 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertTrue(0 <= self.sleeps[0] <= 0.5 and 0 <= self.sleeps[1] <= 1.0)
+        stats = client.stats()[server.url.split("/")[2]]
+        self.assertEqual((stats["requests"], stats["retries"], stats["breaker"]), (3, 2, "closed"))
+
+    def test_client_errors_are_not_retried(self):
+        server = self.server(script=[400])
+        client = self.upstream()
+        with self.assertRaises(UpstreamHTTPError) as ctx:
+            client.get(server.url)
+        self.assertEqual(ctx.exception.status, 400)
+        self.assertEqual(server.hits, 1)
+
+    def test_breaker_opens_then_lets_one_trial_through(self):
+        server = self.server(script=[500] * 4)
+        client = self.upstream(max_attempts=2, breaker_threshold=3, breaker_cooldown=30)
+        with self.assertRaises(UpstreamError):
+            client.get(server.url)
+        with self.assertRaises(UpstreamError):
+            client.get(server.url)  # third failure opens the breaker mid-retry
+        self.assertEqual(server.hits, 3)
+        with self.assertRaises(CircuitOpen):
+            client.get(server.url)
+        self.assertEqual(server.hits, 3)
+
+        self.clock.now += 31
+        with self.assertRaises(UpstreamError):
+            client.get(server.url)  # half-open trial fails: open again
+        self.assertEqual(server.hits, 4)
+        with self.assertRaises(CircuitOpen):
+            client.get(server.url)
+
+        self.clock.now += 31
+        self.assertEqual(client.get_json(server.url), {"ok": True})
+        self.assertEqual(list(client.stats().values())[0]["breaker"], "closed")
+
+    def test_limits_concurrency_per_host(self):
+        server = self.server(delay=0.2)
+        client = self.upstream(max_connections_per_host=2, acquire_timeout=5)
+        threads = [threading.Thread(target=client.get, args=(server.url,)) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(server.hits, 6)
+        self.assertEqual(server.max_active, 2)
+
+    def test_busy_host_fails_fast(self):
+        server = self.server(delay=0.5)
+        client = self.upstream(max_connections_per_host=1, acquire_timeout=0.05)
+        slow = threading.Thread(target=client.get, args=(server.url,))
+        slow.start()
+        time.sleep(0.1)
+        with self.assertRaises(UpstreamBusy):
+            client.get(server.url)
+        slow.join()
+
+    def test_connection_errors_are_upstream_errors(self):
+        client = self.upstream(max_attempts=2, timeout=1)
+        with self.assertRaises(UpstreamError):
+            client.get("http://127.0.0.1:9/unreachable")
+        self.assertEqual(len(self.sleeps), 1)
+
+
+@override_settings(TRADE_UPSTREAM={"MAX_ATTEMPTS": 1})
+class UpstreamStatsViewTests(SimpleTestCase):
+    def test_reports_hosts(self):
+        server = ScriptedServer()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        get_client().get(server.url)
+        hosts = self.client.get(reverse("trades:upstream_stats")).json()["hosts"]
+        self.assertEqual(hosts[server.url.split("/")[2]]["requests"], 1)
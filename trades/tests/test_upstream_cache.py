@@ -0,0 +1,111 @@
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from trades import klines
+from trades.tests.fake_redis import FakeRedisServer
+from trades.upstream_cache import SharedCache, decode, encode, get_shared_cache
+
+try:
+    import redis  # noqa: F401
+except ImportError:  # pragma: no cover
+    redis = None
+
+KLINES = [[1700000000000 + i * 60000, "100.1", "101.2", "99.8", "100.5", "12.3", 1700000059999 + i * 60000,
+           "1234.5", 42, "6.1", "612.3", "0"] for i in range(1000)]
+
+
+class EncodingTests(SimpleTestCase):
+    def test_round_trip_is_compact(self):
+        blob = encode(KLINES)
+        self.assertEqual(decode(blob), KLINES)
+        self.assertLess(len(blob), len(pickle.dumps(KLINES)) / 3)
+
+
+class SharedCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = SharedCache(LocMemCache("shared-cache-tests", {}))
+        self.cache.backend.clear()
+
+    def test_counts_hits_misses_and_latency_per_namespace(self):
+        self.assertIsNone(self.cache.get("klines:BTCUSDT:1h:500"))
+        self.cache.set("klines:BTCUSDT:1h:500", [[1, "2"]], 30)
+        self.assertEqual(self.cache.get("klines:BTCUSDT:1h:500"), [[1, "2"]])
+        self.cache.get("calendar:state")
+
+        counters = self.cache.counters()["namespaces"]
+        self.assertEqual(counters["klines"]["hits"], 1)
+        self.assertEqual(counters["klines"]["misses"], 1)
+        self.assertEqual(counters["klines"]["hit_rate"], 0.5)
+        self.assertEqual(counters["klines"]["sets"], 1)
+        self.assertGreater(counters["klines"]["bytes_written"], 0)
+        self.assertIsNotNone(counters["klines"]["get_avg_ms"])
+        self.assertEqual(counters["calendar"]["misses"], 1)
+
+    def test_add_is_exclusive(self):
+        self.assertTrue(self.cache.add("calendar:lock", 1, 60))
+        self.assertFalse(self.cache.add("calendar:lock", 2, 60))
+        self.cache.delete("calendar:lock")
+        self.assertTrue(self.cache.add("calendar:lock", 3, 60))
+
+
+class BackendTests(SimpleTestCase):
+    """The same SharedCache works over every configurable backend."""
+
+    def exercise(self, backend):
+        first, second = SharedCache(backend), SharedCache(backend)
+        first.set("klines:ETHUSDT:1d:1000", KLINES, 30)
+        # A second "process" reads what the first wrote
+        self.assertEqual(second.get("klines:ETHUSDT:1d:1000"), KLINES)
+        self.assertTrue(first.add("calendar:lock", 1, 60))
+        self.assertFalse(second.add("calendar:lock", 1, 60))
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={"upstream": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location,
+            }}):
+                self.exercise(caches["upstream"])
+
+    @unittest.skipIf(redis is None, "redis-py is not installed")
+    def test_redis_backend_against_local_stand_in(self):
+        with FakeRedisServer() as server:
+            with override_settings(CACHES={"upstream": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": server.url,
+            }}):
+                self.exercise(caches["upstream"])
+        self.assertIn(b"GET", server.commands)
+        self.assertIn(b"SET", server.commands)
+
+
+@override_settings(
+    CACHES={"upstream": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "klines-view-tests"}},
+    TRADE_UPSTREAM_CACHE="upstream",
+)
+class KlinesViewCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["upstream"].clear()
+        get_shared_cache().reset_counters()
+        klines.get_kline_store.cache_clear()
+
+    def test_klines_are_fetched_once_and_counted(self):
+        url = reverse("trades:charts_crypto_data")
+        with mock.patch.object(klines, "fetch_klines", return_value=KLINES) as fetch:
+            for _ in range(3):
+                response = self.client.get(url, {"symbol": "btcusdt", "interval": "1h", "limit": "500"})
+                self.assertEqual(response.json()["klines"], KLINES[-500:])
+            # Another worker: empty local store, warm shared cache
+            klines.get_kline_store.cache_clear()
+            self.client.get(url, {"symbol": "btcusdt", "interval": "1h", "limit": "500"})
+        fetch.assert_called_once_with("BTCUSDT", "1h", klines.FETCH_LIMIT)
+
+        stats = self.client.get(reverse("trades:cache_stats")).json()
+        self.assertEqual(stats["namespaces"]["klines"]["hits"], 1)
+        self.assertEqual(stats["namespaces"]["klines"]["misses"], 1)
+        self.assertEqual(stats["klines_series"]["hits"], 0)  # fresh store of the "other worker"
@@ -1,11 +1,20 @@
+import io
+from unittest import mock
+
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
+from PIL import Image
 
-from trades.models import Trade
+from trades import thumbnails
+from trades.filters import filter_by_tags
+from trades.image_store import get_image_store
+from trades.models import Tag, Trade
+from trades.tests.helpers import OfflineCalendarMixin, TempImageStoreMixin, make_trade
+from trades.thumbnails import thumbnail_format
 
 
-class TradeListViewTests(TestCase):
+class TradeListViewTests(OfflineCalendarMixin, TestCase):
     def setUp(self):
         self.crypto = Trade.objects.create(
             type=Trade.TradeType.CRYPTO,
@@ -38,10 +47,18 @@ class TradeListViewTests(TestCase):
         trades = list(response.context["trades"])
         self.assertEqual(trades, [self.crypto])
 
+    def test_list_links_stored_images(self):
+        Trade.objects.filter(pk=self.crypto.pk).update(large_image_sha256="a" * 64, large_image_size=1024)
+        response = self.client.get(reverse("trades:list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse("trades:image", args=[self.crypto.pk, "ltf"]))
+        self.assertNotContains(response, reverse("trades:image", args=[self.crypto.pk, "mtf"]))
+
 
-class TradeImageViewTests(TestCase):
-    def test_returns_binary_image(self):
-        trade = Trade.objects.create(
+class TradeImageViewTests(TempImageStoreMixin, TestCase):
+    def _trade_with_image(self, data):
+        digest, size = get_image_store().save(data)
+        return Trade.objects.create(
             type=Trade.TradeType.CRYPTO,
             symbol="BTC/USDT",
             price=10000,
@@ -52,12 +69,112 @@ class TradeImageViewTests(TestCase):
             date=timezone.now(),
             risk_percent=1,
             risk_reward_ratio=2,
-            large_image=b"data",
+            large_image_sha256=digest,
+            large_image_size=size,
             large_image_content_type="image/png",
             large_image_name="test.png",
         )
+
+    def test_returns_binary_image(self):
+        trade = self._trade_with_image(b"data")
         url = reverse("trades:image", args=[trade.pk, "ltf"])
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.content, b"data")
+        self.assertEqual(b"".join(response.streaming_content), b"data")
         self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["ETag"], f'"{trade.large_image_sha256}"')
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+    def test_if_none_match_returns_304_without_reading_store(self):
+        trade = self._trade_with_image(b"data")
+        get_image_store().delete(trade.large_image_sha256)
+        url = reverse("trades:image", args=[trade.pk, "ltf"])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"{trade.large_image_sha256}"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_request(self):
+        trade = self._trade_with_image(b"0123456789")
+        url = reverse("trades:image", args=[trade.pk, "ltf"])
+        response = self.client.get(url, HTTP_RANGE="bytes=2-4")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        response = self.client.get(url, HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+        response = self.client.get(url, HTTP_RANGE="bytes=20-")
+        self.assertEqual(response.status_code, 416)
+        # A stale If-Range falls back to the full body
+        response = self.client.get(url, HTTP_RANGE="bytes=2-4", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_thumbnail_variant(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (1600, 800), "red").save(buffer, format="PNG")
+        trade = self._trade_with_image(buffer.getvalue())
+        digest = trade.large_image_sha256
+        url = reverse("trades:image", args=[trade.pk, "ltf"])
+        # A miss answers with the original right away and renders in the background
+        response = self.client.get(url, {"size": "thumb", "v": digest[:16]})
+        self.assertEqual(response["ETag"], f'"{digest}"')
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertEqual(b"".join(response.streaming_content), buffer.getvalue())
+        thumbnails.schedule_thumbnail(digest).result(timeout=10)
+
+        response = self.client.get(url, {"size": "thumb", "v": digest[:16]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], thumbnail_format()[1])
+        self.assertEqual(response["ETag"], f'"{digest}-thumb"')
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn(f'filename="{thumbnails.thumbnail_filename("test.png")}"', response["Content-Disposition"])
+        self.assertNotIn(".png", response["Content-Disposition"])
+        with Image.open(io.BytesIO(b"".join(response.streaming_content))) as thumb:
+            self.assertLessEqual(thumb.height, 96)
+        # Cached: served from the store variant without re-rendering
+        get_image_store().open_variant(digest, "thumb").close()
+
+    def test_thumbnail_falls_back_to_original_for_non_images(self):
+        trade = self._trade_with_image(b"not an image")
+        url = reverse("trades:image", args=[trade.pk, "ltf"])
+        response = self.client.get(url, {"size": "thumb"})
+        self.assertEqual(b"".join(response.streaming_content), b"not an image")
+        with self.assertRaises(Exception):
+            thumbnails.schedule_thumbnail(trade.large_image_sha256).result(timeout=10)
+        # The failed render is remembered rather than retried on every request
+        with mock.patch("trades.thumbnails.schedule_thumbnail") as schedule:
+            response = self.client.get(url, {"size": "thumb"})
+        schedule.assert_not_called()
+        self.assertEqual(b"".join(response.streaming_content), b"not an image")
+
+    def test_versioned_url_is_immutable(self):
+        trade = self._trade_with_image(b"data")
+        url = reverse("trades:image", args=[trade.pk, "ltf"])
+        response = self.client.get(url, {"v": trade.large_image_sha256[:16]})
+        self.assertIn("immutable", response["Cache-Control"])
+
+
+class TagFilterTests(OfflineCalendarMixin, TestCase):
+    def setUp(self):
+        self.a = Tag.objects.create(name="a")
+        self.b = Tag.objects.create(name="b")
+        self.both = make_trade(symbol="BOTH")
+        self.both.tags.add(self.a, self.b)
+        self.only_a = make_trade(symbol="A")
+        self.only_a.tags.add(self.a)
+        make_trade(symbol="NONE")
+
+    def symbols(self, **params):
+        response = self.client.get(reverse("trades:list"), {"tags": [self.a.pk, self.b.pk], **params})
+        return sorted(t.symbol for t in response.context["trades"])
+
+    def test_match_any_does_not_duplicate_rows(self):
+        self.assertEqual(self.symbols(), ["A", "BOTH"])
+        self.assertEqual(self.symbols(tag_mode="any"), ["A", "BOTH"])
+
+    def test_match_all(self):
+        self.assertEqual(self.symbols(tag_mode="all"), ["BOTH"])
+
+    def test_no_distinct_join(self):
+        qs = filter_by_tags(Trade.objects.all(), [self.a.pk, self.b.pk], mode="all")
+        sql = str(qs.query).upper()
+        self.assertIn("EXISTS", sql)
+        self.assertNotIn("DISTINCT", sql)
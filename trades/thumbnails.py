@@ -0,0 +1,116 @@
+"""Small list-preview renditions of trade screenshots.
+
+Thumbnails are rendered with Pillow on a background thread pool and cached
+in the image store as a variant of the original digest, so a given
+screenshot is only ever resized once. Replacing an image changes its digest,
+which naturally points previews at a new cache entry; variants of images no
+trade references any more are removed by ``prune_trade_images``. Originals
+that cannot be decoded are remembered in the shared cache, so they are not
+re-rendered on every list view.
+"""
+from __future__ import annotations
+
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from .image_store import get_image_store
+from .upstream_cache import get_shared_cache
+
+try:
+    from PIL import Image, ImageOps, features
+except Exception:  # pragma: no cover
+    Image = None  # type: ignore
+
+THUMB_VARIANT = "thumb"
+# Digests are content addresses, so a failure holds until Pillow changes
+FAILED_KEY = "thumbnail-failed:{digest}"
+FAILED_SECONDS = 7 * 24 * 3600
+
+_executor: Optional[ThreadPoolExecutor] = None
+_inflight: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def thumbnail_format() -> Tuple[str, str]:
+    """``(Pillow format, content type)`` used for thumbnails."""
+    if Image is not None and features.check("webp"):
+        return "WEBP", "image/webp"
+    return "JPEG", "image/jpeg"
+
+
+def thumbnail_filename(filename: str) -> str:
+    """``filename`` with the extension of the thumbnail format."""
+    ext = ".webp" if thumbnail_format()[0] == "WEBP" else ".jpg"
+    return os.path.splitext(filename)[0] + ext
+
+
+def render_thumbnail(data: IO[bytes], box: Tuple[int, int]) -> bytes:
+    fmt, _ = thumbnail_format()
+    with Image.open(data) as img:
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(box, Image.Resampling.LANCZOS)
+        keep_alpha = fmt == "WEBP" and img.mode in ("RGBA", "LA", "P")
+        img = img.convert("RGBA" if keep_alpha else "RGB")
+        out = io.BytesIO()
+        if fmt == "WEBP":
+            img.save(out, format=fmt, quality=80, method=4)
+        else:
+            img.save(out, format=fmt, quality=80, optimize=True)
+    return out.getvalue()
+
+
+def _build(digest: str) -> None:
+    try:
+        store = get_image_store()
+        box = tuple(getattr(settings, "TRADE_THUMBNAIL_SIZE", (320, 96)))
+        with store.open(digest) as fh:
+            try:
+                data = render_thumbnail(fh, box)
+            except Exception:
+                get_shared_cache().set(FAILED_KEY.format(digest=digest), True, FAILED_SECONDS)
+                raise
+        store.save_variant(digest, THUMB_VARIANT, data)
+    finally:
+        with _lock:
+            _inflight.pop(digest, None)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        workers = int(getattr(settings, "TRADE_THUMBNAIL_WORKERS", 2))
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+    return _executor
+
+
+def schedule_thumbnail(digest: str) -> Future:
+    """Queue thumbnail generation; concurrent calls for a digest share one job."""
+    with _lock:
+        fut = _inflight.get(digest)
+        if fut is None:
+            fut = _get_executor().submit(_build, digest)
+            _inflight[digest] = fut
+        return fut
+
+
+def open_thumbnail(digest: str) -> Optional[IO[bytes]]:
+    """Open the cached thumbnail, or queue its generation and return ``None``.
+
+    Never waits for a render: callers serve the original meanwhile. Also
+    ``None`` when the original cannot be thumbnailed (not an image, Pillow
+    unavailable).
+    """
+    if Image is None:
+        return None
+    try:
+        return get_image_store().open_variant(digest, THUMB_VARIANT)
+    except FileNotFoundError:
+        pass
+    if not get_shared_cache().get(FAILED_KEY.format(digest=digest)):
+        schedule_thumbnail(digest)
+    return None
@@ -0,0 +1,258 @@
+"""Shared HTTP client for upstream feeds (Binance, ForexFactory).
+
+One pooled ``requests.Session`` keeps connections alive between calls, so
+steady-state fetches skip the TCP and TLS handshakes. Around every call the
+client applies, per host:
+
+* a concurrency limit (``MAX_CONNECTIONS_PER_HOST``); callers that cannot
+  get a slot within ``ACQUIRE_TIMEOUT_SECONDS`` fail fast with ``UpstreamBusy``;
+* retries with exponential backoff and full jitter for connection errors,
+  timeouts, 429 and 5xx responses;
+* a circuit breaker that, after ``BREAKER_THRESHOLD`` consecutive failures,
+  rejects calls with ``CircuitOpen`` for ``BREAKER_COOLDOWN_SECONDS`` and
+  then lets a single trial call through;
+* timing counters, reported by ``stats()``.
+
+Settings live in ``TRADE_UPSTREAM``. Without ``requests`` installed the
+client falls back to ``urllib`` (no pooling).
+"""
+from __future__ import annotations
+
+import functools
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+try:  # optional, we also support stdlib-only fallback
+    import requests  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
+except Exception:  # pragma: no cover
+    requests = None  # type: ignore
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "application/json,text/plain,*/*",
+}
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class UpstreamHTTPError(UpstreamError):
+    def __init__(self, url: str, status: int):
+        super().__init__(f"{url} returned HTTP {status}")
+        self.status = status
+
+
+class UpstreamBusy(UpstreamError):
+    pass
+
+
+class CircuitOpen(UpstreamError):
+    pass
+
+
+def _retryable_status(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+class _Host:
+    """Concurrency slot pool, breaker state and counters for one host."""
+
+    def __init__(self, max_connections: int):
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial = False
+        self.counters = {
+            "requests": 0, "errors": 0, "retries": 0, "rejected": 0,
+            "in_flight": 0, "seconds": 0.0, "max_seconds": 0.0,
+        }
+
+
+class UpstreamClient:
+    def __init__(
+        self,
+        max_connections_per_host: int = 4,
+        max_attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 30.0,
+        acquire_timeout: float = 5.0,
+        timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_connections_per_host = max_connections_per_host
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.acquire_timeout = acquire_timeout
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+        self._hosts: Dict[str, _Host] = {}
+        self._hosts_lock = threading.Lock()
+        self.session = None
+        if requests is not None:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max_connections_per_host)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+
+    def _host(self, url: str) -> Tuple[str, _Host]:
+        name = urlsplit(url).netloc
+        with self._hosts_lock:
+            host = self._hosts.get(name)
+            if host is None:
+                host = self._hosts[name] = _Host(self.max_connections_per_host)
+        return name, host
+
+    # Circuit breaker
+
+    def _admit(self, name: str, host: _Host) -> None:
+        with host.lock:
+            if host.failures < self.breaker_threshold:
+                return
+            if self.clock() < host.open_until or host.trial:
+                host.counters["rejected"] += 1
+                raise CircuitOpen(f"{name} is failing; not calling it for now")
+            host.trial = True  # half-open: let this one call through
+
+    def _record(self, host: _Host, ok: bool) -> None:
+        with host.lock:
+            host.trial = False
+            if ok:
+                host.failures = 0
+                return
+            host.failures += 1
+            host.counters["errors"] += 1
+            if host.failures >= self.breaker_threshold:
+                host.open_until = self.clock() + self.breaker_cooldown
+
+    # Transport
+
+    def _send(self, url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str], timeout: float) -> Tuple[int, bytes, Dict[str, str]]:
+        if self.session is not None:
+            resp = self.session.get(url, params=params, headers=headers, timeout=timeout)
+            return resp.status_code, resp.content, dict(resp.headers)
+        import urllib.error, urllib.request
+        full = url + ("?" + urlencode(params) if params else "")
+        req = urllib.request.Request(full, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as r:  # nosec B310
+                return r.status, r.read(), dict(r.headers)
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read(), dict(exc.headers or {})
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(self.max_backoff, float(retry_after)))
+        return delay
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> bytes:
+        """GET ``url`` and return the body; raises ``UpstreamError`` subclasses."""
+        name, host = self._host(url)
+        self._admit(name, host)
+        if not host.slots.acquire(timeout=self.acquire_timeout):
+            with host.lock:
+                host.counters["rejected"] += 1
+                host.trial = False
+            raise UpstreamBusy(f"Too many concurrent requests to {name}")
+        try:
+            for attempt in range(self.max_attempts):
+                started = time.perf_counter()
+                with host.lock:
+                    host.counters["requests"] += 1
+                    host.counters["in_flight"] += 1
+                status, retry_after, error = 0, None, None
+                try:
+                    status, body, resp_headers = self._send(url, params, {**DEFAULT_HEADERS, **(headers or {})}, timeout or self.timeout)
+                    retry_after = resp_headers.get("Retry-After")
+                except Exception as exc:  # connection errors, timeouts
+                    error = exc
+                finally:
+                    elapsed = time.perf_counter() - started
+                    with host.lock:
+                        host.counters["in_flight"] -= 1
+                        host.counters["seconds"] += elapsed
+                        host.counters["max_seconds"] = max(host.counters["max_seconds"], elapsed)
+                if error is None and status < 400:
+                    self._record(host, ok=True)
+                    return body
+                if error is None and not _retryable_status(status):
+                    # The request was wrong, not the host: no retry, no breaker strike
+                    self._record(host, ok=True)
+                    raise UpstreamHTTPError(url, status)
+                self._record(host, ok=False)
+                if attempt + 1 >= self.max_attempts or host.failures >= self.breaker_threshold:
+                    if error is not None:
+                        raise UpstreamError(f"{name}: {error}") from error
+                    raise UpstreamHTTPError(url, status)
+                with host.lock:
+                    host.counters["retries"] += 1
+                self.sleep(self._delay(attempt, retry_after))
+        finally:
+            host.slots.release()
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def get_json(self, url: str, **kwargs) -> Any:
+        body = self.get(url, **kwargs)
+        try:
+            return json.loads(body)
+        except ValueError as exc:
+            raise UpstreamError(f"{url} did not return JSON") from exc
+
+    def get_text(self, url: str, **kwargs) -> str:
+        return self.get(url, **kwargs).decode("utf-8", errors="ignore")
+
+    def stats(self) -> Dict[str, Any]:
+        out = {}
+        with self._hosts_lock:
+            hosts = dict(self._hosts)
+        for name, host in sorted(hosts.items()):
+            with host.lock:
+                c = dict(host.counters)
+                attempts = c["requests"]
+                c["avg_ms"] = round(c.pop("seconds") / attempts * 1000, 3) if attempts else None
+                c["max_ms"] = round(c.pop("max_seconds") * 1000, 3)
+                c["breaker"] = (
+                    "closed" if host.failures < self.breaker_threshold
+                    else "open" if self.clock() < host.open_until else "half-open"
+                )
+            out[name] = c
+        return out
+
+
+@functools.lru_cache(maxsize=None)
+def get_client() -> UpstreamClient:
+    options = getattr(settings, "TRADE_UPSTREAM", None) or {}
+    return UpstreamClient(
+        max_connections_per_host=int(options.get("MAX_CONNECTIONS_PER_HOST", 4)),
+        max_attempts=int(options.get("MAX_ATTEMPTS", 3)),
+        backoff=float(options.get("BACKOFF_SECONDS", 0.5)),
+        max_backoff=float(options.get("MAX_BACKOFF_SECONDS", 8)),
+        breaker_threshold=int(options.get("BREAKER_THRESHOLD", 5)),
+        breaker_cooldown=float(options.get("BREAKER_COOLDOWN_SECONDS", 30)),
+        acquire_timeout=float(options.get("ACQUIRE_TIMEOUT_SECONDS", 5)),
+        timeout=float(options.get("TIMEOUT_SECONDS", 10)),
+    )
+
+
+@receiver(setting_changed)
+def _reset_client(*, setting: str, **kwargs) -> None:
+    if setting == "TRADE_UPSTREAM":
+        get_client.cache_clear()
@@ -0,0 +1,131 @@
+"""Cross-process cache for data fetched from upstream APIs.
+
+Calendar groups and Binance klines are shared by every worker through the
+Django cache named by ``TRADE_UPSTREAM_CACHE`` (see ``CACHES`` in settings:
+local memory, file-based or Redis). Values are stored as zlib-compressed
+compact JSON, which is several times smaller than the default pickle for
+these list-of-lists/dict payloads and keeps entries readable from any
+process or language.
+
+Every ``get`` and ``set`` is counted per namespace (the part of the key
+before the first ``:``); ``counters()`` reports them for this process.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_MISSING = object()
+
+
+def encode(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode(), 6)
+
+
+def decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+class _Counter:
+    __slots__ = ("hits", "misses", "sets", "get_seconds", "get_max", "set_seconds", "bytes_written")
+
+    def __init__(self):
+        self.hits = self.misses = self.sets = self.bytes_written = 0
+        self.get_seconds = self.get_max = self.set_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        gets = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / gets, 4) if gets else None,
+            "get_avg_ms": round(self.get_seconds / gets * 1000, 3) if gets else None,
+            "get_max_ms": round(self.get_max * 1000, 3),
+            "sets": self.sets,
+            "set_avg_ms": round(self.set_seconds / self.sets * 1000, 3) if self.sets else None,
+            "bytes_written": self.bytes_written,
+        }
+
+
+class SharedCache:
+    """Thin wrapper over a Django cache that encodes values and counts calls."""
+
+    def __init__(self, backend: BaseCache):
+        self.backend = backend
+        self._counters: Dict[str, _Counter] = {}
+        self._lock = threading.Lock()
+
+    def _counter(self, key: str) -> _Counter:
+        namespace = key.split(":", 1)[0]
+        counter = self._counters.get(namespace)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(namespace, _Counter())
+        return counter
+
+    def get(self, key: str, default: Any = None) -> Any:
+        started = time.perf_counter()
+        blob = self.backend.get(key, _MISSING)
+        elapsed = time.perf_counter() - started
+        counter = self._counter(key)
+        with self._lock:
+            counter.get_seconds += elapsed
+            counter.get_max = max(counter.get_max, elapsed)
+            if blob is _MISSING:
+                counter.misses += 1
+            else:
+                counter.hits += 1
+        return default if blob is _MISSING else decode(blob)
+
+    def set(self, key: str, value: Any, timeout: Optional[float] = DEFAULT_TIMEOUT) -> None:
+        blob = encode(value)
+        started = time.perf_counter()
+        self.backend.set(key, blob, timeout)
+        elapsed = time.perf_counter() - started
+        counter = self._counter(key)
+        with self._lock:
+            counter.sets += 1
+            counter.set_seconds += elapsed
+            counter.bytes_written += len(blob)
+
+    def add(self, key: str, value: Any, timeout: Optional[float] = DEFAULT_TIMEOUT) -> bool:
+        """Store only if absent; used as a cross-process lock."""
+        return self.backend.add(key, encode(value), timeout)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def counters(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {name: c.as_dict() for name, c in sorted(self._counters.items())}
+        return {
+            "backend": f"{type(self.backend).__module__}.{type(self.backend).__qualname__}",
+            "pid": os.getpid(),
+            "namespaces": namespaces,
+        }
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_shared_cache() -> SharedCache:
+    return SharedCache(caches[getattr(settings, "TRADE_UPSTREAM_CACHE", "default")])
+
+
+@receiver(setting_changed)
+def _reset_shared_cache(*, setting: str, **kwargs) -> None:
+    if setting in {"CACHES", "TRADE_UPSTREAM_CACHE"}:
+        get_shared_cache.cache_clear()
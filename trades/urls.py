@@ -10,10 +10,19 @@ from .views import (
     StrategyDeleteView,
     crypto_chart_view,
     crypto_klines_api,
+    crypto_klines_stream,
     stats_view,
+    stats_analytics,
+    stats_heatmap,
+    stats_simulation,
     trade_image,
     bulk_delete_trades,
+    export_trades,
+    import_trades,
     news_view,
+    symbol_autocomplete,
+    cache_stats,
+    upstream_stats,
 )
 
 
@@ -32,8 +41,17 @@ urlpatterns = [
     # Charts
     path("charts/crypto/", crypto_chart_view, name="charts_crypto"),
     path("charts/crypto/data/", crypto_klines_api, name="charts_crypto_data"),
+    path("charts/crypto/stream/", crypto_klines_stream, name="charts_crypto_stream"),
     path("bulk-delete/", bulk_delete_trades, name="bulk_delete"),
+    path("import/", import_trades, name="import"),
+    path("export/", export_trades, name="export"),
     path("image/<int:pk>/<str:kind>/", trade_image, name="image"),  # kind: ltf|mtf|stf
+    path("symbols/", symbol_autocomplete, name="symbols"),
     path("stats/", stats_view, name="stats"),
+    path("stats/analytics/", stats_analytics, name="stats_analytics"),
+    path("stats/heatmap/", stats_heatmap, name="stats_heatmap"),
+    path("stats/simulation/", stats_simulation, name="stats_simulation"),
     path("news/", news_view, name="news"),
+    path("cache-stats/", cache_stats, name="cache_stats"),
+    path("upstream-stats/", upstream_stats, name="upstream_stats"),
 ]
@@ -1,27 +1,29 @@
 from __future__ import annotations
 
-from django.db.models import Avg, Count, Q
-from django.http import Http404, HttpResponse, JsonResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import content_disposition_header, http_date
 from django.views.generic import CreateView, ListView, UpdateView, DetailView
 from django.views.decorators.http import require_POST
+import os
 import re
-from typing import List, Dict, Optional, Any
 import time
+from typing import List, Dict, Optional, Any
 
-try:  # optional, we also support stdlib-only fallback
-    import requests  # type: ignore
-except Exception:  # pragma: no cover
-    requests = None  # type: ignore
-
-try:  # optional HTML parser
-    from bs4 import BeautifulSoup  # type: ignore
-except Exception:  # pragma: no cover
-    BeautifulSoup = None  # type: ignore
-
+from .filters import TAG_MATCH_ANY, filter_trades
 from .forms import TradeForm, StrategyForm
-from .models import Tag, Trade, Strategy
+from .image_store import get_image_store
+from .models import IMAGE_KINDS, Tag, Trade, Strategy
+from .pagination import CursorPaginator
+from . import analytics, calendar_feed, export, heatmap, importer, klines, montecarlo, rollups, signals, stream, symbols
+from .stats import summarize, trade_stats
+from .thumbnails import THUMB_VARIANT, open_thumbnail, thumbnail_filename, thumbnail_format
+from .upstream import get_client
+from .upstream_cache import get_shared_cache
 
 
 class TradeListView(ListView):
@@ -30,31 +32,22 @@ class TradeListView(ListView):
     context_object_name = "trades"
     paginate_by = 25
 
-    def get_queryset(self):
-        qs = Trade.objects.select_related().prefetch_related("tags").all()
-
-        types = self.request.GET.getlist("type")
-        results = self.request.GET.getlist("result")
-        directions = self.request.GET.getlist("direction")
-        tags = self.request.GET.getlist("tags")  # tag ids
-        symbol = (self.request.GET.get("symbol") or "").strip()
-
-        if types:
-            qs = qs.filter(type__in=types)
-        if results:
-            qs = qs.filter(result__in=results)
-        if directions:
-            qs = qs.filter(direction__in=directions)
-        if tags:
-            try:
-                tag_ids = [int(t) for t in tags]
-                qs = qs.filter(tags__id__in=tag_ids).distinct()
-            except ValueError:
-                pass
-        if symbol:
-            qs = qs.filter(symbol__icontains=symbol)
+    def uses_cursor_pagination(self) -> bool:
+        params = self.request.GET
+        if params.get("after") or params.get("before"):
+            return True
+        mode = params.get("pager") or getattr(settings, "TRADE_LIST_PAGINATION", "offset")
+        return mode == "cursor"
 
-        return qs
+    def paginate_queryset(self, queryset, page_size):
+        if not self.uses_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size)
+        page = paginator.page(after=self.request.GET.get("after"), before=self.request.GET.get("before"))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_queryset(self):
+        return filter_trades(Trade.objects.prefetch_related("tags"), self.request.GET)
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
@@ -67,69 +60,24 @@ class TradeListView(ListView):
         except ValueError:
             ctx["selected_tags"] = set()
         ctx["q_symbol"] = (self.request.GET.get("symbol") or "").strip()
-        # For suggestions in filter UI
-        ctx["all_symbols"] = (
-            Trade.objects.exclude(symbol="").values_list("symbol", flat=True)
-            .distinct().order_by("symbol")
-        )
+        ctx["tag_mode"] = self.request.GET.get("tag_mode") or TAG_MATCH_ANY
+        # Filters to carry over into pagination links
+        params = self.request.GET.copy()
+        for key in ("page", "after", "before"):
+            params.pop(key, None)
+        if self.uses_cursor_pagination():
+            params["pager"] = "cursor"
+            ctx["cursor_pagination"] = True
+        ctx["page_query"] = params.urlencode()
+        ctx["export_formats"] = export.available_formats()
         # Stats for the currently filtered queryset (not just current page)
-        filtered_qs = self.get_queryset()
-        total = filtered_qs.count()
-        wins = filtered_qs.filter(result=Trade.Result.TAKE).count()
-        losses = filtered_qs.filter(result=Trade.Result.LOSS).count()
-        win_rate = (wins / total * 100) if total else 0
-        avg_rr = filtered_qs.aggregate(v=Avg("risk_reward_ratio"))["v"] or 0
-        avg_risk_pct = filtered_qs.aggregate(v=Avg("risk_percent"))["v"] or 0
-        by_type = (
-            filtered_qs.values("type")
-            .annotate(
-                total=Count("id"),
-                wins=Count("id", filter=Q(result=Trade.Result.TAKE)),
-                losses=Count("id", filter=Q(result=Trade.Result.LOSS)),
-                avg_rr=Avg("risk_reward_ratio"),
-            )
-            .order_by("type")
-        )
-        by_direction = (
-            filtered_qs.values("direction")
-            .annotate(
-                total=Count("id"),
-                wins=Count("id", filter=Q(result=Trade.Result.TAKE)),
-                losses=Count("id", filter=Q(result=Trade.Result.LOSS)),
-                avg_rr=Avg("risk_reward_ratio"),
-            )
-            .order_by("direction")
-        )
-        ctx["stats"] = {
-            "total": total,
-            "wins": wins,
-            "losses": losses,
-            "win_rate": win_rate,
-            "avg_rr": avg_rr or 0,
-            "avg_risk_pct": avg_risk_pct or 0,
-            "by_type": list(by_type),
-            "by_direction": list(by_direction),
-        }
-        # High impact news/events from the economic calendar
+        ctx["stats"] = trade_stats(self.object_list)
+        # Upcoming high impact events, read from the index built at refresh time
         try:
-            cal_res = _get_calendar_cached(force_refresh=False)
-            high_events = []
-            for day in cal_res.get("calendar", []) or []:
-                label = str(day.get("label") or "")
-                for ev in (day.get("events") or []):
-                    if (ev.get("impact") or "").strip().lower() == "high":
-                        high_events.append({
-                            "date": label,
-                            "time": ev.get("time") or "—",
-                            "currency": ev.get("currency") or "",
-                            "event": ev.get("event") or "",
-                            "url": ev.get("url") or "",
-                        })
-                        if len(high_events) >= 10:
-                            break
-                if len(high_events) >= 10:
-                    break
-            ctx["high_impact_events"] = high_events
+            cal_res = calendar_feed.get_calendar()
+            ctx["high_impact_events"] = calendar_feed.select_events(
+                cal_res["index"], impacts=["High"], since=time.time(), limit=10
+            )
             ctx["calendar_error"] = cal_res.get("error")
         except Exception:
             ctx["high_impact_events"] = []
@@ -187,75 +135,191 @@ class StrategyDeleteView(DeleteView):
 
 
 def stats_view(request):
-    qs = Trade.objects.all()
-
-    total = qs.count()
-    wins = qs.filter(result=Trade.Result.TAKE).count()
-    losses = qs.filter(result=Trade.Result.LOSS).count()
-    win_rate = (wins / total * 100) if total else 0
-
-    avg_rr = qs.aggregate(v=Avg("risk_reward_ratio"))["v"] or 0
-    avg_risk_pct = qs.aggregate(v=Avg("risk_percent"))["v"] or 0
-
-    by_type = (
-        qs.values("type")
-        .annotate(
-            total=Count("id"),
-            wins=Count("id", filter=Q(result=Trade.Result.TAKE)),
-            losses=Count("id", filter=Q(result=Trade.Result.LOSS)),
-            avg_rr=Avg("risk_reward_ratio"),
-        )
-        .order_by("type")
-    )
+    # Read the incrementally maintained rollup: O(buckets), not O(trades)
+    context = summarize(rollups.bucket_rows())
+    # Equity curve and breakdowns load from stats_analytics, which reads every trade
+    context["analytics_dimensions"] = [(dim, dim.capitalize()) for dim in analytics.DIMENSIONS]
+    context["simulation_percentiles"] = montecarlo.PERCENTILES
+    # Time-of-day heatmap loads from stats_heatmap, which reads the heatmap cube
+    context["trade_types"] = Trade.TradeType.choices
+    context["heatmap_hours"] = heatmap.HOURS
+    return render(request, "trades/stats.html", context)
 
-    by_direction = (
-        qs.values("direction")
-        .annotate(
-            total=Count("id"),
-            wins=Count("id", filter=Q(result=Trade.Result.TAKE)),
-            losses=Count("id", filter=Q(result=Trade.Result.LOSS)),
-            avg_rr=Avg("risk_reward_ratio"),
-        )
-        .order_by("direction")
-    )
 
-    context = {
-        "total": total,
-        "wins": wins,
-        "losses": losses,
-        "win_rate": win_rate,
-        "avg_rr": avg_rr or 0,
-        "avg_risk_pct": avg_risk_pct or 0,
-        "by_type": list(by_type),
-        "by_direction": list(by_direction),
-    }
-    return render(request, "trades/stats.html", context)
+def stats_analytics(request):
+    """Equity curve, drawdowns and expectancy of the trades matching the list filters."""
+    try:
+        window = max(2, min(1000, int(request.GET.get("window") or analytics.DEFAULT_WINDOW)))
+        points = max(3, min(5000, int(request.GET.get("points") or analytics.DEFAULT_POINTS)))
+    except ValueError:
+        return JsonResponse({"error": "Invalid window or points."}, status=400)
+    qs = filter_trades(Trade.objects.all(), request.GET)
+    return JsonResponse(analytics.trade_analytics(qs, window=window, points=points))
+
+
+def stats_simulation(request):
+    """Monte Carlo risk of ruin for the trades matching the list filters."""
+    options = analytics.monte_carlo_options()
+    try:
+        simulations = max(100, min(int(options["MAX_SIMULATIONS"]), int(request.GET.get("simulations") or 10_000)))
+        horizon = request.GET.get("horizon")
+        horizon = max(1, min(int(options["MAX_HORIZON"]), int(horizon))) if horizon else None
+        ruin_pct = max(1.0, min(99.0, float(request.GET.get("ruin") or 50)))
+        risk_pct = request.GET.get("risk")
+        risk_pct = max(0.01, min(100.0, float(risk_pct))) if risk_pct else None
+        seed = int(request.GET.get("seed") or 0)
+        if seed < 0:
+            raise ValueError(seed)
+    except ValueError:
+        return JsonResponse({"error": "Invalid simulation parameters."}, status=400)
+    qs = filter_trades(Trade.objects.all(), request.GET)
+    result = analytics.monte_carlo(qs, simulations, horizon, ruin_pct, risk_pct, seed)
+    return JsonResponse(result)
+
+
+def stats_heatmap(request):
+    """Win rate and average R by weekday x hour, read from the precomputed cube."""
+    trade_type = request.GET.get("type") or None
+    if trade_type and trade_type not in Trade.TradeType.values:
+        return JsonResponse({"error": "Unknown trade type."}, status=400)
+    return JsonResponse(heatmap.cube(trade_type))
+
+
+IMAGE_CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple]:
+    """Return ``(start, end)`` (inclusive) for a single byte range.
+
+    ``None`` means "ignore the header and send everything" (absent, malformed
+    or multi-range); ``()`` means the range cannot be satisfied.
+    """
+    m = _RANGE_RE.match(header.strip()) if header else None
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if m.group(1):
+        start = int(m.group(1))
+        end = int(m.group(2)) if m.group(2) else size - 1
+        if start >= size or end < start:
+            return ()
+        return start, min(end, size - 1)
+    suffix = int(m.group(2))
+    if suffix == 0 or size == 0:
+        return ()
+    return max(0, size - suffix), size - 1
+
+
+def _iter_file_range(fh, start: int, length: int, chunk_size: int = IMAGE_CHUNK_SIZE):
+    try:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = fh.read(min(chunk_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        fh.close()
 
 
 def trade_image(request, pk: int, kind: str):
-    trade = get_object_or_404(Trade, pk=pk)
-    if kind == "ltf":
-        data = trade.large_image
-        ct = trade.large_image_content_type or "application/octet-stream"
-        filename = trade.large_image_name or "large"
-    elif kind == "mtf":
-        data = trade.medium_image
-        ct = trade.medium_image_content_type or "application/octet-stream"
-        filename = trade.medium_image_name or "medium"
-    elif kind == "stf":
-        data = trade.short_image
-        ct = trade.short_image_content_type or "application/octet-stream"
-        filename = trade.short_image_name or "short"
-    else:
+    prefix = IMAGE_KINDS.get(kind)
+    if prefix is None:
         raise Http404("Unknown image kind")
-
-    if not data:
+    # Only the requested image's metadata columns are read
+    row = (
+        Trade.objects.filter(pk=pk)
+        .values_list(
+            f"{prefix}_image_sha256",
+            f"{prefix}_image_size",
+            f"{prefix}_image_content_type",
+            f"{prefix}_image_name",
+            "updated_at",
+        )
+        .first()
+    )
+    if row is None:
+        raise Http404("No trade")
+    digest, size, ct, filename, updated_at = row
+    if not digest:
         raise Http404("No image")
-    if isinstance(data, memoryview):
-        data = data.tobytes()
-    resp = HttpResponse(data, content_type=ct)
-    resp["Content-Disposition"] = f"inline; filename=\"{filename}\""
-    return resp
+    ct = ct or "application/octet-stream"
+    filename = filename or prefix
+    # ?size=thumb serves the cached list preview (see trades.thumbnails)
+    thumb = request.GET.get("size") == THUMB_VARIANT
+    etag = f'"{digest}-{THUMB_VARIANT}"' if thumb else f'"{digest}"'
+    last_modified = int(updated_at.timestamp())
+    stand_in = False
+
+    def finish(resp):
+        resp["ETag"] = etag
+        resp["Last-Modified"] = http_date(last_modified)
+        resp["Accept-Ranges"] = "bytes"
+        # Versioned URLs (?v=<digest prefix>) never change content, except
+        # while the original stands in for a thumbnail not rendered yet
+        version = request.GET.get("v") or ""
+        if len(version) >= 8 and digest.startswith(version) and not stand_in:
+            resp["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            resp["Cache-Control"] = "no-cache"
+        return resp
+
+    # 304/412 straight from the row, without touching the image store
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return finish(not_modified)
+
+    fh = None
+    if thumb:
+        fh = open_thumbnail(digest)
+        if fh is not None:
+            _, ct = thumbnail_format()
+            filename = thumbnail_filename(filename)
+            size = os.fstat(fh.fileno()).st_size
+        else:
+            # Rendering in the background, or not thumbnailable: send the original
+            etag = f'"{digest}"'
+            stand_in = True
+    if fh is None:
+        try:
+            fh = get_image_store().open(digest)
+        except FileNotFoundError:
+            raise Http404("No image")
+        if not size:
+            size = os.fstat(fh.fileno()).st_size
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if not if_range or if_range.strip() == etag:
+        byte_range = _parse_range(request.headers.get("Range", ""), size)
+    if byte_range == ():
+        fh.close()
+        resp = HttpResponse(status=416)
+        resp["Content-Range"] = f"bytes */{size}"
+        return finish(resp)
+    if byte_range is None:
+        resp = FileResponse(fh, content_type=ct, filename=filename)
+        resp.block_size = IMAGE_CHUNK_SIZE
+        return finish(resp)
+
+    start, end = byte_range
+    length = end - start + 1
+    resp = StreamingHttpResponse(_iter_file_range(fh, start, length), status=206, content_type=ct)
+    resp["Content-Length"] = str(length)
+    resp["Content-Range"] = f"bytes {start}-{end}/{size}"
+    resp["Content-Disposition"] = content_disposition_header(False, filename)
+    return finish(resp)
+
+
+def symbol_autocomplete(request):
+    q = request.GET.get("q") or ""
+    try:
+        limit = max(1, min(50, int(request.GET.get("limit") or 10)))
+    except ValueError:
+        limit = 10
+    return JsonResponse({"symbols": symbols.suggest(q, limit)})
 
 
 @require_POST
@@ -268,55 +332,83 @@ def bulk_delete_trades(request):
         except (TypeError, ValueError):
             continue
     if id_ints:
-        Trade.objects.filter(pk__in=id_ints).delete()
+        signals.delete_trades(Trade.objects.filter(pk__in=id_ints))
     return redirect("trades:list")
 
 
-_CAL_CACHE: Dict[str, Any] = {"ts": 0.0, "groups": [], "error": None}
-
-def _get_calendar_cached(force_refresh: bool = False, ttl: int = 600) -> Dict[str, Any]:
-    now = time.time()
-    if not force_refresh and (now - _CAL_CACHE["ts"]) < ttl and _CAL_CACHE["groups"]:
-        return {"calendar": _CAL_CACHE["groups"], "error": _CAL_CACHE["error"]}
-    calendar_error: Optional[str] = None
-    calendar: List[Dict[str, object]] = []
-    # Prefer JSON calendar API only; avoid HTML fallback that can 403
-    try:
-        data = _fetch_ff_calendar_json()
-        calendar = _parse_ff_calendar_json(data)
-    except Exception:  # pragma: no cover - network dependent
-        calendar_error = "Calendar feed unavailable (network blocked or rate limited)."
-    if not calendar and not calendar_error:
-        calendar_error = "Could not parse calendar data from ForexFactory."
-    _CAL_CACHE.update({"ts": now, "groups": calendar, "error": calendar_error})
-    return {"calendar": calendar, "error": calendar_error}
+def export_trades(request):
+    """Stream the trades matching the list filters (?format=csv|parquet|arrow)."""
+    fmt = request.GET.get("format") or "csv"
+    if fmt not in export.FORMATS:
+        return JsonResponse({"error": "Unknown format."}, status=400)
+    if fmt not in export.available_formats():
+        return JsonResponse({"error": f"The {fmt} export needs pyarrow."}, status=400)
+    content_type, extension, _ = export.FORMATS[fmt]
+    qs = filter_trades(Trade.objects.all(), request.GET)
+    chunks = export.export_chunks(fmt, qs)
+    if isinstance(request, ASGIRequest):
+        chunks = export.async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = content_disposition_header(True, f"trades.{extension}")
+    return response
+
+
+def import_trades(request):
+    """Upload a broker export; rows are streamed from the upload, not loaded whole."""
+    context: Dict[str, Any] = {"formats": importer.FORMATS}
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        fmt = request.POST.get("format") or (importer.guess_format(upload.name) if upload else None)
+        if upload is None:
+            context["error"] = "Choose a file to import."
+        elif fmt not in importer.FORMATS:
+            context["error"] = "Unknown file format; pick one explicitly."
+        else:
+            try:
+                context["result"] = importer.import_file(upload, fmt)
+            except ValueError as exc:
+                context["error"] = f"Malformed {fmt} file: {exc}"
+    return render(request, "trades/import.html", context)
 
 
 def news_view(request):
     # Render only the Economic Calendar; ForexFactory news removed
     refresh = request.GET.get("refresh") == "1"
-    cal_res = _get_calendar_cached(force_refresh=refresh)
+    # This page is only the calendar, so it may wait briefly on a cold cache
+    wait = float(getattr(settings, "TRADE_CALENDAR_WAIT_SECONDS", 10))
+    cal_res = calendar_feed.get_calendar(force_refresh=refresh, wait=wait)
+    index = cal_res["index"]
+    currencies = [c.upper() for c in request.GET.getlist("currency") if c]
+    impacts = [i for i in request.GET.getlist("impact") if i]
+    calendar = cal_res["calendar"]
+    if currencies or impacts:
+        calendar = calendar_feed.regroup(calendar_feed.select_events(index, currencies, impacts))
     return render(
         request,
         "trades/news.html",
         {
-            "calendar": cal_res["calendar"],
+            "calendar": calendar,
             "calendar_error": cal_res["error"],
+            "currencies": sorted(index["by_currency"]),
+            "impacts": calendar_feed.impact_choices(index),
+            "selected_currencies": currencies,
+            "selected_impacts": impacts,
         },
     )
 
 
 def crypto_chart_view(request):
     symbol = (request.GET.get("symbol") or "BTCUSDT").upper()
-    # Binance intervals: 1m,3m,5m,15m,30m,1h,2h,4h,6h,8h,12h,1d,3d,1w,1M
     interval = (request.GET.get("interval") or "1h").lower()
-    if interval not in {"1m","3m","5m","15m","30m","1h","2h","4h","6h","8h","12h","1d","3d","1w","1M"}:
+    if klines.resolve_interval(interval) is None:
         interval = "1h"
     mode = (request.GET.get("mode") or "candles").lower()
     if mode not in {"candles", "line"}:
         mode = "candles"
-    # Limit default candles to reasonable amount for performance
-    limit = 500
+    try:
+        limit = max(1, min(klines.max_limit(), int(request.GET.get("limit") or 500)))
+    except ValueError:
+        limit = 500
     context = {
         "symbol": symbol,
         "interval": interval,
@@ -326,33 +418,14 @@ def crypto_chart_view(request):
         "symbols": [
             "BTCUSDT","ETHUSDT","BNBUSDT","SOLUSDT","XRPUSDT","ADAUSDT","DOGEUSDT","DOTUSDT","TRXUSDT","MATICUSDT",
         ],
-        "intervals": ["1m","5m","15m","1h","4h","1d"],
+        # Non-native ones (10m, 2h from 1h...) are resampled server-side
+        "intervals": ["1m","5m","10m","15m","1h","2h","4h","1d","2d","1w"],
+        "limits": sorted({n for n in (500, 1000, 2000, 5000) if n <= klines.max_limit()} | {limit}),
     }
     return render(request, "trades/crypto_chart.html", context)
 
 
-# In-memory cache for Binance klines to reduce rate limits / flakiness
-_KLINES_CACHE: Dict[str, Any] = {"data": {}, "ts": {}}
-
-
-def _fetch_binance_klines(symbol: str, interval: str, limit: int = 500) -> List[List[Any]]:
-    base = "https://api.binance.com/api/v3/klines"
-    params = {"symbol": symbol, "interval": interval, "limit": str(limit)}
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
-        "Accept": "application/json,text/plain,*/*",
-    }
-    timeout = 10
-    if requests:
-        r = requests.get(base, params=params, headers=headers, timeout=timeout)
-        r.raise_for_status()
-        return r.json()  # type: ignore[no-any-return]
-    # urllib fallback
-    import urllib.parse, urllib.request, json as pyjson
-    url = base + "?" + urllib.parse.urlencode(params)
-    req = urllib.request.Request(url, headers=headers)
-    with urllib.request.urlopen(req, timeout=timeout) as resp:  # nosec B310
-        return pyjson.loads(resp.read().decode("utf-8", errors="ignore"))
+_ACCEPTS_GZIP_RE = re.compile(r"\bgzip\b")
 
 
 def crypto_klines_api(request):
@@ -360,279 +433,57 @@ def crypto_klines_api(request):
     interval = (request.GET.get("interval") or "1h").strip()
     limit_str = request.GET.get("limit") or "500"
     try:
-        limit = max(1, min(1000, int(limit_str)))
+        limit = max(1, min(klines.max_limit(), int(limit_str)))
     except ValueError:
         limit = 500
-    allowed = {"1m","3m","5m","15m","30m","1h","2h","4h","6h","8h","12h","1d","3d","1w","1M"}
-    if interval not in allowed:
+    if klines.resolve_interval(interval) is None:
         interval = "1h"
+    if not klines.SYMBOL_RE.match(symbol):
+        return JsonResponse({"error": "Invalid symbol."}, status=400)
+    # Line charts ask for at most one point per pixel (LTTB downsampling)
+    points = request.GET.get("points")
+    try:
+        points = max(3, min(limit, int(points))) if points else None
+    except ValueError:
+        return JsonResponse({"error": "Invalid points."}, status=400)
 
-    # Short TTL cache (30s) per (symbol, interval, limit)
-    key = f"{symbol}:{interval}:{limit}"
-    now = time.time()
-    ttl = 30
-    cached = _KLINES_CACHE["data"].get(key)
-    cts = _KLINES_CACHE["ts"].get(key, 0)
-    if cached is not None and (now - cts) < ttl:
-        return JsonResponse({"klines": cached})
+    fmt = request.GET.get("format") or "raw"
+    if fmt not in klines.FORMATS:
+        return JsonResponse({"error": "Unknown format."}, status=400)
+    gzipped = bool(_ACCEPTS_GZIP_RE.search(request.headers.get("Accept-Encoding", "")))
 
     try:
-        data = _fetch_binance_klines(symbol, interval, limit)
-        _KLINES_CACHE["data"][key] = data
-        _KLINES_CACHE["ts"][key] = now
-        return JsonResponse({"klines": data})
+        body = klines.encoded_klines(symbol, interval, limit, fmt, gzipped=gzipped, points=points)
     except Exception as exc:  # pragma: no cover - network dependent
         return JsonResponse({"error": "Failed to fetch Binance data."}, status=502)
+    response = HttpResponse(body, content_type="application/json")
+    if gzipped:
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
 
 
-def _fetch_forex_factory_calendar_html() -> str:
-    url = "https://www.forexfactory.com/calendar"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    }
-    timeout = 10
-    if requests:
-        resp = requests.get(url, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-        return resp.text
-    import urllib.request
-    req = urllib.request.Request(url, headers=headers)
-    with urllib.request.urlopen(req, timeout=timeout) as r:  # nosec B310
-        return r.read().decode("utf-8", errors="ignore")
-
-
-def _parse_forex_factory_calendar(html: str) -> List[Dict[str, object]]:
-    groups: List[Dict[str, object]] = []
-    if not BeautifulSoup:
-        return groups
-    soup = BeautifulSoup(html, "html.parser")
-
-    # Attempt 1: New FF calendar structure with day containers
-    day_containers = soup.select('[data-day], .calendar__day, .day')
-    if day_containers:
-        for day in day_containers:
-            # Day label
-            label = day.get("data-day") or day.get_text(strip=True)[:20]
-            title_el = day.find(class_=re.compile(r"(calendar__day|day__title|calendar-day|date)", re.I))
-            if title_el:
-                label = title_el.get_text(strip=True) or label
-
-            events: List[Dict[str, str]] = []
-            # Rows within a day
-            rows = day.select('[data-event-id], [data-eventid], .calendar__row, tr') or []
-            for r in rows:
-                # Skip if row is a header with no event
-                if r.name == "tr" and r.find("th"):
-                    continue
-                # Extract fields with flexible selectors
-                def pick_text(sel_list: List[str]) -> str:
-                    for sel in sel_list:
-                        el = r.select_one(sel)
-                        if el and el.get_text(strip=True):
-                            return el.get_text(strip=True)
-                    return ""
-
-                time_txt = pick_text([".time", ".calendar__time", "td.time", "[data-col='time']"]) or "—"
-                currency = pick_text([".currency", ".calendar__currency", "td.currency", "[data-col='currency']"]) or ""
-                event = pick_text([".event", ".calendar__event-title", "td.event", "[data-col='event']"]) or ""
-                if not event:
-                    continue
-
-                impact_txt = pick_text([".impact", ".calendar__impact", "td.impact", "[data-col='impact']"]) or ""
-                # Normalize impact severity if possible
-                severity = ""
-                if impact_txt:
-                    m = re.search(r"(low|medium|high|holiday|non-economic)", impact_txt, re.I)
-                    if m:
-                        severity = m.group(1).capitalize()
-                if not severity:
-                    # Count impact icons as heuristic
-                    icons = r.select(".impact img[alt], .impact i")
-                    if icons:
-                        count = len(icons)
-                        severity = {1: "Low", 2: "Medium", 3: "High"}.get(count, "")
-
-                actual = pick_text([".actual", "td.actual", "[data-col='actual']"]) or ""
-                forecast = pick_text([".forecast", "td.forecast", "[data-col='forecast']"]) or ""
-                previous = pick_text([".previous", "td.previous", "[data-col='previous']"]) or ""
-                link_el = r.select_one("a[href]")
-                url = link_el.get("href") if link_el else ""
-                if url and url.startswith("/"):
-                    url = "https://www.forexfactory.com" + url
-                events.append(
-                    {
-                        "time": time_txt,
-                        "currency": currency,
-                        "event": event,
-                        "impact": severity,
-                        "actual": actual,
-                        "forecast": forecast,
-                        "previous": previous,
-                        "url": url,
-                    }
-                )
-            if events:
-                groups.append({"label": label, "events": events})
-        if groups:
-            return groups
-
-    # Attempt 2: Global table approach
-    table = soup.find("table")
-    if table:
-        current_label = ""
-        events: List[Dict[str, str]] = []
-        for row in table.find_all("tr"):
-            # Detect day header rows
-            if "date" in (row.get("class") or []) or row.find("th"):
-                if events and current_label:
-                    groups.append({"label": current_label, "events": events})
-                    events = []
-                current_label = row.get_text(" ", strip=True)
-                continue
-            cols = [c.get_text(strip=True) for c in row.find_all("td")]
-            if len(cols) >= 4:
-                time_txt = cols[0] or "—"
-                currency = cols[1] if len(cols) > 1 else ""
-                event = cols[2] if len(cols) > 2 else ""
-                impact = cols[3] if len(cols) > 3 else ""
-                actual = cols[4] if len(cols) > 4 else ""
-                forecast = cols[5] if len(cols) > 5 else ""
-                previous = cols[6] if len(cols) > 6 else ""
-                if event:
-                    events.append({
-                        "time": time_txt, "currency": currency, "event": event,
-                        "impact": impact, "actual": actual, "forecast": forecast, "previous": previous, "url": ""
-                    })
-        if events and current_label:
-            groups.append({"label": current_label, "events": events})
-    return groups
-
-
-def _fetch_ff_calendar_json() -> List[Dict[str, Any]]:
-    # Known endpoints mirrored on FF CDN; try in order
-    endpoints = [
-        "https://nfs.faireconomy.media/ff_calendar_thisweek.json",
-        "https://cdn-nfs.faireconomy.media/ff_calendar_thisweek.json",
-    ]
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
-        "Accept": "application/json,text/plain,*/*",
-    }
-    timeout = 10
-    last_exc: Optional[Exception] = None
-    if requests:
-        for url in endpoints:
-            try:
-                resp = requests.get(url, headers=headers, timeout=timeout)
-                if resp.status_code == 200 and resp.headers.get("Content-Type", "").startswith("application/json"):
-                    return resp.json()  # type: ignore[no-any-return]
-                # Some CDNs return text/plain
-                if resp.status_code == 200:
-                    return resp.json()
-            except Exception as exc:  # pragma: no cover
-                last_exc = exc
-                continue
-        if last_exc:
-            raise last_exc
-    # urllib fallback
-    import urllib.request, json as pyjson
-    for url in endpoints:
-        try:
-            req = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(req, timeout=timeout) as r:  # nosec B310
-                data = r.read().decode("utf-8", errors="ignore")
-                return pyjson.loads(data)
-        except Exception as exc:  # pragma: no cover
-            last_exc = exc
-            continue
-    if last_exc:
-        raise last_exc
-    return []
-
-
-def _parse_ff_calendar_json(data: List[Dict[str, Any]]) -> List[Dict[str, object]]:
-    if not data:
-        return []
-    # Normalize and group by date (YYYY-MM-DD)
-    groups_map: Dict[str, List[Dict[str, str]]] = {}
-
-    def norm_impact(v: Any) -> str:
-        if v is None:
-            return ""
-        if isinstance(v, (int, float)):
-            return {1: "Low", 2: "Medium", 3: "High"}.get(int(v), "")
-        s = str(v).strip().lower()
-        if "high" in s:
-            return "High"
-        if "medium" in s or "med" in s:
-            return "Medium"
-        if "low" in s:
-            return "Low"
-        return s.capitalize() if s else ""
-
-    for ev in data:
-        # Attempt to support a few possible schemas
-        title = (ev.get("title") or ev.get("event") or "").strip()
-        if not title:
-            continue
-        country = (ev.get("country") or ev.get("currency") or "").strip()
-        impact = norm_impact(ev.get("impact"))
-        url = ev.get("id")
-        if url:
-            url = f"https://www.forexfactory.com/calendar?event={url}"
-        else:
-            url = ""
-        # Time handling: many feeds include either timestamp (seconds) or datetime string
-        t_raw = ev.get("timestamp") or ev.get("time") or ev.get("date") or ""
-        date_key = ""
-        time_txt = "—"
-        if isinstance(t_raw, (int, float)):
-            import datetime as _dt
-            dt = _dt.datetime.utcfromtimestamp(int(t_raw))
-            date_key = dt.strftime("%Y-%m-%d")
-            time_txt = dt.strftime("%H:%M")
-        else:
-            s = str(t_raw)
-            # Expected like "2025-08-31 13:30:00" or "2025-08-31T13:30:00Z"
-            m = re.match(r"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2})", s)
-            if m:
-                date_key, time_txt = m.group(1), m.group(2)
-            elif re.match(r"\d{4}-\d{2}-\d{2}$", s):
-                date_key, time_txt = s, "—"
-        if not date_key:
-            # Put unknown dates under a generic label
-            date_key = "Unknown Date"
-
-        actual = (ev.get("actual") or ev.get("actualValue") or "").strip() if isinstance(ev.get("actual"), str) or isinstance(ev.get("actualValue"), str) else (str(ev.get("actual")) if ev.get("actual") is not None else "")
-        forecast = (ev.get("forecast") or ev.get("forecastValue") or "").strip() if isinstance(ev.get("forecast"), str) or isinstance(ev.get("forecastValue"), str) else (str(ev.get("forecast")) if ev.get("forecast") is not None else "")
-        previous = (ev.get("previous") or ev.get("previousValue") or "").strip() if isinstance(ev.get("previous"), str) or isinstance(ev.get("previousValue"), str) else (str(ev.get("previous")) if ev.get("previous") is not None else "")
-
-        groups_map.setdefault(date_key, []).append({
-            "time": time_txt,
-            "currency": country,
-            "event": title,
-            "impact": impact,
-            "actual": actual,
-            "forecast": forecast,
-            "previous": previous,
-            "url": url,
-        })
-
-    # Sort groups by date where possible
-    def sort_key(k: str) -> Any:
-        m = re.match(r"(\d{4})-(\d{2})-(\d{2})", k)
-        if m:
-            return (int(m.group(1)), int(m.group(2)), int(m.group(3)))
-        return (9999, 12, 31, k)
-
-    groups: List[Dict[str, object]] = []
-    for k in sorted(groups_map.keys(), key=sort_key):
-        events = groups_map[k]
-        # sort events by time within day
-        def ekey(e: Dict[str, str]) -> Any:
-            m = re.match(r"(\d{2}):(\d{2})", e.get("time") or "")
-            return (int(m.group(1)), int(m.group(2))) if m else (99, 99)
-        events.sort(key=ekey)
-        groups.append({"label": k, "events": events})
-    return groups
+async def crypto_klines_stream(request):
+    """Server-Sent Events with the chart's updated and new candles (ASGI only)."""
+    symbol = (request.GET.get("symbol") or "BTCUSDT").upper().strip()
+    interval = (request.GET.get("interval") or "1h").strip()
+    if not klines.SYMBOL_RE.match(symbol) or klines.resolve_interval(interval) is None:
+        return JsonResponse({"error": "Invalid symbol or interval."}, status=400)
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be tied up for as long as the tab stays open;
+        # 204 tells EventSource not to reconnect
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(stream.events(symbol, interval), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer events
+    return response
+
+
+def cache_stats(request):
+    """Hit/miss/latency counters of the upstream caches (this process)."""
+    return JsonResponse({**get_shared_cache().counters(), "klines_series": klines.cache_stats()})
+
+
+def upstream_stats(request):
+    """Per-host request timings, retries and breaker state (this process)."""
+    return JsonResponse({"hosts": get_client().stats()})